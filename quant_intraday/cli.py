@@ -50,12 +50,26 @@ def live(inst: str, tf: str = "5m", strategy: str = "auto", exec_mode: str = "au
     asyncio.run(b.run())
 
 @app.command()
-def multi(cfg: str = "portfolio.yaml", risk: float = 0.007, dd: float = 0.08):
-    """Run portfolio orchestrator (multi-instrument)."""
+def multi(cfg: str = "portfolio.yaml", risk: float = 0.007, dd: float = 0.08, workers: int = 1):
+    """Run portfolio orchestrator (multi-instrument); --workers N shards instruments over N processes."""
+    if workers > 1:
+        from .engine.portfolio import load_items
+        from .engine.shards import ShardSupervisor
+        ShardSupervisor(load_items(cfg), workers, log_dir=os.getenv("QI_LOG_DIR","live_output"), risk_pct=risk, dd_limit=dd).run()
+        return
     cli = OKXClient(os.getenv("OKX_API_KEY"), os.getenv("OKX_API_SECRET"), os.getenv("OKX_API_PASSPHRASE"), os.getenv("OKX_ACCOUNT","trade"))
     orch = PortfolioOrchestrator(cli, cfg_path=cfg, risk_pct=risk, dd_limit=dd)
     asyncio.run(orch.run())
 
+@app.command()
+def halt(reason: str = "manual", resume: bool = False):
+    """Halt every bot/shard on this host for today (shared risk state); --resume clears it."""
+    from .utils.portfolio_guard import PortfolioGuard
+    g = PortfolioGuard()
+    if resume: g.resume()
+    else: g.halt(reason)
+    rprint({"halted": g.halted()})
+
 @app.command()
 def run(cfg: str = "qi.yaml"):
     """Run from master config (qi.yaml)."""
@@ -211,6 +225,32 @@ def kpi():
     exec_kpi_daemon.main()
 
 
+@app.command(name="latency-report")
+def latency_report(day: str = ""):
+    """Summarize order latency (signal -> ack -> fill) for a day (default today)."""
+    from quant_intraday.scripts import latency_report as lr  # type: ignore
+    lr.main(day or None)
+
+@app.command(name="sim-exchange")
+def sim_exchange(host: str = "127.0.0.1", port: int = 8765, inst: str = "BTC-USDT-SWAP", flow: str = "synthetic",
+                 tick_ms: float = 50.0, latency_ms: float = 0.0, speed: float = 1.0, equity: float = 10000.0, seed: int = 7):
+    """Run a local OKX stand-in (matching engine + synthetic or replayed flow). inst: comma list, INST[:MID]."""
+    from quant_intraday.sim import server  # type: ignore
+    server.main(host, port, [s.strip() for s in inst.split(",") if s.strip()], flow=flow, tick_ms=tick_ms,
+                latency_ms=latency_ms, speed=speed, equity=equity, seed=seed)
+
+@app.command()
+def loadtest(n: int = 10, rate: float = 20.0, duration: float = 60.0, warmup: float = 15.0, port: int = 8799,
+             book_channel: str = "books5", slo_lag_ms: float = 50.0, slo_msg_ms: float = 100.0,
+             slo_strategy_ms: float = 250.0, slo_cpu_pct: float = 80.0, slo_rss_mb_per_bot: float = 60.0):
+    """Load-test the orchestrator: n dry-run bots vs a local sim exchange at `rate` book msgs/s per instrument."""
+    from quant_intraday.scripts import loadtest as lt  # type: ignore
+    rep = lt.main(n, rate, duration, warmup, port, book_channel,
+                  slo={"loop_lag_p99_ms": slo_lag_ms, "msg_latency_p99_ms": slo_msg_ms, "strategy_p99_ms": slo_strategy_ms,
+                       "cpu_pct_mean": slo_cpu_pct, "rss_mb_per_bot": slo_rss_mb_per_bot})
+    if not rep["pass"]:
+        raise typer.Exit(code=1)
+
 @app.command()
 def check():
     """Aggregate health check: preflight + doctor"""
@@ -17,16 +17,13 @@ class AutoExecutor:
     async def execute(self, bot, side:str, pos_side:str, total_sz:int, px_hint:float):
         # read spread & queue position
         ticks=bot._costs.tick_size
-        b=bot._books or {}
-        bids=b.get("bids",[]); asks=b.get("asks",[])
-        spread = (float(asks[0][0]) - float(bids[0][0])) if (bids and asks) else ticks
-        spread_ticks = spread / ticks
+        b=bot._book
+        spread_ticks = (b.spread / ticks) if b else 1.0
         qpos = None
         # cancel budget: if超过上限，避免选择高撤单策略（optimizer/lob）
-        if hasattr(bot, "_qtrk"):
+        if hasattr(bot, "_qtrk") and b:
             try:
-                bids=b.get("bids",[]); asks=b.get("asks",[])
-                qpos = bot._qtrk.on_book(bids, asks, ticks)
+                qpos = bot._qtrk.on_snapshot(b, ticks)
             except Exception:
                 qpos = None
         # cancel budget: if超过上限，避免选择高撤单策略（optimizer/lob）
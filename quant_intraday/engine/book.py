@@ -0,0 +1,83 @@
+import numpy as np
+from dataclasses import dataclass
+from typing import Optional
+
+@dataclass(frozen=True)
+class BookSnapshot:
+    """
+    Parsed, typed order-book view built once per WS update and shared by every
+    consumer (limit pricing, slippage estimate, micro imbalance, executors,
+    queue tracker).
+    - ``bid_px/ask_px`` are best-first; ``*_cum`` is cumulative size and
+      ``*_cum_ntl`` cumulative notional (px*sz) for O(log N) depth walks.
+    - ``imbalance`` sums all levels held; ``top_imbalance`` uses the best level.
+    """
+    ts: int
+    bid_px: np.ndarray
+    bid_sz: np.ndarray
+    ask_px: np.ndarray
+    ask_sz: np.ndarray
+    bid_cum: np.ndarray
+    ask_cum: np.ndarray
+    bid_cum_ntl: np.ndarray
+    ask_cum_ntl: np.ndarray
+    mid: float
+    spread: float
+    spread_ticks: float
+    imbalance: float
+    top_imbalance: float
+    seq_id: int = -1
+
+    @property
+    def best_bid(self) -> float: return float(self.bid_px[0])
+    @property
+    def best_ask(self) -> float: return float(self.ask_px[0])
+    @property
+    def bid_q(self) -> float: return float(self.bid_sz[0])
+    @property
+    def ask_q(self) -> float: return float(self.ask_sz[0])
+
+    def vwap(self, side: str, notional: float) -> float:
+        """VWAP of taking ``notional`` (px*sz units) from the opposite side."""
+        if side == "buy": px, cq, cn = self.ask_px, self.ask_cum, self.ask_cum_ntl
+        else: px, cq, cn = self.bid_px, self.bid_cum, self.bid_cum_ntl
+        if notional <= 0 or not len(px): return float("nan")
+        k = int(np.searchsorted(cn, notional))
+        if k >= len(px):  # book exhausted: vwap of everything shown
+            return float(cn[-1] / cq[-1])
+        v0 = float(cn[k-1]) if k else 0.0; q0 = float(cq[k-1]) if k else 0.0
+        q = q0 + (notional - v0) / float(px[k])
+        return notional / q
+
+    def slippage(self, side: str, notional: float) -> float:
+        v = self.vwap(side, notional)
+        return 0.0 if v != v else abs(v - self.mid)
+
+def _side(levels):
+    # OKX level: [px, sz, liquidated_orders(deprecated), num_orders]
+    if not levels: return np.empty(0), np.empty(0)
+    a = np.array([(lv[0], lv[1]) for lv in levels], dtype=float)
+    return a[:, 0], a[:, 1]
+
+def make_snapshot(bid_px, bid_sz, ask_px, ask_sz, tick: float = 0.0, ts: int = 0, seq_id: int = -1) -> Optional[BookSnapshot]:
+    """Build a snapshot from best-first price/size arrays; ``None`` if a side is empty."""
+    if not len(bid_px) or not len(ask_px): return None
+    bb, ba = float(bid_px[0]), float(ask_px[0])
+    bq, aq = float(bid_sz[0]), float(ask_sz[0])
+    bsum, asum = float(bid_sz.sum()), float(ask_sz.sum())
+    spread = ba - bb
+    return BookSnapshot(
+        ts=ts, bid_px=bid_px, bid_sz=bid_sz, ask_px=ask_px, ask_sz=ask_sz,
+        bid_cum=np.cumsum(bid_sz), ask_cum=np.cumsum(ask_sz),
+        bid_cum_ntl=np.cumsum(bid_px * bid_sz), ask_cum_ntl=np.cumsum(ask_px * ask_sz),
+        mid=(ba + bb) / 2.0, spread=spread, spread_ticks=(spread / tick if tick else spread),
+        imbalance=(bsum - asum) / max(1e-9, bsum + asum),
+        top_imbalance=(bq - aq) / max(1e-9, bq + aq), seq_id=seq_id)
+
+def parse_books(d: dict, tick: float = 0.0) -> Optional[BookSnapshot]:
+    """Parse one OKX ``books5``/``books`` data item (string prices) into a snapshot."""
+    try:
+        bp, bs = _side(d.get("bids", [])); ap, az = _side(d.get("asks", []))
+        return make_snapshot(bp, bs, ap, az, tick, int(d.get("ts") or 0), int(d.get("seqId", -1)))
+    except (TypeError, ValueError, IndexError):
+        return None
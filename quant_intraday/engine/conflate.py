@@ -0,0 +1,62 @@
+import asyncio
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+class ConflatingSlot:
+    """
+    Latest-value slot: producers overwrite, consumers await a newer version and
+    always receive the newest value (intermediate values are dropped, not queued).
+    Each consumer tracks its own last-seen version, so many consumers can share
+    one slot.
+    """
+    __slots__ = ("value", "version", "drops", "gaps", "last_seq", "_evt")
+    def __init__(self):
+        self.value: Any = None; self.version = 0
+        self.drops = 0; self.gaps = 0; self.last_seq = -1
+        self._evt = asyncio.Event()
+
+    def publish(self, value, seq: int = -1, prev_seq: int = -1):
+        # OKX seqId/prevSeqId continuity (books*, tickers carry seqId)
+        if prev_seq not in (-1, None) and self.last_seq != -1 and prev_seq != self.last_seq:
+            self.gaps += 1
+        if seq not in (-1, None): self.last_seq = seq
+        self.value = value; self.version += 1
+        evt, self._evt = self._evt, asyncio.Event()
+        evt.set()
+
+    async def next(self, after: int = 0, timeout: float | None = None) -> Tuple[int, Any]:
+        """Wait for a version newer than ``after``; returns ``(version, value)``.
+        On timeout returns the current ``(version, value)`` unchanged."""
+        if self.version <= after:
+            try:
+                await asyncio.wait_for(self._evt.wait(), timeout) if timeout else await self._evt.wait()
+            except asyncio.TimeoutError:
+                return self.version, self.value
+        if after and self.version - after > 1:
+            self.drops += self.version - after - 1
+        return self.version, self.value
+
+class ConflatingChannel:
+    """Keyed set of ``ConflatingSlot``s (e.g. one per instrument) with aggregate stats."""
+    def __init__(self):
+        self._slots: Dict[Hashable, ConflatingSlot] = {}
+
+    def slot(self, key: Hashable) -> ConflatingSlot:
+        s = self._slots.get(key)
+        if s is None: s = self._slots[key] = ConflatingSlot()
+        return s
+
+    def publish(self, key: Hashable, value, seq: int = -1, prev_seq: int = -1):
+        self.slot(key).publish(value, seq, prev_seq)
+
+    async def next(self, key: Hashable, after: int = 0, timeout: float | None = None):
+        return await self.slot(key).next(after, timeout)
+
+    def latest(self, key: Hashable) -> Optional[Any]:
+        s = self._slots.get(key)
+        return s.value if s else None
+
+    def discard(self, key: Hashable):
+        self._slots.pop(key, None)
+
+    def stats(self) -> Dict[Hashable, dict]:
+        return {k: {"version": s.version, "drops": s.drops, "gaps": s.gaps} for k, s in self._slots.items()}
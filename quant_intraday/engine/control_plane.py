@@ -0,0 +1,131 @@
+import os, json, time, asyncio
+from dataclasses import dataclass, field, replace
+from typing import Dict, Optional
+
+# hot-reloaded JSON files living in the log dir (name -> <log_dir>/<name>.json)
+CONTROL_FILES = ("control", "weights", "alloc", "thresholds", "cooling", "risk_overrides")
+
+@dataclass(frozen=True)
+class ControlSnapshot:
+    """Immutable, versioned view of all control files.
+    A new snapshot object is published whenever any file changes; readers grab
+    ``plane.snapshot`` once and never see a half-applied update.  The dicts are
+    shared between readers and must be treated as read-only.
+    ``holds`` are in-memory pauses set by the process itself (owner -> reason,
+    see ``ControlPlane.hold``); they are never written to control.json.
+    """
+    version: int = 0
+    ts: float = 0.0
+    control: Dict = field(default_factory=dict)
+    weights: Dict = field(default_factory=dict)
+    alloc: Dict = field(default_factory=dict)
+    thresholds: Dict = field(default_factory=dict)
+    cooling: Dict = field(default_factory=dict)
+    risk_overrides: Dict = field(default_factory=dict)
+    holds: Dict = field(default_factory=dict)
+
+    def paused(self, now: float | None = None) -> bool:
+        if self.holds: return True
+        c = self.control
+        try:
+            if c.get("paused") is True: return True
+            pu = float(c.get("pause_until", 0) or 0)
+            return bool(pu) and (now or time.time()) < pu
+        except Exception:
+            return False
+
+def atomic_write_json(path: str, obj) -> None:
+    """Write JSON via tmp file + rename so watchers never read a partial file."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp.{os.getpid()}"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(obj, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+class ControlPlane:
+    """
+    Single owner of control.json / weights.json / alloc.json / thresholds.json /
+    cooling.json / risk_overrides.json for one log dir.
+    - One background task stats the files every ``interval_s`` (shared by all bots
+      of the process) and re-parses only files whose mtime changed.
+    - ``publish`` applies an update in-process immediately (and persists it), for
+      WebUI/autopilot callers living in the same process.
+    - Bots read ``snapshot`` lock-free; it is swapped atomically on change.
+    """
+    def __init__(self, log_dir: str = "live_output", interval_s: float = 1.0):
+        self.log_dir = log_dir; self.interval_s = interval_s
+        self._paths = {k: os.path.join(log_dir, f"{k}.json") for k in CONTROL_FILES}
+        self._mtimes: Dict[str, Optional[float]] = {}
+        self.snapshot = ControlSnapshot()
+        self._task: Optional[asyncio.Task] = None
+        self.refresh()
+
+    def _read(self, name: str):
+        """Return (changed, data) for one file; unparsable files keep the old value."""
+        path = self._paths[name]
+        try:
+            mt = os.stat(path).st_mtime
+        except FileNotFoundError:
+            if name in self._mtimes and self._mtimes[name] is None: return False, None
+            self._mtimes[name] = None
+            return True, {}
+        if self._mtimes.get(name) == mt: return False, None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f) or {}
+        except Exception:
+            # partially written / invalid: retry on next tick
+            return False, None
+        self._mtimes[name] = mt
+        return True, (data if isinstance(data, dict) else {})
+
+    def refresh(self) -> bool:
+        """Re-read changed files; publish a new snapshot if anything changed."""
+        upd = {}
+        for name in CONTROL_FILES:
+            changed, data = self._read(name)
+            if changed: upd[name] = data
+        if not upd: return False
+        s = self.snapshot
+        self.snapshot = replace(s, version=s.version + 1, ts=time.time(), **upd)
+        return True
+
+    def publish(self, name: str, obj: dict, persist: bool = True) -> ControlSnapshot:
+        """Push an update for one control file; visible to readers immediately."""
+        if name not in CONTROL_FILES: raise KeyError(f"unknown control file: {name}")
+        obj = dict(obj or {})
+        if persist:
+            atomic_write_json(self._paths[name], obj)
+            try: self._mtimes[name] = os.stat(self._paths[name]).st_mtime
+            except OSError: pass
+        s = self.snapshot
+        self.snapshot = replace(s, version=s.version + 1, ts=time.time(), **{name: obj})
+        return self.snapshot
+
+    def hold(self, owner: str, reason: Optional[str]) -> ControlSnapshot:
+        """Set (``reason``) or clear (``None``) an in-memory pause hold; paused while any hold is set."""
+        s = self.snapshot; holds = dict(s.holds)
+        if reason is None: holds.pop(owner, None)
+        else: holds[owner] = reason
+        self.snapshot = replace(s, version=s.version + 1, ts=time.time(), holds=holds)
+        return self.snapshot
+
+    async def watch(self):
+        while True:
+            await asyncio.sleep(self.interval_s)
+            try: self.refresh()
+            except Exception as e: print("[CTL] refresh error:", e)
+
+    def ensure(self, loop):
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self.watch())
+
+_PLANES: Dict[str, ControlPlane] = {}
+
+def get_control_plane(log_dir: str = "live_output") -> ControlPlane:
+    """Process-wide plane per log dir, so N bots share one watcher."""
+    key = os.path.abspath(log_dir)
+    cp = _PLANES.get(key)
+    if cp is None:
+        cp = _PLANES[key] = ControlPlane(log_dir)
+    return cp
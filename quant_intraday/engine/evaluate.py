@@ -0,0 +1,145 @@
+import time, asyncio, multiprocessing as mp
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+import numpy as np, pandas as pd
+from ..core.common import Signal
+from ..core.strategies import AutoRouter
+from ..utils.metrics import counter, histogram
+
+def bars_frame(bars) -> pd.DataFrame:
+    """OHLCV frame indexed by UTC open time from ``Candle``-like objects (``ts,o,h,l,c,v``)."""
+    df = pd.DataFrame([{"ts": x.ts, "open": x.o, "high": x.h, "low": x.l, "close": x.c, "volume": x.v} for x in bars])
+    if df.empty: return df
+    df["dt"] = pd.to_datetime(df["ts"], unit="ms", utc=True); df.set_index("dt", inplace=True); return df
+
+def _atr(h, l, c, n=14):
+    try:
+        import talib as ta  # type: ignore
+        return ta.ATR(h, l, c, n)
+    except ImportError:
+        from ..utils.talib_fallback import ATR
+        return ATR(h, l, c, n)
+
+@dataclass(frozen=True)
+class EvalInput:
+    """Immutable snapshot handed to ``evaluate`` (picklable for the process pool)."""
+    inst: str
+    bars: tuple                      # Candle objects; the buffer replaces, never mutates, them
+    micro: Optional[dict] = None
+    weights: Dict[str, float] = field(default_factory=dict)
+    min_atr_pct: float = 0.0
+    min_vol_pct: float = 0.0
+
+@dataclass
+class EvalResult:
+    sig: Optional[Signal] = None
+    enough: bool = False             # >= 120 bars
+    quality_ok: bool = False
+    atr_pct: float = 1.0
+    vol_pct: float = 1.0
+    atrp: float = 0.01               # ATR/close over the last 100 bars (vol targeting)
+    stages_ns: Dict[str, int] = field(default_factory=dict)
+
+def evaluate(inp: EvalInput) -> EvalResult:
+    """Frame -> quality percentiles (ATR/volume over 500 bars) -> AutoRouter; pure, no bot state."""
+    t = time.perf_counter_ns(); r = EvalResult(); st = r.stages_ns
+    df = bars_frame(inp.bars)
+    now = time.perf_counter_ns(); st["frame"] = now - t; t = now
+    if len(df) < 120: return r
+    r.enough = True
+    try:
+        tail = df.tail(500)
+        c, h, l = tail["close"].to_numpy(), tail["high"].to_numpy(), tail["low"].to_numpy()
+        atr = _atr(h, l, c, 14); vol = tail["volume"].to_numpy()
+        r.atr_pct = float((atr[-1] - np.nanmin(atr)) / (np.nanmax(atr) - np.nanmin(atr) + 1e-12))
+        r.vol_pct = float((vol[-1] - np.nanmin(vol)) / (np.nanmax(vol) - np.nanmin(vol) + 1e-12))
+        a100 = _atr(h[-100:], l[-100:], c[-100:], 14)[-1]
+        if np.isfinite(a100): r.atrp = float(a100 / max(1e-9, c[-1]))
+    except Exception:
+        r.atr_pct = r.vol_pct = 1.0
+    now = time.perf_counter_ns(); st["indicators"] = now - t; t = now
+    r.quality_ok = r.atr_pct >= inp.min_atr_pct and r.vol_pct >= inp.min_vol_pct
+    if r.quality_ok:
+        r.sig = AutoRouter().route(df, micro=inp.micro, weights=inp.weights)
+        st["route"] = time.perf_counter_ns() - t
+    return r
+
+def _warm():
+    return True
+
+class EvalPool:
+    """
+    Shared worker pool for strategy evaluation (``mode`` ``thread`` or ``process``).
+    Backpressure instead of queueing: a submit is refused (``None``) when the
+    pool already has ``max_inflight`` evaluations running, and each bot's
+    ``EvalSlot`` refuses while its previous evaluation is still running, so a
+    slow evaluation is skipped rather than stacked behind.
+    """
+    def __init__(self, mode: str = "thread", workers: int = 2, max_inflight: Optional[int] = None):
+        self.mode = mode; self.workers = max(1, workers); self.max_inflight = max_inflight or self.workers
+        self.inflight = 0
+        self._ex: Executor = (ProcessPoolExecutor(self.workers, mp_context=mp.get_context("spawn")) if mode == "process"
+                              else ThreadPoolExecutor(self.workers, thread_name_prefix="qi-eval"))
+        if mode == "process":
+            for _ in range(self.workers): self._ex.submit(_warm)   # pay the spawn + import cost up front
+
+    def submit(self, inp: EvalInput) -> Optional[asyncio.Future]:
+        if self.inflight >= self.max_inflight: return None
+        self.inflight += 1
+        fut = asyncio.wrap_future(self._ex.submit(evaluate, inp))
+        fut.add_done_callback(self._done)
+        return fut
+
+    def _done(self, _):
+        self.inflight -= 1
+
+    def shutdown(self):
+        self._ex.shutdown(wait=False, cancel_futures=True)
+
+_POOLS: Dict[Tuple[str, int], EvalPool] = {}
+
+def get_eval_pool(mode: str, workers: int) -> EvalPool:
+    """One pool per (mode, workers) per process, shared by every bot."""
+    p = _POOLS.get((mode, workers))
+    if p is None: p = _POOLS[(mode, workers)] = EvalPool(mode, workers)
+    return p
+
+class EvalSlot:
+    """
+    One bot's handle on evaluation.  ``mode="off"`` runs ``evaluate`` inline
+    on the loop; otherwise it is awaited from the shared pool, at most one in
+    flight per bot.  Returns ``None`` when skipped (bot busy / pool saturated /
+    ``timeout_s`` exceeded; a timed-out evaluation keeps the bot busy until it ends).
+    Worker compute time is the loop time saved: ``qi_eval_offloaded_seconds_total``.
+    """
+    def __init__(self, inst: str, mode: str = "off", workers: int = 2, timeout_s: float = 5.0):
+        self.inst = inst; self.mode = mode; self.timeout_s = timeout_s
+        self.pool = get_eval_pool(mode, workers) if mode in ("thread", "process") else None
+        self._busy: Optional[asyncio.Future] = None
+        self.skipped = 0; self.saved_s = 0.0
+        self._h = histogram("qi_eval_seconds", "Strategy evaluation compute time", ("inst", "mode"),
+                            buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5))
+        self._skip = counter("qi_eval_skipped_total", "Evaluations skipped by backpressure", ("inst", "reason"))
+        self._saved = counter("qi_eval_offloaded_seconds_total", "Evaluation compute moved off the event loop", ("inst",))
+
+    def _account(self, r: EvalResult):
+        s = sum(r.stages_ns.values()) / 1e9
+        self._h.labels(self.inst, self.mode).observe(s)
+        if self.pool is not None: self.saved_s += s; self._saved.labels(self.inst).inc(s)
+
+    def _skipped(self, reason: str) -> None:
+        self.skipped += 1; self._skip.labels(self.inst, reason).inc()
+
+    async def run(self, inp: EvalInput) -> Optional[EvalResult]:
+        if self.pool is None:
+            r = evaluate(inp); self._account(r); return r
+        if self._busy is not None and not self._busy.done(): return self._skipped("busy")
+        fut = self.pool.submit(inp)
+        if fut is None: return self._skipped("saturated")
+        self._busy = fut
+        try:
+            r = await asyncio.wait_for(asyncio.shield(fut), self.timeout_s)
+        except asyncio.TimeoutError:
+            return self._skipped("timeout")
+        self._account(r); return r
@@ -1,5 +1,6 @@
 from datetime import datetime, timezone
 import os, time, hmac, hashlib, base64, httpx, json
+from ...exchange.trade_api import TradeAPIMixin
 
 def _iso_from_ms(ms: int) -> str:
     return datetime.fromtimestamp(ms/1000, tz=timezone.utc).isoformat(timespec="milliseconds").replace("+00:00","Z")
@@ -7,10 +8,10 @@ def _iso_from_ms(ms: int) -> str:
 def okx_sign(secret: str, prehash: str) -> str:
     return base64.b64encode(hmac.new(secret.encode(), prehash.encode(), hashlib.sha256).digest()).decode()
 
-class OKXClient:
-    def __init__(self, key, secret, passphrase, account="trade", base_url="https://www.okx.com"):
+class OKXClient(TradeAPIMixin):
+    def __init__(self, key, secret, passphrase, account="trade", base_url=None):
         self.key, self.secret, self.passphrase, self.account = key, secret, passphrase, account
-        self.base_url = base_url
+        self.base_url = base_url = base_url or os.getenv("OKX_REST_BASE", "https://www.okx.com")
         self.rest = httpx.Client(base_url=base_url, timeout=10.0)
         self._drift_ms = 0
         self._drift_at = 0
@@ -74,3 +75,15 @@ class OKXClient:
         if j.get("code") != "0":
             raise RuntimeError(f"place_order error: {j}")
         return j["data"][0]
+
+    # signed low-level calls (used by TradeAPIMixin and attribution/replay)
+    def _get(self, path, params=None):
+        r = self.rest.get(path, headers=self._headers("GET", path, ""), params=params or {})
+        r.raise_for_status()
+        return r.json()
+
+    def _post(self, path, payload):
+        body = json.dumps(payload, separators=(",",":"))
+        r = self.rest.post(path, headers=self._headers("POST", path, body), content=body)
+        r.raise_for_status()
+        return r.json()
@@ -0,0 +1,86 @@
+import os, csv, time
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+from ..utils.metrics import counter
+
+Row = Tuple[int, float, float, float, float, float]   # ts, o, h, l, c, v
+
+RECENT_PAGE = 300    # /market/candles max limit (newest bars)
+HISTORY_PAGE = 100   # /market/history-candles max limit
+
+def parse_row(k) -> Row:
+    """OKX candle row -> ``Row`` (volume from ``volCcyQuote`` when present, as the live feed)."""
+    return (int(k[0]), float(k[1]), float(k[2]), float(k[3]), float(k[4]),
+            float(k[7] if len(k) > 7 else (k[5] if len(k) > 5 else 0.0)))
+
+class CandleCache:
+    """Closed bars per (instrument, bar) in ``<root>/<inst>_<bar>.csv``, rewritten atomically."""
+    def __init__(self, root: str):
+        self.root = root
+
+    def path(self, inst: str, tf: str) -> str:
+        return os.path.join(self.root, f"{inst.replace('/','-')}_{tf}.csv")
+
+    def load(self, inst: str, tf: str) -> List[Row]:
+        try:
+            with open(self.path(inst, tf), "r", encoding="utf-8", newline="") as f:
+                rows = [parse_row(r) for r in csv.reader(f) if r and r[0] != "ts"]
+        except (OSError, ValueError, IndexError):
+            return []
+        return sorted(rows)
+
+    def save(self, inst: str, tf: str, rows) -> None:
+        """``rows``: ``Row`` tuples or ``Candle``-like objects (``ts,o,h,l,c,v``), oldest first."""
+        path = self.path(inst, tf); os.makedirs(self.root, exist_ok=True)
+        tmp = f"{path}.tmp.{os.getpid()}"
+        try:
+            with open(tmp, "w", encoding="utf-8", newline="") as f:
+                w = csv.writer(f); w.writerow(("ts", "o", "h", "l", "c", "v"))
+                w.writerows(r if isinstance(r, tuple) else (r.ts, r.o, r.h, r.l, r.c, r.v) for r in rows)
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp): os.remove(tmp)
+
+@dataclass
+class HistoryLoad:
+    rows: List[Row] = field(default_factory=list)   # oldest first
+    cached: int = 0       # bars taken from the cache
+    fetched: int = 0      # bars downloaded
+    pages: int = 0
+    seconds: float = 0.0
+
+def _fetch(client, path: str) -> list:
+    r = client.rest.get(path); r.raise_for_status()
+    j = r.json()
+    if str(j.get("code", "0")) != "0": raise RuntimeError(f"candles error: {j}")
+    return j.get("data") or []
+
+async def load_history(client, inst: str, tf: str, bars: int, cache: Optional[CandleCache] = None) -> HistoryLoad:
+    """
+    The ``bars`` most recent candles.  Cached bars are merged first, so only
+    the gap since the newest cached bar (plus any depth the cache lacks) is
+    downloaded: the newest page from ``/market/candles``, then
+    ``/market/history-candles`` paged backwards with the ``after`` cursor.
+    Every page is admitted by the client's scheduler as ``public`` (one
+    account-wide bucket), so bots bootstrapping together share the limit.
+    """
+    t0 = time.perf_counter(); out = HistoryLoad()
+    got = {r[0]: r for r in (cache.load(inst, tf) if cache is not None else [])}
+    out.cached = len(got); gap_to = max(got) if got else None
+    pages = counter("qi_history_pages_total", "Candle history pages downloaded at bootstrap", ("inst",))
+    path, limit, cursor = "/api/v5/market/candles", RECENT_PAGE, None
+    while True:
+        q = f"{path}?instId={inst}&bar={tf}&limit={limit}" + (f"&after={cursor}" if cursor else "")
+        rows = [parse_row(k) for k in await client.acall("public", _fetch, client, q, prio="poll")]
+        out.pages += 1; out.fetched += len(rows); pages.labels(inst).inc()
+        for r in rows: got[r[0]] = r            # downloaded bars win over cached ones
+        if len(rows) < limit or out.fetched >= bars: break
+        cursor = min(r[0] for r in rows)
+        if gap_to is not None and cursor <= gap_to:
+            # gap closed; keep going below the cached range only while short
+            gap_to = None; cursor = min(got)
+        if gap_to is None and len(got) >= bars: break
+        path, limit = "/api/v5/market/history-candles", HISTORY_PAGE
+    out.rows = sorted(got.values())[-bars:]
+    out.seconds = time.perf_counter() - t0
+    return out
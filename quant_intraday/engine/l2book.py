@@ -0,0 +1,95 @@
+import zlib, bisect
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+from .book import BookSnapshot, make_snapshot
+
+# OKX channels with incremental (snapshot + update) semantics
+INCREMENTAL_CHANNELS = ("books", "books-l2-tbt", "books50-l2-tbt")
+
+class BookResync(Exception):
+    """Raised when the local book can no longer be trusted (seq gap / checksum)."""
+
+class _Side:
+    """One side of the book: sorted keys + level map.
+    Keys are ``px`` for asks and ``-px`` for bids so index 0 is always the best level.
+    Original price/size strings are kept because the OKX checksum is computed on them.
+    """
+    __slots__ = ("sign", "keys", "lv")
+    def __init__(self, sign: float):
+        self.sign = sign; self.keys: List[float] = []; self.lv: Dict[float, Tuple[str, str, float, float]] = {}
+
+    def clear(self):
+        self.keys.clear(); self.lv.clear()
+
+    def apply(self, levels):
+        for l in levels:
+            px_s, sz_s = l[0], l[1]
+            px = float(px_s); sz = float(sz_s); k = self.sign * px
+            if sz == 0.0:
+                if self.lv.pop(k, None) is not None:
+                    i = bisect.bisect_left(self.keys, k)
+                    if i < len(self.keys) and self.keys[i] == k: del self.keys[i]
+                continue
+            if k not in self.lv: bisect.insort(self.keys, k)
+            self.lv[k] = (px_s, sz_s, px, sz)
+
+    def top(self, n: int):
+        return [self.lv[k] for k in self.keys[:n]]
+
+    def arrays(self, n: int):
+        lv = self.top(n)
+        return (np.fromiter((x[2] for x in lv), float, len(lv)), np.fromiter((x[3] for x in lv), float, len(lv)))
+
+def okx_checksum(bids, asks) -> int:
+    """OKX book checksum: CRC32 (signed) over the interleaved top-25 ``px:sz`` strings."""
+    parts = []
+    for i in range(25):
+        if i < len(bids): parts.append(f"{bids[i][0]}:{bids[i][1]}")
+        if i < len(asks): parts.append(f"{asks[i][0]}:{asks[i][1]}")
+    c = zlib.crc32(":".join(parts).encode())
+    return c - (1 << 32) if c >= (1 << 31) else c
+
+class L2Book:
+    """
+    Full-depth L2 book maintained from OKX incremental channels
+    (``books`` / ``books-l2-tbt``).
+    - ``apply`` consumes one data item with its ``action`` (snapshot|update),
+      enforces ``prevSeqId`` continuity and verifies the CRC32 checksum;
+      updates arriving before the first snapshot are ignored.
+    - Any inconsistency raises ``BookResync``; the caller resubscribes and the
+      next snapshot rebuilds the book.
+    - ``snapshot(n)`` exposes the top ``n`` levels as a ``BookSnapshot`` in O(n).
+    """
+    def __init__(self, inst_id: str = "", verify: bool = True):
+        self.inst_id = inst_id; self.verify = verify
+        self.bids = _Side(-1.0); self.asks = _Side(1.0)
+        self.seq_id = -1; self.ts = 0; self.ready = False
+        self.resyncs = 0
+
+    def reset(self):
+        self.bids.clear(); self.asks.clear(); self.seq_id = -1; self.ready = False
+
+    def apply(self, d: dict, action: str = "update"):
+        prev = int(d.get("prevSeqId", -1)); seq = int(d.get("seqId", -1))
+        if action == "snapshot":
+            self.reset()
+        elif not self.ready:
+            return False  # waiting for the (re)subscribe snapshot
+        elif prev != -1 and self.seq_id != -1 and prev != self.seq_id:
+            self._fail(f"{self.inst_id}: seq gap prev={prev} last={self.seq_id}")
+        self.bids.apply(d.get("bids", [])); self.asks.apply(d.get("asks", []))
+        if self.verify and d.get("checksum") is not None:
+            cs = okx_checksum(self.bids.top(25), self.asks.top(25))
+            if cs != int(d["checksum"]):
+                self._fail(f"{self.inst_id}: checksum mismatch {cs}!={d['checksum']}")
+        self.seq_id = seq; self.ts = int(d.get("ts") or 0); self.ready = True
+        return True
+
+    def _fail(self, why: str):
+        self.resyncs += 1; self.reset()
+        raise BookResync(why)
+
+    def snapshot(self, n: int = 50, tick: float = 0.0) -> Optional[BookSnapshot]:
+        if not self.ready: return None
+        bp, bs = self.bids.arrays(n); ap, az = self.asks.arrays(n)
+        return make_snapshot(bp, bs, ap, az, tick, self.ts, self.seq_id)
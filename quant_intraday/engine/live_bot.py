@@ -1,5 +1,5 @@
 import os
-import os, json, hmac, time, base64, asyncio, hashlib, httpx, websockets
+import os, json, hmac, time, base64, asyncio, hashlib, logging, httpx, websockets
 import numpy as np, pandas as pd
 from dataclasses import dataclass, field
 from typing import Optional, Deque, Dict
@@ -14,7 +14,7 @@ from ..utils.cost_model import get_costs
 from ..utils.calendar import TradeCalendar
 from ..core.funding_basis import FundingBasisFeed
 from ..utils.vol_target import VolTarget
-from ..utils.perf_guard import PerformanceGuard
+from ..utils.daily_pnl import get_daily_pnl
 from ..exchange.private_ws import OKXPrivateWS
 from ..exchange.okx_client import OKXClient
 from .slicer import SlicerExec
@@ -22,8 +22,27 @@ from .optimizer import ExecOptimizer
 from .pov_executor import POVExecutor
 from .lob_executor import LOBExecutor
 from .autoexec import AutoExecutor
+from .control_plane import get_control_plane
+from .loop_monitor import get_loop_monitor
+from .book import parse_books
+from .l2book import L2Book, BookResync, INCREMENTAL_CHANNELS
+from .md_hub import get_hub
+from .conflate import ConflatingSlot
+from .position_manager import PositionManager
+from .order_tracker import OrderTracker
+from ..utils.logwriter import get_writer
+from ..utils.exelog import RowWriter
+from ..utils.latency import LATENCY
+from ..utils.stage_timer import StageTimer, SamplingProfiler
+from .evaluate import EvalInput, EvalSlot, bars_frame
+from .history import CandleCache, load_history
+from ..utils.metrics import gauge
+
+log = logging.getLogger(__name__)
+_WARNED: set = set()   # instruments warned about attach_algo trailing (once per process)
 
 OKX_WSS_PUBLIC = "wss://ws.okx.com:8443/ws/v5/public"
+CACHE_EVERY = 60   # closed bars between candle cache rewrites
 
 def load_env(key:str)->str:
     v=os.getenv(key); 
@@ -56,15 +75,18 @@ class Candle:
 class CandleBuffer:
     def __init__(self, maxlen:int=4000):
         self.buf: Deque[Candle] = deque(maxlen=maxlen)
-    def upsert(self, ts,o,h,l,c,v):
+    def upsert(self, ts,o,h,l,c,v) -> bool:
+        """Returns True when ``ts`` opens a new bar (the previous one is closed)."""
         if self.buf and self.buf[-1].ts==ts: self.buf[-1]=Candle(ts,o,h,l,c,v)
-        elif self.buf and self.buf[-1].ts>ts: return
-        else: self.buf.append(Candle(ts,o,h,l,c,v))
+        elif self.buf and self.buf[-1].ts>ts: return False
+        else:
+            self.buf.append(Candle(ts,o,h,l,c,v)); return True
+        return False
+    def snapshot(self) -> tuple:
+        """Immutable view for off-loop evaluation (candles are replaced on update, never mutated)."""
+        return tuple(self.buf)
     def to_df(self):
-        arr=[{"ts":x.ts,"open":x.o,"high":x.h,"low":x.l,"close":x.c,"volume":x.v} for x in self.buf]
-        df=pd.DataFrame(arr); 
-        if df.empty: return df
-        df["dt"]=pd.to_datetime(df["ts"], unit="ms", utc=True); df.set_index("dt", inplace=True); return df
+        return bars_frame(self.buf)
 
 @dataclass
 class RunConfig:
@@ -147,6 +169,42 @@ class RunConfig:
         Minimum seconds an order must rest on the book before it can be cancelled.
     lob_max_cxl_per_min : int, default ``20``
         Maximum number of cancellations per minute allowed for the LOB executor.
+    book_channel : str, default ``"books5"``
+        Order-book channel.  ``"books"``/``"books-l2-tbt"`` maintain a full-depth
+        incremental book (checksum-verified, auto-resync) instead of 5-level snapshots.
+    book_depth : int, default ``50``
+        Levels exposed to book consumers when an incremental channel is used.
+    attach_algo : bool, default ``False``
+        Send TP/SL as ``attachAlgoOrds`` on every entry order instead of a
+        separate OCO placed after the entry.  Attached stops have no algoId
+        the bot can amend, so they are only trailed with ``native_trailing``;
+        otherwise they stay fixed (a warning is printed at construction).
+    native_trailing : bool, default ``False``
+        At the breakeven trigger, hand trailing to an exchange
+        ``move_order_stop`` with callback ``trailing_atr_mult`` × ATR instead
+        of amending the stop every bar.
+    eval_offload : str, default ``"off"`` (env ``QI_EVAL_OFFLOAD``)
+        Where the strategy evaluation (bar frame, quality percentiles,
+        router) runs: ``"off"`` inline on the event loop, ``"thread"`` or
+        ``"process"`` in a pool shared by the process's bots.  Offloaded
+        evaluations are skipped, never queued, while the previous one is
+        still running or the pool is saturated.
+    eval_workers : int, default ``2`` (env ``QI_EVAL_WORKERS``)
+        Pool size for ``eval_offload``.
+    eval_timeout_s : float, default ``5.0``
+        Longest wait for an offloaded evaluation before the cycle is skipped.
+    warmup_bars : int, default ``4000`` (env ``QI_WARMUP_BARS``)
+        Candle history loaded before trading starts (paged ``history-candles``,
+        rate-limited as ``public``; bots bootstrap concurrently).
+    candle_cache : bool, default ``True`` (env ``QI_CANDLE_CACHE=0`` disables)
+        Keep closed bars in ``<log_dir>/candles/`` so a restart only downloads
+        the gap since the last save.
+    loop_stall_ms : float, default ``250`` (env ``QI_LOOP_STALL_MS``)
+        Event-loop lag that counts as a stall: the process-wide loop monitor
+        logs the blocking task's stack to ``stalls.log``.  ``0`` disables it.
+    loop_safe_mode : bool, default ``False`` (env ``QI_LOOP_SAFE_MODE=1``)
+        Pause new entries (control-plane hold) after a stall until lag has
+        recovered for ``QI_LOOP_HOLD_S`` (default 30) seconds.
     """
     inst_id: str
     tf: str = "5m"
@@ -185,6 +243,27 @@ class RunConfig:
     lob_max_cxl_per_min: int = 20
     # backward‑compatibility alias for max cancels per minute; both names refer to the same value
     lob_max_cancels_per_min: int = 20
+    # order book feed
+    book_channel: str = "books5"
+    book_depth: int = 50
+    # exchange-side protection
+    attach_algo: bool = False
+    native_trailing: bool = False
+    # strategy evaluation placement
+    eval_offload: str = field(default_factory=lambda: os.getenv("QI_EVAL_OFFLOAD", "off"))
+    eval_workers: int = field(default_factory=lambda: int(os.getenv("QI_EVAL_WORKERS", "2")))
+    eval_timeout_s: float = 5.0
+    # history bootstrap
+    warmup_bars: int = field(default_factory=lambda: int(os.getenv("QI_WARMUP_BARS", "4000")))
+    candle_cache: bool = field(default_factory=lambda: os.getenv("QI_CANDLE_CACHE", "1") != "0")
+    # event-loop lag watchdog
+    loop_stall_ms: float = field(default_factory=lambda: float(os.getenv("QI_LOOP_STALL_MS", "250")))
+    loop_safe_mode: bool = field(default_factory=lambda: os.getenv("QI_LOOP_SAFE_MODE", "0") == "1")
+
+    def __post_init__(self):
+        if self.attach_algo and not self.native_trailing and (self.trailing_be_rr or self.trailing_atr_mult) and self.inst_id not in _WARNED:
+            _WARNED.add(self.inst_id)
+            log.warning("%s: attach_algo stops cannot be amended; trailing is off unless native_trailing=True", self.inst_id)
 
 def calc_contract_size(inst, quote_ccy_risk, entry_px):
     ct_sz=float(inst.get("ctVal")); lot=float(inst.get("lotSz","1"))
@@ -194,28 +273,11 @@ def calc_contract_size(inst, quote_ccy_risk, entry_px):
 
 class Bot:
     def _today_pnl(self):
-        """Approximate today's realized PnL using equity*.csv (latest file).
-        Fallback 0 if file missing."""
-        import glob, pandas as pd, time
-        try:
-            files=sorted(glob.glob(os.path.join(self._log_dir, "equity*.csv")))
-            if not files: return 0.0
-            df=pd.read_csv(files[-1])
-            if df.empty: return 0.0
-            # find first row of today (UTC)
-            df['dt']=pd.to_datetime(df.get('dt', None) if 'dt' in df.columns else pd.to_datetime(df['ts'], unit='ms', utc=True))
-            today = pd.Timestamp.utcnow().normalize()
-            dft = df[df['dt']>=today]
-            if dft.empty:
-                # if no today's row, take delta from first to last overall
-                return float(df['equity'].iloc[-1] - df['equity'].iloc[0]) if 'equity' in df.columns else 0.0
-            start = float(dft['equity'].iloc[0]); last = float(dft['equity'].iloc[-1])
-            return last - start
-        except Exception:
-            return 0.0
+        """Today's (UTC) PnL from the in-memory equity tracker; 0 before the first snapshot."""
+        return self._dpnl.today()
 
-    def _account_guard_denies(self, risk_amt):
-        """Check control.json risk constraints. Return True to block entry."""
+    def _account_guard_denies(self, risk_amt, equity: float = 0.0):
+        """Check control.json risk constraints against ``equity`` (just polled by the caller). Return True to block entry."""
         self._load_control()
         c = self._control if isinstance(self._control, dict) else {}
         # Daily loss limit USD
@@ -229,7 +291,7 @@ class Bot:
         if day_loss_pct > 0:
             # estimate baseline equity as balance now / (1 + pnl%) ; conservative: block if risk exceeds margin under dd
             try:
-                eq_now = self.client.get_balance("USDT")
+                eq_now = float(equity or 0)
                 pnl = self._today_pnl()
                 # if baseline unknown, treat as exceeded when eq drop exceeds pct
                 if eq_now > 0 and pnl < 0 and (-pnl/eq_now) >= day_loss_pct:
@@ -260,42 +322,13 @@ class Bot:
             return False
 
     def _load_control(self):
-        import json, os, time
-        try:
-            st=os.stat(self._control_path)
-            if not hasattr(self, "_control_mtime") or st.st_mtime != self._control_mtime:
-                with open(self._control_path, "r", encoding="utf-8") as f:
-                    self._control=json.load(f) or {}
-                self._control_mtime=st.st_mtime
-        except FileNotFoundError:
-            self._control={}
-        except Exception:
-            pass
-        # evaluate pause
-        paused = False
-        try:
-            if isinstance(self._control, dict):
-                if self._control.get("paused") is True:
-                    paused = True
-                pu = float(self._control.get("pause_until", 0) or 0)
-                if pu and time.time() < pu:
-                    paused = True
-        except Exception:
-            pass
-        return paused
+        """Pick up the latest control-plane snapshot; returns the pause flag."""
+        snap=self._ctl.snapshot
+        self._control=snap.control; self._risk_over=snap.risk_overrides
+        return snap.paused()
 
     def _load_risk_overrides(self):
-        import json, os
-        try:
-            st=os.stat(self._risk_over_path)
-            if not hasattr(self, "_risk_over_mtime") or st.st_mtime != self._risk_over_mtime:
-                with open(self._risk_over_path, "r", encoding="utf-8") as f:
-                    self._risk_over=json.load(f) or {}
-                self._risk_over_mtime=st.st_mtime
-        except FileNotFoundError:
-            self._risk_over={}
-        except Exception:
-            pass
+        self._risk_over=self._ctl.snapshot.risk_overrides
 
     def _refresh_funding_basis(self):
         try:
@@ -325,17 +358,7 @@ class Bot:
             pass
 
     def _load_thresholds(self):
-        import json, os
-        try:
-            st=os.stat(self._thresholds_path)
-            if not hasattr(self, "_thresholds_mtime") or st.st_mtime != self._thresholds_mtime:
-                with open(self._thresholds_path, "r", encoding="utf-8") as f:
-                    self._thresholds=json.load(f) or {}
-                self._thresholds_mtime=st.st_mtime
-        except FileNotFoundError:
-            self._thresholds={}
-        except Exception:
-            pass
+        self._thresholds=self._ctl.snapshot.thresholds
 
     def _update_cancel_used(self):
         import time
@@ -344,32 +367,17 @@ class Bot:
         self._cancel_used_1m=len(self._cancel_hist)
 
     def _load_cooling(self):
-        import json, os
-        try:
-            st=os.stat(self._cooling_path)
-            if not hasattr(self, "_cooling_mtime") or st.st_mtime != self._cooling_mtime:
-                with open(self._cooling_path, "r", encoding="utf-8") as f:
-                    self._cooling=json.load(f) or {}
-                self._cooling_mtime=st.st_mtime
-        except FileNotFoundError:
-            self._cooling={}
-        except Exception:
-            pass
+        self._cooling=self._ctl.snapshot.cooling
 
     def _load_alloc(self):
-        import json, os
-        try:
-            st=os.stat(self._alloc_path)
-            if not hasattr(self, "_alloc_mtime") or st.st_mtime != self._alloc_mtime:
-                with open(self._alloc_path, "r", encoding="utf-8") as f:
-                    self._alloc=json.load(f) or {}
-                self._alloc_mtime=st.st_mtime
-        except FileNotFoundError:
-            self._alloc={}
-        except Exception:
-            pass
+        self._alloc=self._ctl.snapshot.alloc
 
     def _on_private_event(self, channel, data, state):
+        self._posm.on_private(channel, data)
+        if channel=="orders":
+            LATENCY.on_order(data)
+            if data.get("instId")==self.cfg.inst_id:
+                self._orders.on_order(data); self._wake.publish("order")
         # Tag exit triggers -> exits.log
         try:
             if channel=="orders":
@@ -379,8 +387,7 @@ class Bot:
                 pos_side=str(data.get("posSide",""))
                 if ord_type in ("take-profit","stop-loss") and state_str in ("filled","partially_filled"):
                     reason = "TP" if ord_type=="take-profit" else "SL"
-                    with open(os.path.join(self._log_dir, "exits.log"), "a", encoding="utf-8") as f:
-                        f.write(f"{int(time.time()*1000)},{inst},{pos_side},{reason},{data.get('avgPx','')},{data.get('accFillSz','')}\n")
+                    self._exits_w.write(f"{int(time.time()*1000)},{inst},{pos_side},{reason},{data.get('avgPx','')},{data.get('accFillSz','')}\n")
         except Exception:
             pass
 
@@ -389,37 +396,20 @@ class Bot:
         return round(px / ts) * ts
 
     def _book_limit_px(self, side: str, fallback: float) -> float:
-        try:
-            book=self._books
-            if not book: return self._round_px(fallback)
-            asks=[float(a[0]) for a in book.get("asks", [])]
-            bids=[float(b[0]) for b in book.get("bids", [])]
-            if side=="buy":
-                base = asks[0] if asks else fallback
-                return self._round_px(base + self._costs.entry_aggr_ticks * self._costs.tick_size)
-            else:
-                base = bids[0] if bids else fallback
-                return self._round_px(base - self._costs.entry_aggr_ticks * self._costs.tick_size)
-        except Exception:
-            return self._round_px(fallback)
+        book=self._book
+        if not book: return self._round_px(fallback)
+        if side=="buy":
+            return self._round_px(book.best_ask + self._costs.entry_aggr_ticks * self._costs.tick_size)
+        else:
+            return self._round_px(book.best_bid - self._costs.entry_aggr_ticks * self._costs.tick_size)
 
     def _load_weights(self):
-        import json, os, time
-        try:
-            st=os.stat(self._weights_path)
-            if not hasattr(self, "_weights_mtime") or st.st_mtime != self._weights_mtime:
-                with open(self._weights_path, "r", encoding="utf-8") as f:
-                    self._weights=json.load(f) or {}
-                self._weights_mtime=st.st_mtime
-        except FileNotFoundError:
-            self._weights={}
-        except Exception:
-            pass
+        self._weights=self._ctl.snapshot.weights
 
     def __init__(self, cfg: RunConfig, client: OKXClient):
         self.cfg = cfg
         self.client = client
-        self.buffer = CandleBuffer(4000)
+        self.buffer = CandleBuffer(max(4000, cfg.warmup_bars))
         # Determine the base log directory.  Honour QI_LOG_DIR if it is
         # writeable, otherwise fall back to a local 'live_output'.  This
         # prevents OSError when the env path points at a read‑only filesystem.
@@ -438,43 +428,62 @@ class Bot:
         self.risk_params=cfg.risk_params
         self.scale_legs=[float(x) for x in (cfg.scale_legs.split(",") if cfg.scale_legs else ["100"])]
         self._budget=None; self._day_key=None
-        self._pguard=PortfolioGuard(PortfolioLimits())
+        self._pguard=PortfolioGuard(PortfolioLimits(), account=getattr(client, "key", None))
         self._events=EventGuard()
         self._calendar=TradeCalendar()
-        self._books=None
+        self._book=None  # BookSnapshot from the books5 feed
+        # bumped on every book update and on every private update of our orders;
+        # executors await it instead of sleep-polling (see _wait_event)
+        self._wake=ConflatingSlot()
+        self._posm=PositionManager(self)
+        self._orders=OrderTracker(self)  # live fill state of executor orders by clOrdId
+        self._attach={}  # extra entry-order kwargs (attachAlgoOrds) while an entry is being executed
         self._err_times=[]
-        self._weights_path=os.path.join(self._log_dir, "weights.json")
+        # control.json / weights / alloc / thresholds / cooling / risk_overrides are
+        # owned by the process-wide control plane; _load_* only grab its snapshot
+        self._ctl=get_control_plane(self._log_dir)
         self._weights={}
-        self._alloc_path=os.path.join(self._log_dir, "alloc.json")
         self._alloc={}
-        self._cooling_path=os.path.join(self._log_dir, "cooling.json")
         self._cooling={}
         self._last_fire={}
         self._costs=get_costs(self.client, cfg.inst_id)
-        self._thresholds_path=os.path.join(self._log_dir, "thresholds.json")
         self._thresholds={}
-        self._risk_over_path=os.path.join(self._log_dir, "risk_overrides.json")
         self._risk_over={}
-        self._control_path=os.path.join(self._log_dir, "control.json")
         self._control={}
         self._cancel_hist=[]
         self._cancel_used_1m=0
         self._fb=FundingBasisFeed()
         self._volt=VolTarget(target_daily=0.02)
-        self._pguard=PerformanceGuard(self._log_dir)
+        self._dpnl=get_daily_pnl(self._log_dir)
         # _log_dir has been initialised above and directories created; do not reassign here
+        # append-only logs go through shared background writers (hot path only enqueues)
         self._trades_path=os.path.join(self._log_dir, f"trades_{cfg.inst_id.replace('/','-')}.csv")
-        if not os.path.exists(self._trades_path):
-            with open(self._trades_path,"w",encoding="utf-8") as f: f.write("ts,inst,side,price,sl,tp,size,reason\n")
+        self._trades_w=get_writer(self._trades_path, "ts,inst,side,price,sl,tp,size,reason")
         self._eq_path=os.path.join(self._log_dir, "equity.csv")
-        if not os.path.exists(self._eq_path):
-            with open(self._eq_path,"w",encoding="utf-8") as f: f.write("ts,equity\n")
+        self._eq_w=get_writer(self._eq_path, "ts,equity")
         self._execlog = os.path.join(self._log_dir, "execlog.csv")
-        if not os.path.exists(self._execlog):
-            with open(self._execlog, "w", encoding="utf-8") as f: f.write("ts,evt,inst,side,pos,sz,px\n")
+        LATENCY.use_log_dir(self._log_dir)
+        self._exec_w=RowWriter(self._execlog, ("ts", "evt", "inst", "side", "pos", "sz", "px"))
+        self._risk_w=get_writer(os.path.join(self._log_dir, "risk.log"))
+        self._trail_w=get_writer(os.path.join(self._log_dir, "trail.log"))
+        self._exits_w=get_writer(os.path.join(self._log_dir, "exits.log"))
+        # strategy-loop stage timings (stages_<inst>.json, qi_loop_stage_seconds) and the
+        # on-demand profiler requested via control.json {"profile": {"id", "inst", "iterations"}}
+        self._stages=StageTimer(cfg.inst_id)
+        self._stages_path=os.path.join(self._log_dir, f"stages_{cfg.inst_id.replace('/','-')}.json")
+        self._prof=None; self._prof_left=0; self._prof_seen=None
+        self._eval=EvalSlot(cfg.inst_id, cfg.eval_offload, cfg.eval_workers, cfg.eval_timeout_s)
+        # candle history cache (rewritten every CACHE_EVERY closed bars) and time-to-first-evaluation
+        self._cache=CandleCache(os.path.join(self._log_dir, "candles")) if cfg.candle_cache else None
+        self._new_bars=0; self._t_start=None; self.ttfe_s=None
 
     async def run(self):
+        self._t_start=time.time()
         await self._bootstrap_history()
+        self._ctl.ensure(asyncio.get_event_loop())
+        if self.cfg.loop_stall_ms > 0:
+            get_loop_monitor(self._log_dir, stall_s=self.cfg.loop_stall_ms / 1000, safe_mode=self.cfg.loop_safe_mode,
+                             hold_s=float(os.getenv("QI_LOOP_HOLD_S", "30"))).ensure(asyncio.get_event_loop())
         try:
             self._lob.ensure(asyncio.get_event_loop())
         except Exception:
@@ -482,125 +491,144 @@ class Bot:
         tasks=[self._ws_public_loop(), self._ws_books_trades_loop(), self._strategy_loop()]
         if self.cfg.use_private:
             self._private_ws = OKXPrivateWS(load_env("OKX_API_KEY"), load_env("OKX_API_SECRET"), load_env("OKX_API_PASSPHRASE"), on_event=self._on_private_event)
+            # order entry rides the private socket when it is up (client falls back to REST)
+            if getattr(self.client, "ws_trade", None) is None: self.client.ws_trade = self._private_ws
             tasks.append(self._private_ws.run())
         await asyncio.gather(*tasks)
 
     async def _bootstrap_history(self):
-        path=f"/api/v5/market/candles?instId={self.cfg.inst_id}&bar={self.cfg.tf}&limit=200"
-        r=self.client.rest.get(path); r.raise_for_status()
-        for k in reversed(r.json()["data"]):
-            ts=int(k[0]); o,h,l,c = map(float,k[1:5]); v=float(k[7] if len(k)>7 else (k[5] if len(k)>5 else 0.0))
-            self.buffer.upsert(ts,o,h,l,c,v)
+        h=await load_history(self.client, self.cfg.inst_id, self.cfg.tf, self.cfg.warmup_bars, self._cache)
+        for r in h.rows: self.buffer.upsert(*r)
+        print(f"[BOOT] {self.cfg.inst_id} {len(h.rows)} bars ({h.cached} cached, {h.fetched} fetched in {h.pages} pages) in {h.seconds:.2f}s")
+        gauge("qi_bootstrap_seconds", "Candle history bootstrap time", ("inst",)).labels(self.cfg.inst_id).set(h.seconds)
+        if self._cache is not None and h.fetched: await asyncio.to_thread(self._save_candles, self.buffer.snapshot()[:-1])
+
+    def _save_candles(self, bars):
+        """Persist closed bars (snapshot taken on the loop; the newest bar is still forming)."""
+        try: self._cache.save(self.cfg.inst_id, self.cfg.tf, bars)
+        except Exception as e: print("[BOOT] candle cache save failed:", e)
 
     async def _ws_public_loop(self):
-        sub={"op":"subscribe","args":[{"channel":f"candle{self.cfg.tf}","instId":self.cfg.inst_id}]}
-        while True:
-            try:
-                async with websockets.connect(self._wss_urls()[0], ping_interval=20, proxy=self._ws_proxy()) as ws:
-                    await ws.send(json.dumps(sub))
-                    async for msg in ws:
-                        data=json.loads(msg)
-                        if "event" in data: continue
-                        for d in data.get("data", []):
-                            ts=int(d[0]); o,h,l,c = map(float,d[1:5]); v=float(d[7] if len(d)>7 else 0.0)
-                            self.buffer.upsert(ts,o,h,l,c,v)
-            except Exception as e:
-                print("WS public reconnect:", e); await asyncio.sleep(2)
+        url=self._wss_urls()[0]; ch=f"candle{self.cfg.tf}"
+        hub=get_hub(self._ws_proxy()); q=hub.subscribe(url, ch, self.cfg.inst_id)
+        try:
+            while True:
+                data=await q.get()
+                for d in data.get("data", []):
+                    ts=int(d[0]); o,h,l,c = map(float,d[1:5]); v=float(d[7] if len(d)>7 else 0.0)
+                    if self.buffer.upsert(ts,o,h,l,c,v):
+                        self._posm.on_bar(); self._new_bars+=1
+                        if self._cache is not None and self._new_bars % CACHE_EVERY == 0:
+                            asyncio.get_running_loop().run_in_executor(None, self._save_candles, self.buffer.snapshot()[:-1])
+        finally:
+            hub.unsubscribe(url, ch, self.cfg.inst_id, q)
 
     async def _ws_books_trades_loop(self):
-        sub={"op":"subscribe","args":[{"channel":"books5","instId":self.cfg.inst_id}]}
-        while True:
+        url=self._wss_urls()[1]; ch=self.cfg.book_channel
+        tick=self._costs.tick_size
+        hub=get_hub(self._ws_proxy())
+        if ch not in INCREMENTAL_CHANNELS:
+            # books5 pushes full snapshots: conflate, only ever parse the newest one
+            slot=hub.subscribe_latest(url, ch, self.cfg.inst_id); ver=0
             try:
-                async with websockets.connect(self._wss_urls()[1], ping_interval=20, proxy=self._ws_proxy()) as ws:
-                    await ws.send(json.dumps(sub))
-                    async for msg in ws:
-                        data=json.loads(msg)
-                        if "event" in data: continue
+                while True:
+                    ver, data = await slot.next(ver)
+                    items=data.get("data") or []
+                    if items:
+                        self._book = parse_books(items[-1], tick); self._wake.publish("book")
+            finally:
+                hub.unsubscribe(url, ch, self.cfg.inst_id, slot)
+        l2=L2Book(self.cfg.inst_id)
+        q=hub.subscribe(url, ch, self.cfg.inst_id)
+        try:
+            while True:
+                data=await q.get()
+                try:
+                    # every delta must be applied, but the snapshot is rebuilt once per backlog
+                    while True:
                         for d in data.get("data", []):
-                            self._books = d
-            except Exception as e:
-                print("WS books reconnect:", e); await asyncio.sleep(2)
+                            l2.apply(d, data.get("action", "update"))
+                        if q.empty(): break
+                        data=q.get_nowait()
+                    self._book = l2.snapshot(self.cfg.book_depth, tick); self._wake.publish("book")
+                except BookResync as e:
+                    print("[BOOK] resync:", e)
+                    self._book = None
+                    hub.resubscribe(url, ch, self.cfg.inst_id)
+        finally:
+            hub.unsubscribe(url, ch, self.cfg.inst_id, q)
+
+    async def _wait_event(self, ver: int, timeout: float) -> int:
+        """Wait until the book or one of our orders changed after version ``ver``,
+        or ``timeout`` seconds passed; returns the current wakeup version."""
+        if timeout <= 0: return self._wake.version
+        v, _ = await self._wake.next(ver, timeout)
+        return v
 
     def _estimate_vwap_slippage(self, side: str, notional: float) -> float:
         try:
-            book=self._books
+            book=self._book
             if not book: return 0.0
-            bids=[(float(p), float(sz)) for p,sz,_,_,_ in book.get("bids", [])]
-            asks=[(float(p), float(sz)) for p,sz,_,_,_ in book.get("asks", [])]
-            mid=(bids[0][0]+asks[0][0])/2.0
-            rem=notional; v=0.0; q=0.0
-            if side=="buy":
-                for px,sz in asks:
-                    take=min(rem, px*sz); v+=px*(take/px); q+=(take/px); rem-=take
-                    if rem<=1e-9: break
-            else:
-                for px,sz in bids:
-                    take=min(rem, px*sz); v+=px*(take/px); q+=(take/px); rem-=take
-                    if rem<=1e-9: break
-            if q<=0: return 0.0
-            vwap=v/q; return abs(vwap-mid)
+            return book.slippage(side, notional)
         except Exception:
             return 0.0
 
+    def _profile_tick(self):
+        """Start/advance/finish a sampling profile requested through control.json."""
+        if self._prof is not None:
+            self._prof_left-=1
+            if self._prof_left>0: return
+            self._prof.stop()
+            fp=self._prof.dump(os.path.join(self._log_dir, "profiles", f"{self.cfg.inst_id.replace('/','-')}_{int(time.time())}.folded"))
+            print(f"[PROF] {self._prof.samples} samples -> {fp}"); self._prof=None
+            return
+        req=self._ctl.snapshot.control.get("profile") if isinstance(self._ctl.snapshot.control, dict) else None
+        if not isinstance(req, dict) or req.get("id") in (None, self._prof_seen): return
+        self._prof_seen=req.get("id")
+        if req.get("inst", self.cfg.inst_id) not in (self.cfg.inst_id, "*"): return
+        self._prof_left=max(1, int(req.get("iterations", 20)))
+        self._prof=SamplingProfiler(interval_s=float(req.get("interval_ms", 2))/1000.0).start()
+
     async def _strategy_loop(self):
         cool_until=0
+        st=self._stages
         while True:
             try:
                 await asyncio.sleep(1)
-                # equity snapshot + pguard
+                self._profile_tick()
+                st.export(self._stages_path)
+                st.start()
+                # equity snapshot + pguard; one poll per second serves every bot on the account (all shards)
                 try:
-                    eq=self.client.get_balance("USDT")
-                    with open(self._eq_path,"a",encoding="utf-8") as f: f.write(f"{int(time.time()*1000)},{eq}\n")
-                    self._pguard.open_day(eq); self._pguard.mark_pnl(eq)
+                    eq=self._pguard.equity(1.0); ts=int(time.time()*1000)
+                    if eq is None:
+                        eq=await self.client.acall("account", self.client.get_balance, "USDT")
+                        self._eq_w.write(f"{ts},{eq}\n")
+                        self._pguard.open_day(eq); self._pguard.mark_pnl(eq)
+                    self._dpnl.update(eq, ts)
                 except Exception: pass
+                st.lap("equity")
                 # daily budget init
                 import datetime
                 now_dt = datetime.datetime.utcnow().date()
                 if (self._day_key is None) or (now_dt != self._day_key):
-                    eq0=self.client.get_balance("USDT"); self._budget=RiskBudget(eq0, self.risk_params); self._day_key=now_dt
+                    eq0=await self.client.acall("account", self.client.get_balance, "USDT")
+                    self._budget=RiskBudget(eq0, self.risk_params); self._day_key=now_dt
+                st.lap("budget")
                 # cooldown
                 if time.time() < cool_until: continue
-                df=self.buffer.to_df()
-                if len(df)<120: continue
-
-                # quality filters: ATR/Volume percentiles on last 500 bars
-                try:
-                    tail = df.tail(500)
-                    # Compute ATR and volume percentiles.  Prefer TA‑Lib but fall back to
-                    # our pure‑Python implementation if unavailable.  NumPy is already
-                    # imported as ``np`` at the module top.
-                    try:
-                        import talib as ta  # type: ignore
-                    except ImportError:
-                        from ..utils.talib_fallback import ATR as _ATR  # noqa: F401
-                        class _ta:
-                            @staticmethod
-                            def ATR(*args, **kwargs):
-                                return _ATR(*args, **kwargs)
-                        ta = _ta()  # type: ignore
-                    c, h, l = tail["close"].to_numpy(), tail["high"].to_numpy(), tail["low"].to_numpy()
-                    atr = ta.ATR(h, l, c, 14)
-                    vol = tail["volume"].to_numpy()
-                    atr_pct = (atr[-1] - np.nanmin(atr)) / (np.nanmax(atr) - np.nanmin(atr) + 1e-12)
-                    vol_pct = (vol[-1] - np.nanmin(vol)) / (np.nanmax(vol) - np.nanmin(vol) + 1e-12)
-                except Exception:
-                    atr_pct = vol_pct = 1.0
-                if atr_pct < self.cfg.min_atr_pct or vol_pct < self.cfg.min_vol_pct:
-                    # low quality regime: extend cooldown
-                    if self.cfg.adaptive_cool:
-                        cool_until = time.time() + max(self.cfg.cooldown_s, 30)
-                    continue
-
                 # trading calendar
                 is_open,why = self._calendar.is_open_now()
+                st.lap("calendar")
                 if not is_open:
                     # closed or silent -> skip
                     await asyncio.sleep(5); continue
                 # event blackout
                 blocked,label=self._events.is_blocked(self.cfg.inst_id)
+                st.lap("events")
                 if blocked:
                     print(f"[EVENT] Blackout {label}"); 
-                    with open(os.path.join(self._log_dir,"risk.log"),"a",encoding="utf-8") as f: f.write(f"{int(time.time()*1000)},BLOCK,{label}\n")
+                    self._risk_w.write(f"{int(time.time()*1000)},BLOCK,{label}\n")
                     try:
                         from ..utils.notifier import notify
                         notify('risk_block', {'label':label})
@@ -625,21 +653,30 @@ class Bot:
                 except Exception:
                     pass
                 
+                st.lap("reload")
                 if self._load_control():
                     await asyncio.sleep(2); continue
                 # funding/basis refresh
                 self._refresh_funding_basis()
-                # build micro (simple imbalance if book available)
-                micro=None
-                if self._books:
-                    bids=self._books.get("bids",[]); asks=self._books.get("asks",[])
-                    bsum=sum(float(x[1]) for x in bids[:5]); asum=sum(float(x[1]) for x in asks[:5])
-                    imb=(bsum-asum)/max(1e-9, (bsum+asum)); micro={"imbalance":imb}
-                # generate
-                if self.cfg.strategy=="auto":
-                    sig=AutoRouter().route(df, micro=micro, weights=self._weights)
-                else:
-                    sig=AutoRouter().route(df, micro=micro, weights=self._weights)  # reuse
+                st.lap("funding")
+                # evaluate: frame -> quality filters (ATR/volume percentiles on the last 500
+                # bars) -> router; inline, or in the eval pool on an immutable bar snapshot
+                micro={"imbalance":self._book.imbalance} if self._book else None
+                res=await self._eval.run(EvalInput(self.cfg.inst_id, self.buffer.snapshot(), micro, dict(self._weights or {}),
+                                                   self.cfg.min_atr_pct, self.cfg.min_vol_pct))
+                for k, ns in (res.stages_ns.items() if res else ()): st.record(k, ns)
+                st.lap("eval")
+                if res is None or not res.enough: continue
+                if self.ttfe_s is None:
+                    self.ttfe_s=time.time()-self._t_start
+                    print(f"[BOOT] {self.cfg.inst_id} first evaluation {self.ttfe_s:.2f}s after start")
+                    gauge("qi_time_to_first_eval_seconds", "Bot start to first strategy evaluation", ("inst",)).labels(self.cfg.inst_id).set(self.ttfe_s)
+                if not res.quality_ok:
+                    # low quality regime: extend cooldown
+                    if self.cfg.adaptive_cool:
+                        cool_until = time.time() + max(self.cfg.cooldown_s, 30)
+                    continue
+                sig=res.sig
                 # strategy-specific cooldown
                 self._load_cooling()
                 if sig is not None and isinstance(sig.reason, str) and '|' in sig.reason:
@@ -648,38 +685,42 @@ class Bot:
                     last=float(self._last_fire.get(key, 0))
                     if cool>0 and (time.time()-last) < cool:
                         sig=None
+                st.lap("cooling"); st.stop()
 
                 if not sig: continue
-                await self._execute_signal(sig)
+                LATENCY.signal(self.cfg.inst_id, self.cfg.exec_mode)
+                await self._execute_signal(sig, atrp=res.atrp)
+                st.lap("execute")
                 cool_until=time.time()+self.cfg.cooldown_s
             except Exception as e:
                 print("Strategy loop error:", e); await asyncio.sleep(1)
 
-    async def _execute_signal(self, sig: Signal):
+    async def _execute_signal(self, sig: Signal, atrp: Optional[float] = None):
         # REST error CB
         now=time.time(); self._err_times=[t for t in self._err_times if now - t < self.cfg.err_cb_window_s]
         if len(self._err_times)>=self.cfg.err_cb_threshold:
             print("[CB] REST errors threshold reached, cooling"); await asyncio.sleep(self.cfg.err_cb_cool_s); return
-        equity=self.client.get_balance("USDT")
+        equity=await self.client.acall("account", self.client.get_balance, "USDT")
         # per-inst allocation multiplier (alloc.json: {"BTC-USDT-SWAP": 1.2, ...})
         mult = float(self._alloc.get(self.cfg.inst_id, 1.0)) if isinstance(self._alloc, dict) else 1.0
-        # vol targeting multiplier based on last 100 bars ATR%
-        df=self.buffer.to_df().tail(100)
-        try:
-            c = df['close'].to_numpy(); h = df['high'].to_numpy(); l = df['low'].to_numpy()
-            # Use TA‑Lib if available; otherwise fall back to the pure‑Python ATR
+        # vol targeting multiplier based on last 100 bars ATR% (precomputed by the evaluation when available)
+        if atrp is None:
+            df=self.buffer.to_df().tail(100)
             try:
-                import talib as _ta  # type: ignore
-            except ImportError:
-                from ..utils.talib_fallback import ATR as _ATR  # noqa: F401
-                class _ta:
-                    @staticmethod
-                    def ATR(*args, **kwargs):
-                        return _ATR(*args, **kwargs)
-            atr = _ta.ATR(h, l, c, 14)[-1]
-            atrp = atr / max(1e-9, c[-1])
-        except Exception:
-            atrp = 0.01
+                c = df['close'].to_numpy(); h = df['high'].to_numpy(); l = df['low'].to_numpy()
+                # Use TA‑Lib if available; otherwise fall back to the pure‑Python ATR
+                try:
+                    import talib as _ta  # type: ignore
+                except ImportError:
+                    from ..utils.talib_fallback import ATR as _ATR  # noqa: F401
+                    class _ta:
+                        @staticmethod
+                        def ATR(*args, **kwargs):
+                            return _ATR(*args, **kwargs)
+                atr = _ta.ATR(h, l, c, 14)[-1]
+                atrp = atr / max(1e-9, c[-1])
+            except Exception:
+                atrp = 0.01
         vt_mult=self._volt.multiplier(atrp)
         self._load_risk_overrides()
         over=float(self._risk_over.get(self.cfg.inst_id, 1.0)) if isinstance(self._risk_over, dict) else 1.0
@@ -694,18 +735,19 @@ class Bot:
         except Exception:
             pass
         # account guard
-        if self._account_guard_denies(risk_amt):
+        if self._account_guard_denies(risk_amt, equity):
             print('[RISK] account guard deny entry'); return
-        inst=self.client.get_instrument(self.cfg.inst_id)
+        inst=await self.client.acall("public", self.client.get_instrument, self.cfg.inst_id)
         worst_per_unit=abs(sig.price-sig.sl)*float(inst.get("ctVal"))
         if self._budget and not self._budget.can_open(risk_amt):
             print("[Risk] Daily budget exhausted"); 
-            with open(os.path.join(self._log_dir,"risk.log"),"a",encoding="utf-8") as f: f.write(f"{int(time.time()*1000)},BUDGET\n")
+            self._risk_w.write(f"{int(time.time()*1000)},BUDGET\n")
             return
         if not self._pguard.can_enter(self.cfg.inst_id, risk_amt):
             print("[Risk] Portfolio deny"); 
-            with open(os.path.join(self._log_dir,"risk.log"),"a",encoding="utf-8") as f: f.write(f"{int(time.time()*1000)},PPORT\n")
+            self._risk_w.write(f"{int(time.time()*1000)},PPORT\n")
             return
+        LATENCY.risk_ok(self.cfg.inst_id)
         est_slip=self._estimate_vwap_slippage("buy" if sig.side=="LONG" else "sell", risk_amt)
         print(f"[Signal] {sig.side} px={sig.price:.2f} sl={sig.sl:.2f} tp={sig.tp:.2f} risk={risk_amt:.2f} est_slip~{est_slip:.4f}")
         sz_total=calc_contract_size(inst, risk_amt, sig.price)
@@ -715,12 +757,14 @@ class Bot:
         # dry-run
         if not self.cfg.live:
             print(f"[DRY] split {sz_total} legs {self.scale_legs}% px={px} tp={tp_trigger} sl={sl_trigger}")
-            with open(self._trades_path,"a",encoding="utf-8") as f: f.write(f"{int(time.time()*1000)},{self.cfg.inst_id},{sig.side},{px},{sl_trigger},{tp_trigger},{sz_total},{sig.reason}\n")
+            self._trades_w.write(f"{int(time.time()*1000)},{self.cfg.inst_id},{sig.side},{px},{sl_trigger},{tp_trigger},{sz_total},{sig.reason}\n")
             send_tg(f"ENTRY {self.cfg.inst_id} {sig.side} px={px} sl={sl_trigger} tp={tp_trigger} sz={sz_total}")
             if self._budget: self._budget.consume(risk_amt)
             self._pguard.consume(self.cfg.inst_id, risk_amt)
             return
         # live placement
+        if self.cfg.attach_algo:
+            self._attach={"attachAlgoOrds":[{"tpTriggerPx":tp_trigger,"tpOrdPx":"-1","slTriggerPx":sl_trigger,"slOrdPx":"-1"}]}
         try:
             order_ids=[]
             if self.cfg.exec_mode == "slicer":
@@ -746,73 +790,37 @@ class Bot:
                 pov = POVExecutor(pov_rate=min(0.5, max(0.02, self.cfg.prate)), min_child=1, adverse_ticks=2, queue_max=5e3, cycle_s=max(1,int(self.cfg.slice_timeout_s)))
                 order_ids = await pov.execute(self, side, pos_side, int(sz_total), float(px))
             else:
+                # all scale legs in one batch round trip
                 legs=[p for p in self.scale_legs if p>0]
-                for i,pct in enumerate(legs):
-                    leg_sz = max(1, int(float(sz_total)*(pct/100.0)))
-                    clid=f"bot_{int(time.time())}_{i}"
-                    resp=self.client.place_order(instId=self.cfg.inst_id, tdMode=self.cfg.td_mode, side=side, posSide=pos_side, ordType="limit", sz=str(leg_sz), px=px, reduceOnly=False, clOrdId=clid)
-                    order_ids.append(resp.get("ordId", resp))
-            # algo TP/SL
-            self.client.order_algo(instId=self.cfg.inst_id, tdMode=self.cfg.td_mode, posSide=pos_side, ordType="take-profit", triggerPx=tp_trigger, orderPx=tp_trigger)
-            self.client.order_algo(instId=self.cfg.inst_id, tdMode=self.cfg.td_mode, posSide=pos_side, ordType="stop-loss",  triggerPx=sl_trigger, orderPx=sl_trigger)
-            with open(self._trades_path,"a",encoding="utf-8") as f: f.write(f"{int(time.time()*1000)},{self.cfg.inst_id},{sig.side},{px},{sl_trigger},{tp_trigger},{sz_total},{sig.reason}\n")
+                reqs=[dict(instId=self.cfg.inst_id, tdMode=self.cfg.td_mode, side=side, posSide=pos_side, ordType="limit",
+                           sz=str(max(1, int(float(sz_total)*(pct/100.0)))), px=px, reduceOnly=False, clOrdId=f"bot{int(time.time())}l{i}", **self._attach)
+                      for i,pct in enumerate(legs)]
+                # a leg whose request failed in transport may be live: resolve it by clOrdId
+                for r in await self.client.areconcile(await self.client.abatch_place(reqs)):
+                    if r["ok"]: order_ids.append(r.get("ordId"))
+                    elif r["ok"] is None:
+                        # still unknown: treat as live so the stop below protects it
+                        print("[LIVE] leg state unknown:", r.get("clOrdId"), r.get("sMsg")); order_ids.append(r.get("clOrdId"))
+                    else: print("[LIVE] leg rejected:", r.get("clOrdId"), r.get("sMsg"))
+                if not order_ids: raise RuntimeError("all entry legs rejected")
+            # algo TP/SL: attached to the entry orders, or one OCO closing the whole position
+            # (its algoId is what the trailer amends; an add to an open side reuses it)
+            algo={}; prev=self._posm.positions.get(pos_side)
+            if not self.cfg.attach_algo and not (prev and prev.algo_id):
+                algo=await self.client.acall("algo", self.client.order_algo, prio="reduce", instId=self.cfg.inst_id, tdMode=self.cfg.td_mode,
+                                             side=("sell" if side=="buy" else "buy"), posSide=pos_side, ordType="oco", closeFraction="1",
+                                             tpTriggerPx=tp_trigger, tpOrdPx="-1", slTriggerPx=sl_trigger, slOrdPx="-1")
+            self._trades_w.write(f"{int(time.time()*1000)},{self.cfg.inst_id},{sig.side},{px},{sl_trigger},{tp_trigger},{sz_total},{sig.reason}\n")
             send_tg(f"ENTRY {self.cfg.inst_id} {sig.side} px={px} sl={sl_trigger} tp={tp_trigger} sz={sz_total}")
-            # trailing if enabled
-            if self.cfg.trailing_be_rr or self.cfg.trailing_atr_mult:
-                asyncio.create_task(self._trailing_amend_loop(order_ids, sig))
+            # tracked for merges and the portfolio release; trailed once per bar (shared ATR)
+            # when there is an OCO algoId to amend or native trailing is on
+            self._posm.open(pos_side, float(px), sig.sl, algo.get("algoId"), order_ids, sz_total)
             if self._budget: self._budget.consume(risk_amt)
             self._pguard.consume(self.cfg.inst_id, risk_amt)
         except Exception as e:
             print("[LIVE] order error:", e); self._err_times.append(time.time())
-
-    async def _trailing_amend_loop(self, ord_ids, sig):
-        # We need ATR for trailing stop calculation; try TA‑Lib first,
-        # otherwise use our pure‑Python fallback.  If neither is available
-        # return early without trailing amendments.
-        try:
-            try:
-                import talib as ta  # type: ignore
-            except ImportError:
-                from ..utils.talib_fallback import ATR as _ATR  # noqa: F401
-                class _ta:
-                    @staticmethod
-                    def ATR(*args, **kwargs):
-                        return _ATR(*args, **kwargs)
-                ta = _ta()  # type: ignore
-        except Exception:
-            return
-        step=10; last_sl=sig.sl
-        while True:
-            await asyncio.sleep(step)
-            df=self.buffer.to_df()
-            if len(df)<60: continue
-            last=df.iloc[-1]
-            c,h,l=df["close"].to_numpy(), df["high"].to_numpy(), df["low"].to_numpy()
-            atr=ta.ATR(h,l,c,14)[-1]
-            if not (atr==atr): continue
-            px=float(last["close"]); rr0=abs(sig.price-sig.sl)
-            progressed=(px-sig.price) if sig.side=="LONG" else (sig.price-px)
-            if progressed < self.cfg.trailing_be_rr*rr0: continue
-            if sig.side=="LONG":
-                new_sl=max(last_sl, px - self.cfg.trailing_atr_mult*float(atr))
-                if new_sl<=last_sl: continue
-            else:
-                new_sl=min(last_sl, px + self.cfg.trailing_atr_mult*float(atr))
-                if new_sl>=last_sl: continue
-            last_sl=new_sl; sl_trigger=f"{new_sl:.4f}"
-            try:
-                # try amend orders; fallback cancel+new algo
-                for oid in ord_ids:
-                    try:
-                        self.client.amend_order(instId=self.cfg.inst_id, ordId=oid, slTriggerPx=sl_trigger, slOrdPx=sl_trigger)
-                    except Exception:
-                        self.client.cancel_algo(instId=self.cfg.inst_id, ordType="stop-loss")
-                        self.client.order_algo(instId=self.cfg.inst_id, tdMode=self.cfg.td_mode, posSide=("long" if sig.side=="LONG" else "short"), ordType="stop-loss", triggerPx=sl_trigger, orderPx=sl_trigger)
-                with open(os.path.join(self._log_dir,"trail.log"),"a",encoding="utf-8") as f: f.write(f"{int(time.time()*1000)},AMEND_OK,{sl_trigger}\n")
-                send_tg(f"TRAIL {self.cfg.inst_id} SL->{sl_trigger}")
-            except Exception as e:
-                with open(os.path.join(self._log_dir,"trail.log"),"a",encoding="utf-8") as f: f.write(f"{int(time.time()*1000)},AMEND_FAIL,{sl_trigger}\n")
-                print("[TRAIL] amend error:", e)
+        finally:
+            self._attach={}
 
 # ---- Safety fallback: ensure Bot has _wss_urls/_ws_proxy even if older builds miss them ----
 def _qi_bot_wss_urls(self):
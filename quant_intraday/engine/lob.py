@@ -1,6 +1,8 @@
 import asyncio, json, os, websockets, time
 from dataclasses import dataclass
 from typing import Dict, Optional
+from .book import parse_books
+from .md_hub import get_hub
 
 OKX_WSS_PUBLIC = "wss://ws.okx.com:8443/ws/v5/public"
 
@@ -20,24 +22,18 @@ class LOBFeed:
         self._task: Optional[asyncio.Task] = None
 
     async def start(self):
-        sub = {"op":"subscribe","args":[{"channel":"books5","instId": self.inst_id}]}
-        while True:
-            try:
-                async with websockets.connect(OKX_WSS_PUBLIC, ping_interval=20) as ws:
-                    await ws.send(json.dumps(sub))
-                    async for msg in ws:
-                        data = json.loads(msg)
-                        if "event" in data: 
-                            continue
-                        for d in data.get("data", []):
-                            ts=int(d.get("ts") or d.get("timestamp") or 0)
-                            bids=d.get("bids", []); asks=d.get("asks", [])
-                            if bids and asks:
-                                bb=float(bids[0][0]); ba=float(asks[0][0])
-                                bsz=float(bids[0][1]); asz=float(asks[0][1])
-                                self.book = Book(ts=ts, best_bid=bb, best_ask=ba, bid_sz=bsz, ask_sz=asz, spread=ba-bb)
-            except Exception as e:
-                await asyncio.sleep(2)
+        # shares the process-wide hub connection instead of opening its own books5 socket
+        url = os.getenv("OKX_WSS_PUBLIC", OKX_WSS_PUBLIC)
+        hub = get_hub(); slot = hub.subscribe_latest(url, "books5", self.inst_id); ver = 0
+        try:
+            while True:
+                ver, data = await slot.next(ver)
+                items = data.get("data") or []
+                b = parse_books(items[-1]) if items else None
+                if b:
+                    self.book = Book(ts=b.ts, best_bid=b.best_bid, best_ask=b.best_ask, bid_sz=b.bid_q, ask_sz=b.ask_q, spread=b.spread)
+        finally:
+            hub.unsubscribe(url, "books5", self.inst_id, slot)
 
     def ensure(self, loop):
         if self._task is None or self._task.done():
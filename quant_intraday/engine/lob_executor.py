@@ -2,7 +2,9 @@ import asyncio, time, os
 
 class LOBExecutor:
     """
-    Event-driven cancel/replace based on books5 events.
+    Event-driven cancel/replace based on books5 events (wakes on
+    ``bot._wait_event``: book update, own order update, or the next dwell /
+    bail-out deadline).
     Signals:
       - Spread widen/narrow beyond thresholds
       - Imbalance flips beyond +/-imb_th
@@ -10,6 +12,9 @@ class LOBExecutor:
     Throttles:
       - min_dwell_s: min lifetime before cancel/replace
       - max_cancels_per_min: cap cancel rate
+    Live orders go through ``bot._orders`` (OrderTracker): a repost cancels the
+    superseded order and carries only the unfilled remainder, and execution
+    ends as soon as the total size is filled.
     """
     def __init__(self, widen_ticks:int=3, narrow_ticks:int=1, imb_th:float=0.2, queue_surge:float=8000,
                  min_dwell_s:int=2, max_cancels_per_min:int=20):
@@ -25,16 +30,9 @@ class LOBExecutor:
         self._cxl_hist.append(now); return True
 
     def _snapshot(self, bot):
-        b=bot._books
+        b=bot._book
         if not b: return None
-        bids=b.get("bids",[]); asks=b.get("asks",[])
-        if not bids or not asks: return None
-        bid_px, bid_q = float(bids[0][0]), float(bids[0][1])
-        ask_px, ask_q = float(asks[0][0]), float(asks[0][1])
-        spread = ask_px - bid_px
-        mid = (ask_px + bid_px)/2.0
-        imb = (bid_q - ask_q) / max(1e-9, (bid_q + ask_q))
-        return dict(bid=bid_px, ask=ask_px, spread=spread, mid=mid, imb=imb, bid_q=bid_q, ask_q=ask_q)
+        return dict(bid=b.best_bid, ask=b.best_ask, spread=b.spread, mid=b.mid, imb=b.top_imbalance, bid_q=b.bid_q, ask_q=b.ask_q)
 
     async def execute(self, bot, side: str, pos_side: str, total_sz: int, px_hint: float):
         """
@@ -48,7 +46,7 @@ class LOBExecutor:
         Parameters
         ----------
         bot : object
-            Trading bot instance exposing ``_books``, ``_costs``, ``_log_dir``, ``_round_px`` and client.
+            Trading bot instance exposing ``_book`` (BookSnapshot), ``_costs``, ``_log_dir``, ``_round_px`` and client.
         side : str
             Order side ('buy' or 'sell').
         pos_side : str
@@ -81,18 +79,18 @@ class LOBExecutor:
         else:
             price = snap["bid"] if side == "buy" else snap["ask"]
         price = bot._round_px(price)
-        clid = f"lob_{int(time.time())}_0"
+        clid = f"lob{int(time.time())}n0"
         placed_time: float
         # Dry‑run mode (not live) writes execlog and uses synthetic order IDs
         if not bot.cfg.live:
-            with open(os.path.join(bot._log_dir, "execlog.csv"), "a", encoding="utf-8") as f:
-                f.write(
-                    f"{int(time.time()*1000)},LOB_PLACE,{bot.cfg.inst_id},{side},{pos_side},{tsz},{price:.6f}\n"
-                )
+            bot._exec_w.write(
+                f"{int(time.time()*1000)},LOB_PLACE,{bot.cfg.inst_id},{side},{pos_side},{tsz},{price:.6f}\n"
+            )
             ids.append(clid)
             placed_time = time.time()
+            cur = None
         else:
-            resp = bot.client.place_order(
+            cur = await bot._orders.place(
                 instId=bot.cfg.inst_id,
                 tdMode=bot.cfg.td_mode,
                 side=side,
@@ -102,14 +100,31 @@ class LOBExecutor:
                 px=f"{price:.6f}",
                 reduceOnly=False,
                 clOrdId=clid,
+                **bot._attach,
             )
-            ord_id = resp.get("ordId", resp)
-            ids.append(ord_id)
+            ids.append(cur.ord_id or clid)
             placed_time = time.time()
-        last_snap = snap or self._snapshot(bot) or {}
-        # event loop: monitor books and decide whether to repost
+        cls = [clid]
+        ver = bot._wake.version
+        n_repost = 0
+        # event loop: monitor books/fills and decide whether to repost
         while True:
-            await asyncio.sleep(0.3)
+            now = time.time()
+            deadline = placed_time + (self.min_dwell_s if now - placed_time < self.min_dwell_s else 30)
+            if cur is not None and not bot._orders.streaming:
+                # fills come from REST polls: wake for the next one even on a quiet book
+                deadline = min(deadline, now + bot._orders.poll_s)
+            ver = await bot._wait_event(ver, deadline - now)
+            if cur is not None:
+                await bot._orders.sync([cur.cl_ord_id])
+                if bot._orders.filled(cls) >= tsz - 1e-9:
+                    bot._exec_w.write(
+                        f"{int(time.time()*1000)},FILL_ALL,{bot.cfg.inst_id},{side},{pos_side},{tsz},{bot._orders.avg_px(cls):.6f}\n"
+                    )
+                    break
+            # bail out 30 s after the last placement; the working order is left to rest
+            if time.time() - placed_time > 30:
+                break
             s = self._snapshot(bot)
             if not s:
                 continue
@@ -122,49 +137,55 @@ class LOBExecutor:
             narrow = spread_ticks <= self.narrow_ticks
             widen = spread_ticks >= self.widen_ticks
             dwell_ok = (time.time() - placed_time) >= self.min_dwell_s
-            if (widen or imb_bad or surge or narrow) and dwell_ok:
-                if not self._can_cancel():
-                    continue
-                # cancel & repost at adjusted price
-                adj = (1 if side == "buy" else -1) * (1 if narrow else -1)  # if narrow -> be more aggressive
-                new_px = s["bid"] if side == "buy" else s["ask"]
-                new_px = new_px + adj * (ticks or 1.0)
-                new_px = bot._round_px(new_px)
-                if not bot.cfg.live:
-                    with open(os.path.join(bot._log_dir, "execlog.csv"), "a", encoding="utf-8") as f:
-                        f.write(
-                            f"{int(time.time()*1000)},LOB_REPOST,{bot.cfg.inst_id},{side},{pos_side},{tsz},{new_px:.6f}\n"
-                        )
-                    placed_time = time.time()
-                    last_snap = s
-                    continue
-                try:
-                    # best‑effort: repost; private WS should handle cancellation detection
-                    resp = bot.client.place_order(
-                        instId=bot.cfg.inst_id,
-                        tdMode=bot.cfg.td_mode,
-                        side=side,
-                        posSide=pos_side,
-                        ordType="limit",
-                        sz=str(tsz),
-                        px=f"{new_px:.6f}",
-                        reduceOnly=False,
-                        clOrdId=f"lob_{int(time.time())}",
-                    )
-                    ids.append(resp.get("ordId", resp))
-                    placed_time = time.time()
-                    last_snap = s
-                    with open(os.path.join(bot._log_dir, "execlog.csv"), "a", encoding="utf-8") as f:
-                        f.write(
-                            f"{int(time.time()*1000)},LOB_REPOST,{bot.cfg.inst_id},{side},{pos_side},{tsz},{new_px:.6f}\n"
-                        )
-                except Exception:
-                    with open(os.path.join(bot._log_dir, "execlog.csv"), "a", encoding="utf-8") as f:
-                        f.write(
-                            f"{int(time.time()*1000)},LOB_REPOST_FAIL,{bot.cfg.inst_id},{side},{pos_side},{tsz},{new_px:.6f}\n"
-                        )
-            last_snap = s
-            # break condition: after 30 seconds bail out; in live this should be replaced by fill tracking
-            if time.time() - placed_time > 30:
+            # an order canceled/rejected by the exchange is reposted once the dwell has passed
+            gone = cur is not None and cur.done
+            if not ((gone or widen or imb_bad or surge or narrow) and dwell_ok):
+                continue
+            if not gone and not self._can_cancel():
+                continue
+            # cancel & repost at adjusted price
+            adj = (1 if side == "buy" else -1) * (1 if narrow else -1)  # if narrow -> be more aggressive
+            new_px = s["bid"] if side == "buy" else s["ask"]
+            new_px = new_px + adj * (ticks or 1.0)
+            new_px = bot._round_px(new_px)
+            if not bot.cfg.live:
+                bot._exec_w.write(
+                    f"{int(time.time()*1000)},LOB_REPOST,{bot.cfg.inst_id},{side},{pos_side},{tsz},{new_px:.6f}\n"
+                )
+                placed_time = time.time()
+                continue
+            # the superseded order is canceled first; the repost carries only what is still unfilled
+            await bot._orders.cancel(cur)
+            rem = int(round(tsz - bot._orders.filled(cls)))
+            if rem <= 0:
+                bot._exec_w.write(
+                    f"{int(time.time()*1000)},FILL_ALL,{bot.cfg.inst_id},{side},{pos_side},{tsz},{bot._orders.avg_px(cls):.6f}\n"
+                )
                 break
-        return ids
\ No newline at end of file
+            n_repost += 1
+            clid = f"lob{int(time.time())}n{n_repost}"
+            try:
+                cur = await bot._orders.place(
+                    instId=bot.cfg.inst_id,
+                    tdMode=bot.cfg.td_mode,
+                    side=side,
+                    posSide=pos_side,
+                    ordType="limit",
+                    sz=str(rem),
+                    px=f"{new_px:.6f}",
+                    reduceOnly=False,
+                    clOrdId=clid,
+                    **bot._attach,
+                )
+                cls.append(clid)
+                ids.append(cur.ord_id or clid)
+                bot._exec_w.write(
+                    f"{int(time.time()*1000)},LOB_REPOST,{bot.cfg.inst_id},{side},{pos_side},{rem},{new_px:.6f}\n"
+                )
+            except Exception:
+                bot._exec_w.write(
+                    f"{int(time.time()*1000)},LOB_REPOST_FAIL,{bot.cfg.inst_id},{side},{pos_side},{rem},{new_px:.6f}\n"
+                )
+                cur = bot._orders.get(clid)
+            placed_time = time.time()
+        return ids
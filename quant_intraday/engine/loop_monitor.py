@@ -0,0 +1,125 @@
+import os, sys, time, asyncio, threading, traceback
+from typing import Optional
+from .control_plane import get_control_plane
+from ..utils.logwriter import get_writer
+from ..utils.metrics import counter, gauge, histogram
+from ..utils.notifier import notify
+
+HOLD = "loop_lag"   # control-plane pause hold owned by the monitor
+
+def _current_task(loop) -> Optional[asyncio.Task]:
+    """The task running on ``loop`` right now, read from another thread (CPython bookkeeping)."""
+    try:
+        return asyncio.tasks._current_tasks.get(loop)  # type: ignore[attr-defined]
+    except Exception:
+        return None
+
+class LoopMonitor:
+    """
+    Event-loop scheduling lag for one loop (shared by every bot of the process).
+    - A probe task sleeps ``interval_s`` and records how late it woke up:
+      ``qi_loop_lag_seconds`` histogram.
+    - A watchdog thread watches the probe's heartbeat; once the loop has not
+      come back for ``stall_s`` it writes the running task and the loop
+      thread's stack (the code blocking it) to ``<log_dir>/stalls.log``, once
+      per stall, and counts ``qi_loop_stalls_total``.
+    - ``safe_mode``: a lag of ``stall_s`` or more puts a pause hold on the
+      control plane, i.e. the ``control.json`` ``paused`` behaviour (no new
+      entries; exits and protective orders keep running), until lag has stayed
+      under ``resume_s`` for ``hold_s``.  The hold is in memory only.
+    """
+    def __init__(self, log_dir: str = "live_output", interval_s: float = 0.05, stall_s: float = 0.25,
+                 safe_mode: bool = False, resume_s: Optional[float] = None, hold_s: float = 30.0):
+        self.log_dir = log_dir; self.interval_s = interval_s; self.stall_s = stall_s
+        self.safe_mode = safe_mode; self.resume_s = stall_s / 2 if resume_s is None else resume_s; self.hold_s = hold_s
+        self.lag_s = 0.0; self.max_lag_s = 0.0; self.stalls = 0; self.tripped = False
+        self._ctl = get_control_plane(log_dir)
+        self._w = get_writer(os.path.join(log_dir, "stalls.log"))
+        self._h = histogram("qi_loop_lag_seconds", "Event-loop scheduling lag",
+                            buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5))
+        self._stalls = counter("qi_loop_stalls_total", "Event-loop stalls longer than the watchdog threshold")
+        self._safe = gauge("qi_loop_safe_mode", "1 while new entries are paused for event-loop lag")
+        self._beat = time.perf_counter(); self._calm_since: Optional[float] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None; self._tid: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None; self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    # --- loop side ---
+    async def _probe(self):
+        try:
+            while True:
+                self._beat = t0 = time.perf_counter()
+                await asyncio.sleep(self.interval_s)
+                self.observe(max(0.0, time.perf_counter() - t0 - self.interval_s))
+        finally:
+            self._stop.set()
+
+    def observe(self, lag: float, now: Optional[float] = None):
+        """Account one lag sample and move the safe mode (loop thread only)."""
+        now = time.time() if now is None else now
+        self.lag_s = lag; self.max_lag_s = max(self.max_lag_s, lag); self._h.observe(lag)
+        if lag >= self.stall_s:
+            self._trip(lag)
+        elif lag < self.resume_s:
+            if self._calm_since is None: self._calm_since = now
+            if self.tripped and now - self._calm_since >= self.hold_s: self._clear(now)
+        else:
+            self._calm_since = None
+
+    def _trip(self, lag: float):
+        self._calm_since = None
+        if not self.safe_mode or self.tripped: return
+        self.tripped = True; self._safe.set(1)
+        self._ctl.hold(HOLD, f"event loop lag {lag * 1000:.0f}ms")
+        self._w.write(f"{time.strftime('%Y-%m-%d %H:%M:%S')} safe mode on: lag {lag * 1000:.0f}ms")
+        self._notify({"on": True, "lag_ms": round(lag * 1000, 1)})
+
+    def _clear(self, now: float):
+        self.tripped = False; self._safe.set(0)
+        self._ctl.hold(HOLD, None)
+        self._w.write(f"{time.strftime('%Y-%m-%d %H:%M:%S')} safe mode off: lag < {self.resume_s * 1000:.0f}ms for {now - self._calm_since:.0f}s")
+        self._notify({"on": False})
+
+    def _notify(self, payload: dict):
+        # the webhook is a blocking POST; keep it off the loop we are protecting
+        try: asyncio.get_running_loop().run_in_executor(None, notify, "loop_safe_mode", payload)
+        except RuntimeError: notify("loop_safe_mode", payload)
+
+    # --- watchdog thread ---
+    def _watch(self):
+        dumped = False
+        while not self._stop.wait(self.interval_s):
+            late = time.perf_counter() - self._beat - self.interval_s
+            if late < self.stall_s:
+                dumped = False; continue
+            if dumped or self._loop is None or not self._loop.is_running(): continue
+            dumped = True; self.dump(late)
+            if self.safe_mode: self._loop.call_soon_threadsafe(self._trip, late)
+
+    def dump(self, late: float):
+        """Write the running task and the loop thread's current stack to ``stalls.log``."""
+        self.stalls += 1; self._stalls.inc()
+        task = _current_task(self._loop); frame = sys._current_frames().get(self._tid)
+        name = task.get_name() if task is not None else "-"
+        coro = getattr(task.get_coro(), "__qualname__", "?") if task is not None else "-"
+        stack = "".join(traceback.format_stack(frame)) if frame is not None else "  <no frame>\n"
+        self._w.write(f"{time.strftime('%Y-%m-%d %H:%M:%S')} stall: loop blocked {late * 1000:.0f}ms task={name} coro={coro}\n{stack}")
+
+    def ensure(self, loop):
+        if self._task is None or self._task.done():
+            self._loop = loop; self._tid = threading.get_ident(); self._beat = time.perf_counter(); self._stop.clear()
+            self._task = loop.create_task(self._probe())
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._watch, name="qi-loop-watchdog", daemon=True)
+            self._thread.start()
+
+_MON: Optional[LoopMonitor] = None
+_MON_LOOP = None
+
+def get_loop_monitor(log_dir: str = "live_output", **kw) -> LoopMonitor:
+    """The process-wide monitor for the running loop; the first caller's settings win."""
+    global _MON, _MON_LOOP
+    loop = asyncio.get_running_loop()
+    if _MON is None or _MON_LOOP is not loop:
+        _MON = LoopMonitor(log_dir, **kw); _MON_LOOP = loop
+    return _MON
@@ -0,0 +1,194 @@
+import os, json, asyncio, websockets
+from typing import Dict, List, Optional, Tuple
+from .conflate import ConflatingSlot
+from ..utils.metrics import gauge, maybe_serve
+
+Key = Tuple[str, str]  # (channel, instId)
+
+class _Shard:
+    """One WS connection carrying up to ``max_subs`` channel/instrument args."""
+    def __init__(self, hub: "MarketDataHub", url: str, ix: int):
+        self.hub = hub; self.url = url; self.ix = ix
+        self.args: Dict[Key, dict] = {}
+        self.ws = None
+        self.task: Optional[asyncio.Task] = None
+        self.msgs = 0; self.reconnects = 0
+
+    def _send(self, op: str, keys):
+        if self.ws is None or not keys: return
+        msg = json.dumps({"op": op, "args": [{"channel": c, "instId": i} for c, i in keys]})
+        asyncio.get_running_loop().create_task(self._safe_send(msg))
+
+    async def _safe_send(self, msg: str):
+        try: await self.ws.send(msg)
+        except Exception: pass
+
+    def add(self, key: Key):
+        self.args[key] = {"channel": key[0], "instId": key[1]}
+        if self.task is None or self.task.done():
+            self.task = asyncio.get_running_loop().create_task(self.run())
+        else:
+            self._send("subscribe", [key])
+
+    def remove(self, key: Key):
+        self.args.pop(key, None)
+        if not self.args:
+            if self.task: self.task.cancel()
+            self.task = None; self.ws = None
+        else:
+            self._send("unsubscribe", [key])
+
+    async def run(self):
+        while self.args:
+            try:
+                async with websockets.connect(self.url, ping_interval=20, proxy=self.hub.proxy) as ws:
+                    self.ws = ws
+                    await ws.send(json.dumps({"op": "subscribe", "args": list(self.args.values())}))
+                    async for msg in ws:
+                        self.msgs += 1
+                        data = json.loads(msg)  # decoded once for every subscriber
+                        if "event" in data: continue
+                        arg = data.get("arg") or {}
+                        self.hub._fanout(self.url, (arg.get("channel", ""), arg.get("instId", "")), data)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.ws = None; self.reconnects += 1
+                print(f"WS hub[{self.ix}] reconnect:", e); await asyncio.sleep(2)
+        self.ws = None
+
+class MarketDataHub:
+    """
+    Process-wide public market data multiplexer.
+    - Subscriptions for many instruments share a few WS connections per URL,
+      sharded at ``max_subs`` args per connection (OKX per-connection limits).
+    - Each message is JSON-decoded once and fanned out to per-subscriber
+      ``asyncio.Queue``s (bounded; the oldest message is dropped when full).
+    - ``subscribe_latest`` returns a shared ``ConflatingSlot`` instead of a
+      queue: for full-snapshot streams (books5, tickers) a slow consumer only
+      ever sees the newest message and never works through a stale backlog.
+    - Subscriptions are reference-counted: a channel is subscribed on the
+      exchange only while at least one consumer holds it.
+    - Drops, OKX ``seqId``/``prevSeqId`` gaps and queue depth are exported as
+      ``qi_md_*`` gauges every ``report_s`` seconds.
+    """
+    def __init__(self, max_subs: int | None = None, queue_size: int = 1000, proxy: str | None = None):
+        self.max_subs = int(max_subs or os.getenv("QI_WS_MAX_SUBS", "100"))
+        self.queue_size = queue_size; self.proxy = proxy
+        self._shards: Dict[str, List[_Shard]] = {}
+        self._subs: Dict[Tuple[str, Key], List[asyncio.Queue]] = {}
+        self._where: Dict[Tuple[str, Key], _Shard] = {}
+        self._latest: Dict[Tuple[str, Key], Tuple[ConflatingSlot, int]] = {}
+        self._seq: Dict[Tuple[str, Key], int] = {}
+        self._gaps: Dict[Tuple[str, Key], int] = {}
+        self._report: Optional[asyncio.Task] = None
+        self.report_s = 5.0
+        self.drops = 0
+
+    def subscribe(self, url: str, channel: str, inst_id: str) -> asyncio.Queue:
+        """Every message, in order, through a bounded queue (candles, incremental books)."""
+        sk = (url, (channel, inst_id))
+        q: asyncio.Queue = asyncio.Queue(self.queue_size)
+        self._subs.setdefault(sk, []).append(q)
+        self._acquire(sk)
+        return q
+
+    def subscribe_latest(self, url: str, channel: str, inst_id: str) -> ConflatingSlot:
+        """Latest message only, via a slot shared by all consumers of this stream."""
+        sk = (url, (channel, inst_id))
+        slot, n = self._latest.get(sk, (None, 0))
+        if slot is None: slot = ConflatingSlot()
+        self._latest[sk] = (slot, n + 1)
+        self._acquire(sk)
+        return slot
+
+    def unsubscribe(self, url: str, channel: str, inst_id: str, q):
+        sk = (url, (channel, inst_id))
+        if isinstance(q, ConflatingSlot):
+            slot, n = self._latest.get(sk, (None, 0))
+            if n > 1: self._latest[sk] = (slot, n - 1)
+            else: self._latest.pop(sk, None)
+        else:
+            subs = self._subs.get(sk, [])
+            if q in subs: subs.remove(q)
+            if not subs: self._subs.pop(sk, None)
+        if sk in self._subs or sk in self._latest: return
+        self._seq.pop(sk, None)
+        shard = self._where.pop(sk, None)
+        if shard: shard.remove(sk[1])
+
+    def _acquire(self, sk):
+        if sk not in self._where:
+            shard = self._pick(sk[0])
+            self._where[sk] = shard; shard.add(sk[1])
+        if self._report is None or self._report.done():
+            self._report = asyncio.get_running_loop().create_task(self._report_loop())
+
+    def resubscribe(self, url: str, channel: str, inst_id: str):
+        """Ask the exchange for a fresh snapshot (e.g. after a book checksum failure)."""
+        shard = self._where.get((url, (channel, inst_id)))
+        if shard:
+            shard._send("unsubscribe", [(channel, inst_id)]); shard._send("subscribe", [(channel, inst_id)])
+
+    def _pick(self, url: str) -> _Shard:
+        shards = self._shards.setdefault(url, [])
+        for s in shards:
+            if len(s.args) < self.max_subs: return s
+        s = _Shard(self, url, len(shards)); shards.append(s)
+        return s
+
+    def _fanout(self, url: str, key: Key, data: dict):
+        sk = (url, key)
+        seq = prev = -1
+        items = data.get("data") or ()
+        if items and isinstance(items[-1], dict):
+            seq = int(items[-1].get("seqId", -1)); prev = int(items[0].get("prevSeqId", -1))
+            last = self._seq.get(sk, -1)
+            if prev != -1 and last != -1 and prev != last:
+                self._gaps[sk] = self._gaps.get(sk, 0) + 1
+            if seq != -1: self._seq[sk] = seq
+        for q in self._subs.get(sk, ()):
+            if q.full():
+                q.get_nowait(); self.drops += 1
+            q.put_nowait(data)
+        ls = self._latest.get(sk)
+        if ls: ls[0].publish(data, seq, prev)
+
+    def stats(self) -> dict:
+        shards = [s for arr in self._shards.values() for s in arr]
+        return {"connections": sum(1 for s in shards if s.ws is not None),
+                "subscriptions": len(self._where), "msgs": sum(s.msgs for s in shards),
+                "reconnects": sum(s.reconnects for s in shards), "drops": self.drops,
+                "conflated": sum(sl.drops for sl, _ in self._latest.values()),
+                "gaps": sum(self._gaps.values()),
+                "queue_depth": max((q.qsize() for qs in self._subs.values() for q in qs), default=0)}
+
+    def export_metrics(self):
+        g_depth = gauge("qi_md_queue_depth", "Max pending messages per market data stream", ("channel", "inst"))
+        g_drop = gauge("qi_md_dropped", "Messages dropped/conflated per stream (cumulative)", ("channel", "inst"))
+        g_gap = gauge("qi_md_seq_gaps", "OKX seqId gaps per stream (cumulative)", ("channel", "inst"))
+        for (url, (ch, inst)) in list(self._where):
+            sk = (url, (ch, inst))
+            qs = self._subs.get(sk, ()); ls = self._latest.get(sk)
+            g_depth.labels(ch, inst).set(max((q.qsize() for q in qs), default=0))
+            g_drop.labels(ch, inst).set(ls[0].drops if ls else 0)
+            g_gap.labels(ch, inst).set(self._gaps.get(sk, 0))
+        gauge("qi_md_connections", "Open market data WS connections").set(self.stats()["connections"])
+
+    async def _report_loop(self):
+        maybe_serve()
+        while self._where:
+            try: self.export_metrics()
+            except Exception: pass
+            await asyncio.sleep(self.report_s)
+
+_HUB: Optional[MarketDataHub] = None
+_HUB_LOOP = None
+
+def get_hub(proxy: str | None = None) -> MarketDataHub:
+    """The process-wide hub shared by every Bot / LOBFeed (one per running loop)."""
+    global _HUB, _HUB_LOOP
+    loop = asyncio.get_running_loop()
+    if _HUB is None or _HUB_LOOP is not loop:
+        _HUB = MarketDataHub(proxy=proxy); _HUB_LOOP = loop
+    return _HUB
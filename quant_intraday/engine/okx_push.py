@@ -2,7 +2,7 @@ import os, time, json, hmac, hashlib, base64, asyncio, websockets
 from typing import Dict, Any
 from ..utils.exelog import write_event
 
-OKX_WSS_PRIVATE = "wss://ws.okx.com:8443/ws/v5/private"
+OKX_WSS_PRIVATE = os.getenv("OKX_WSS_PRIVATE", "wss://ws.okx.com:8443/ws/v5/private")
 
 def _sign(ts: str, method: str, path: str, body: str, secret: str) -> str:
     msg = f"{ts}{method}{path}{body}".encode()
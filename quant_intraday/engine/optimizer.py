@@ -6,7 +6,9 @@ class ExecOptimizer:
     """Book-aware limit execution with cancel/repost.
     - Aim to fill target size by repeatedly placing limits near top-of-book.
     - If not fully filled within slice_timeout_s, cancel & repost with more aggressive price.
-    - If private WS is connected, checks order fill progress; otherwise, time-based.
+    - Fill progress comes from ``bot._orders`` (private ``orders`` stream, or
+      REST polling without it) and is re-checked on every order/book event
+      (``bot._wait_event``); each repost carries only the unfilled remainder.
     Params:
         step_ticks: price step each repost (ticks); positive -> more aggressive per cycle.
         max_reposts: safety cap on repost cycles.
@@ -18,18 +20,9 @@ class ExecOptimizer:
         self.max_reposts=max_reposts
         self.cross_when_last=cross_when_last
 
-    def _filled_amount(self, bot, ord_id:str):
-        try:
-            ws = getattr(bot, "_private_ws", None)
-            if ws is None: return 0.0
-            od = ws.state.orders.get(ord_id, {})
-            return float(od.get("accFillSz", 0.0))
-        except Exception:
-            return 0.0
-
     async def execute(self, bot, side:str, pos_side:str, total_sz:int, px_hint:float):
         """Returns list of order IDs placed (for trailing mgmt)."""
-        remaining = int(total_sz); placed_ids=[]
+        total = int(total_sz); remaining = total; placed_ids=[]; cls=[]
         loop_ix = 0
         while remaining > 0 and loop_ix <= self.max_reposts:
             loop_ix += 1
@@ -42,44 +35,33 @@ class ExecOptimizer:
                 # cross one extra step
                 px = px + (self.step_ticks * bot._costs.tick_size) * (1 if side=="buy" else -1)
             cur_sz = remaining
-            clid=f"bot_opt_{int(time.time())}_{loop_ix}"
+            clid=f"opt{int(time.time())}n{loop_ix}"
             if not bot.cfg.live:
                 print(f"[DRY] OPT loop={loop_ix} {side}/{pos_side} sz={cur_sz} px={px:.6f}")
                 # log event
-                with open(os.path.join(bot._log_dir, "execlog.csv"), "a", encoding="utf-8") as f:
-                    f.write(f"{int(time.time()*1000)},PLACE,{bot.cfg.inst_id},{side},{pos_side},{cur_sz},{px:.6f}\n")
+                bot._exec_w.write(f"{int(time.time()*1000)},PLACE,{bot.cfg.inst_id},{side},{pos_side},{cur_sz},{px:.6f}\n")
                 # emulate filled
                 placed_ids.append(clid)
                 break
             # live path
             try:
-                resp = bot.client.place_order(instId=bot.cfg.inst_id, tdMode=bot.cfg.td_mode, side=side, posSide=pos_side,
-                                              ordType="limit", sz=str(cur_sz), px=f"{px:.6f}", reduceOnly=False, clOrdId=clid)
-                ord_id = resp.get("ordId", resp)
-                placed_ids.append(ord_id)
-                # monitor fill for timeout
-                t0 = time.time()
-                while time.time() - t0 < self.slice_timeout_s:
-                    filled = self._filled_amount(bot, ord_id)
-                    if filled >= cur_sz - 1e-9:
-                        with open(os.path.join(bot._log_dir, "execlog.csv"), "a", encoding="utf-8") as f:
-                            f.write(f"{int(time.time()*1000)},FILL_ALL,{bot.cfg.inst_id},{side},{pos_side},{cur_sz},{px:.6f}\n")
-                        remaining -= cur_sz
-                        break
-                    await asyncio.sleep(0.5)
-                else:
-                    # timeout -> cancel & continue
-                    try:
-                        bot.client.cancel_order(instId=bot.cfg.inst_id, ordId=ord_id)
-                        with open(os.path.join(bot._log_dir, "execlog.csv"), "a", encoding="utf-8") as f:
-                            f.write(f"{int(time.time()*1000)},CANCEL,{bot.cfg.inst_id},{side},{pos_side},{cur_sz},{px:.6f}\n")
-                    except Exception as e:
-                        with open(os.path.join(bot._log_dir, "execlog.csv"), "a", encoding="utf-8") as f:
-                            f.write(f"{int(time.time()*1000)},CANCEL_FAIL,{bot.cfg.inst_id},{side},{pos_side},{cur_sz},{px:.6f}\n")
-                    # continue to next loop with more aggressive price
+                o = await bot._orders.place(instId=bot.cfg.inst_id, tdMode=bot.cfg.td_mode, side=side, posSide=pos_side,
+                                            ordType="limit", sz=str(cur_sz), px=f"{px:.6f}", reduceOnly=False, clOrdId=clid, **bot._attach)
+                cls.append(clid); placed_ids.append(o.ord_id or clid)
+                # wait for completion (order/book events) up to the slice timeout
+                t0 = time.time(); ver = bot._wake.version
+                while not o.done and time.time() - t0 < self.slice_timeout_s:
+                    ver = await bot._wait_event(ver, self.slice_timeout_s - (time.time() - t0))
+                    await bot._orders.sync([clid])
+                if o.state == "filled":
+                    bot._exec_w.write(f"{int(time.time()*1000)},FILL_ALL,{bot.cfg.inst_id},{side},{pos_side},{cur_sz},{o.avg_px or px:.6f}\n")
+                elif not o.done:
+                    # timeout -> cancel, then continue with the true unfilled remainder at a more aggressive price
+                    await bot._orders.cancel(o)
+                    bot._exec_w.write(f"{int(time.time()*1000)},CANCEL,{bot.cfg.inst_id},{side},{pos_side},{cur_sz},{px:.6f}\n")
+                remaining = int(round(total - bot._orders.filled(cls)))
             except Exception as e:
                 print("[OPT] place error:", e)
-                with open(os.path.join(bot._log_dir, "execlog.csv"), "a", encoding="utf-8") as f:
-                    f.write(f"{int(time.time()*1000)},PLACE_FAIL,{bot.cfg.inst_id},{side},{pos_side},{cur_sz},{px:.6f}\n")
+                bot._exec_w.write(f"{int(time.time()*1000)},PLACE_FAIL,{bot.cfg.inst_id},{side},{pos_side},{cur_sz},{px:.6f}\n")
                 await asyncio.sleep(0.5)
         return placed_ids
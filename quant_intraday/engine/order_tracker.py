@@ -0,0 +1,173 @@
+import time, asyncio
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Optional
+from ..utils.latency import LATENCY
+
+TERMINAL = ("filled", "canceled", "mmp_canceled", "rejected")
+
+@dataclass
+class TrackedOrder:
+    """Our view of one order, keyed by ``clOrdId``."""
+    cl_ord_id: str
+    sz: float
+    px: float = 0.0
+    ord_id: str = ""
+    state: str = "sent"      # sent -> live -> partially_filled -> filled | canceled | rejected
+    filled: float = 0.0      # accFillSz
+    avg_px: float = 0.0
+    ts: float = field(default_factory=time.time)
+    seen: float = 0.0        # last update from the exchange (push or REST)
+    polled: float = 0.0      # last REST query sent by ``sync``
+
+    @property
+    def done(self) -> bool: return self.state in TERMINAL
+    @property
+    def remaining(self) -> float: return 0.0 if self.done else max(0.0, self.sz - self.filled)
+
+class OrderTracker:
+    """
+    Per-bot live state of the orders its executors placed.
+    - ``on_order`` consumes private ``orders`` channel updates (accFillSz,
+      avgPx, state); fills only ever increase and terminal states stick, so
+      a late REST answer cannot roll back a newer push.
+    - ``place``/``cancel`` wrap the client's async order calls and register
+      the order first, so pushes arriving before the ack are not lost.  A
+      placement that fails in transport may still be live: it is resolved
+      by clOrdId (query, cancel if the exchange does not know it yet) and
+      only raises once the order is known not to exist.
+    - Without a connected private stream (``cfg.use_private`` off, or the
+      socket reconnecting) ``sync`` polls the open orders over REST
+      (rate-limited ``query`` class), at most once per ``poll_s`` per order
+      and not while a fresher update is in hand, so executors can call it on
+      every book event; while it streams, ``sync`` is a no-op.
+    - ``cancel`` always settles with one REST query if no terminal state
+      arrived within ``settle_s`` (pushes can be lost across a reconnect),
+      so callers never size a repost from a stale fill.
+    """
+    def __init__(self, bot, keep: int = 500, poll_s: float = 1.0):
+        self.bot = bot; self.keep = keep; self.poll_s = poll_s
+        self.orders: Dict[str, TrackedOrder] = {}
+        self._by_ord: Dict[str, str] = {}
+
+    @property
+    def streaming(self) -> bool:
+        ws = getattr(self.bot, "_private_ws", None)
+        return bool(self.bot.cfg.use_private and ws is not None and getattr(ws, "ready", False))
+
+    def track(self, cl_ord_id: str, sz: float, px: float = 0.0) -> TrackedOrder:
+        o = self.orders[cl_ord_id] = TrackedOrder(cl_ord_id, float(sz), float(px))
+        if len(self.orders) > self.keep: self._prune()
+        return o
+
+    def get(self, cl_ord_id: str) -> Optional[TrackedOrder]:
+        return self.orders.get(cl_ord_id)
+
+    def filled(self, cls: Iterable[str]) -> float:
+        return sum(o.filled for o in (self.orders.get(c) for c in cls) if o)
+
+    def avg_px(self, cls: Iterable[str]) -> float:
+        os_ = [o for o in (self.orders.get(c) for c in cls) if o and o.filled > 0]
+        q = sum(o.filled for o in os_)
+        return sum(o.filled * o.avg_px for o in os_) / q if q else 0.0
+
+    def on_order(self, d: dict) -> Optional[TrackedOrder]:
+        cl = d.get("clOrdId") or self._by_ord.get(d.get("ordId", ""))
+        o = self.orders.get(cl) if cl else None
+        if o is None: return None
+        o.seen = time.time()
+        if d.get("ordId") and not o.ord_id:
+            o.ord_id = d["ordId"]; self._by_ord[o.ord_id] = cl
+        try:
+            acc = float(d.get("accFillSz") or 0)
+            if acc >= o.filled:
+                o.filled = acc
+                if d.get("avgPx"): o.avg_px = float(d["avgPx"])
+            if d.get("sz"): o.sz = float(d["sz"])
+        except (TypeError, ValueError):
+            pass
+        st = d.get("state")
+        if st and not o.done: o.state = st
+        return o
+
+    def _prune(self):
+        done = sorted((o for o in self.orders.values() if o.done), key=lambda o: o.ts)
+        for o in done[: len(self.orders) - self.keep]:
+            self.orders.pop(o.cl_ord_id, None); self._by_ord.pop(o.ord_id, None)
+
+    # ---- executor helpers ----
+    async def place(self, **kw) -> TrackedOrder:
+        """
+        Register, then place via ``client.aplace_order``.  An exchange error
+        (``RuntimeError``) marks the order ``rejected`` and re-raises; a
+        transport failure is resolved by clOrdId and returns the order unless
+        it is confirmed absent, so callers keep sizing from its fills.
+        """
+        o = self.track(kw["clOrdId"], float(kw.get("sz", 0)), float(kw.get("px", 0) or 0))
+        try:
+            resp = await self.bot.client.aplace_order(**kw)
+        except RuntimeError:
+            o.state = "rejected"; raise
+        except Exception as e:
+            print("[ORD] place unknown:", o.cl_ord_id, e)
+            if not await self._resolve(o): raise
+            return o
+        oid = resp.get("ordId") if isinstance(resp, dict) else None
+        if oid:
+            o.ord_id = oid; self._by_ord[oid] = o.cl_ord_id
+        if o.state == "sent": o.state = "live"
+        return o
+
+    async def cancel(self, o: TrackedOrder, settle_s: float = 1.0) -> TrackedOrder:
+        """Cancel ``o`` and wait (up to ``settle_s``) for its final fill quantity."""
+        if o.done: return o
+        bot = self.bot
+        try:
+            await bot.client.acancel_order(instId=bot.cfg.inst_id, clOrdId=o.cl_ord_id)
+        except Exception as e:
+            print("[ORD] cancel error:", o.cl_ord_id, e)
+        deadline = time.time() + settle_s; ver = bot._wake.version
+        while not o.done and time.time() < deadline:
+            if self.streaming: ver = await bot._wait_event(ver, deadline - time.time())
+            else:
+                await self.sync([o.cl_ord_id], max_age_s=0.0)
+                if not o.done: await asyncio.sleep(min(0.2, max(0.0, deadline - time.time())))
+        if not o.done: await self._query(o.cl_ord_id)
+        return o
+
+    async def sync(self, cls: Optional[Iterable[str]] = None, max_age_s: Optional[float] = None):
+        """REST refresh of open orders not updated for ``max_age_s`` (default ``poll_s``) when the private stream is not available."""
+        if self.streaming: return
+        age = self.poll_s if max_age_s is None else max_age_s; now = time.time()
+        for cl in list(cls if cls is not None else self.orders):
+            o = self.orders.get(cl)
+            if o is not None and not o.done and now - max(o.seen, o.polled) >= age:
+                o.polled = now; await self._query(cl)
+
+    async def _resolve(self, o: TrackedOrder) -> bool:
+        """
+        Settle a placement of unknown outcome by clOrdId, as
+        ``TradeAPIMixin.areconcile``: an order the exchange knows is kept;
+        one it does not is cancelled by clOrdId (in case it still lands) and
+        marked ``rejected`` -> ``False``.  If the query fails the order stays
+        open for the caller's ``sync``/``cancel`` to settle.
+        """
+        bot = self.bot
+        d = await self._query(o.cl_ord_id)
+        if d is None or d: return True
+        try:
+            await bot.client.acancel_order(instId=bot.cfg.inst_id, clOrdId=o.cl_ord_id)
+        except Exception:
+            pass
+        if await self._query(o.cl_ord_id) == {}: o.state = "rejected"
+        return not o.done or o.filled > 0
+
+    async def _query(self, cl: str) -> Optional[dict]:
+        """Order details by clOrdId (``{}`` if the exchange does not know it); ``None`` if the query failed."""
+        bot = self.bot
+        try:
+            d = await bot.client.acall("query", bot.client.get_order, bot.cfg.inst_id, inst=bot.cfg.inst_id, clOrdId=cl)
+        except Exception as e:
+            print("[ORD] query error:", cl, e); return None
+        if d:
+            self.on_order(d); LATENCY.on_order(d)   # pushes are stamped by the bot; REST answers only here
+        return d or {}
@@ -2,6 +2,8 @@ import os, asyncio, yaml, time
 from dataclasses import dataclass
 from .live_bot import Bot, RunConfig
 from ..utils.global_risk import GlobalRiskGuard
+from ..utils.portfolio_guard import PortfolioGuard, PortfolioLimits
+from ..utils.daily_pnl import get_daily_pnl
 from ..utils.notifier import notify
 
 @dataclass
@@ -11,37 +13,62 @@ class PortfolioItem:
     risk_share: float = 1.0
     exec_mode: str = "autoexec"
 
+def load_items(cfg_path="portfolio.yaml"):
+    if not os.path.exists(cfg_path):
+        # default BTC/ETH/SOL
+        return [PortfolioItem("BTC-USDT-SWAP", "5m", 1.0), PortfolioItem("ETH-USDT-SWAP","5m",1.0), PortfolioItem("SOL-USDT-SWAP","5m",1.0)]
+    cfg=yaml.safe_load(open(cfg_path,"r",encoding="utf-8")) or {}
+    arr=[]
+    for it in cfg.get("instruments", []):
+        arr.append(PortfolioItem(inst_id=it["inst"], tf=it.get("tf","5m"), risk_share=float(it.get("risk_share",1.0)), exec_mode=it.get("exec_mode","autoexec")))
+    return arr
+
 class PortfolioOrchestrator:
-    def __init__(self, client, cfg_path="portfolio.yaml", log_dir="live_output", risk_pct=0.007, dd_limit=0.08):
-        self.client=client; self.cfg_path=cfg_path; self.log_dir=log_dir; self.risk_pct=risk_pct
-        self.dd_limit=dd_limit; self.guard=GlobalRiskGuard(log_dir, dd_limit)
+    def __init__(self, client, cfg_path="portfolio.yaml", log_dir="live_output", risk_pct=0.007, dd_limit=0.08, live=True, watch_s=10.0):
+        self.client=client; self.cfg_path=cfg_path; self.log_dir=log_dir; self.risk_pct=risk_pct; self.live=live
+        self.dd_limit=dd_limit; self.guard=GlobalRiskGuard(log_dir, dd_limit, pnl=get_daily_pnl(log_dir))
+        self.pguard=PortfolioGuard(PortfolioLimits()); self.watch_s=watch_s; self.halt_reason=None
         self.items=self._load_cfg()
+        self.bots=[]  # filled by build_bots(); run() builds them if the caller did not
 
     def _load_cfg(self):
-        if not os.path.exists(self.cfg_path):
-            # default BTC/ETH/SOL
-            return [PortfolioItem("BTC-USDT-SWAP", "5m", 1.0), PortfolioItem("ETH-USDT-SWAP","5m",1.0), PortfolioItem("SOL-USDT-SWAP","5m",1.0)]
-        cfg=yaml.safe_load(open(self.cfg_path,"r",encoding="utf-8")) or {}
-        arr=[]
-        for it in cfg.get("instruments", []):
-            arr.append(PortfolioItem(inst_id=it["inst"], tf=it.get("tf","5m"), risk_share=float(it.get("risk_share",1.0)), exec_mode=it.get("exec_mode","autoexec")))
-        return arr
+        return load_items(self.cfg_path)
 
-    async def run(self):
-        tasks=[]
+    def build_bots(self, **cfg_kw):
+        """One Bot per item with its share of ``risk_pct``; extra ``cfg_kw`` go to every RunConfig."""
         total_share = sum(max(0.0, it.risk_share) for it in self.items) or 1.0
+        self.bots=[]
         for it in self.items:
             rp = self.risk_pct * (it.risk_share / total_share)
-            bot_cfg = RunConfig(inst_id=it.inst_id, tf=it.tf, live=True, risk_pct=rp)
+            bot_cfg = RunConfig(inst_id=it.inst_id, tf=it.tf, live=self.live, risk_pct=rp, **cfg_kw)
             bot = Bot(bot_cfg, self.client)
             bot.cfg.exec_mode = it.exec_mode
-            tasks.append(asyncio.create_task(bot.run()))
-        # watchdog
+            self.bots.append(bot)
+        return self.bots
+
+    async def run(self):
+        """Run every bot until one fails or the portfolio is halted; returns the halt reason."""
+        if not self.bots: self.build_bots()
+        tasks=[asyncio.create_task(bot.run()) for bot in self.bots]
+        self.halt_reason=None
+        # watchdog: the drawdown guard trips here, or another shard / `qi halt` set the shared halt flag
         async def watchdog():
             while True:
-                if self.guard.check():
-                    notify("portfolio_paused", {"reason":"dd_limit", "limit": self.dd_limit})
-                    # in this simplified version, we just print; in practice, you'd stop tasks
-                await asyncio.sleep(10)
-        tasks.append(asyncio.create_task(watchdog()))
-        await asyncio.gather(*tasks)
+                reason=self.pguard.halted()
+                if reason is None and self.guard.check():
+                    reason="dd_limit"; self.pguard.halt(reason)
+                    notify("portfolio_paused", {"reason":reason, "limit": self.dd_limit})
+                if reason is not None:
+                    self.halt_reason=reason
+                    print(f"[PORTFOLIO] halted ({reason}), stopping {len(tasks)} bots")
+                    for t in tasks: t.cancel()
+                    return
+                await asyncio.sleep(self.watch_s)
+        wd=asyncio.create_task(watchdog())
+        try:
+            await asyncio.gather(*tasks)
+        except asyncio.CancelledError:
+            if self.halt_reason is None: raise
+        finally:
+            wd.cancel()
+        return self.halt_reason
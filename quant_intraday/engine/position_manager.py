@@ -0,0 +1,168 @@
+import time, asyncio
+import numpy as np
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from ..utils.talib_fallback import ATR
+
+@dataclass
+class ManagedPosition:
+    """One live entry whose protective stop is trailed by the manager."""
+    pos_side: str            # "long" | "short"
+    entry: float
+    sl: float                # current stop (trailed)
+    risk: float              # |entry - initial stop|, the 1R unit
+    algo_id: Optional[str] = None
+    ord_ids: List[str] = field(default_factory=list)
+    opened: float = field(default_factory=time.time)
+    sz: str = ""
+    # native trailing: callback distance handed to an exchange move_order_stop
+    callback: float = 0.0
+    trail_algo_id: Optional[str] = None
+
+def _num(sz) -> float:
+    try: return float(sz or 0)
+    except (TypeError, ValueError): return 0.0
+
+class PositionManager:
+    """
+    Per-bot owner of open positions and their trailing stops.
+    - ``open`` registers an entry (with the algoId of its stop, if any); a
+      further entry on the same side is merged into that position: size
+      summed, entry size-weighted, the tighter of the two stops kept and the
+      existing stop algo amended to it (a ``closeFraction=1`` stop already
+      covers the added size, so the caller places no second one).
+    - ``on_bar`` runs once per closed bar: ATR is computed once from the
+      candle buffer and every position's stop is re-evaluated against it;
+      all resulting amendments are sent concurrently through the client's
+      request scheduler (``algo`` class; positions poll as ``account``).
+    - With ``cfg.native_trailing`` the breakeven trigger instead hands the
+      position to an OKX ``move_order_stop`` (callback = trailing_atr_mult×ATR
+      at that moment); the exchange trails from then on and the manager stops
+      touching it.
+    - Positions retire when the private ``positions`` channel reports a flat
+      position (``on_private``); without private WS the manager checks the
+      REST position once per bar instead.  Once no side is open the
+      instrument is released in the shared ``PortfolioGuard`` (it stops
+      counting towards ``max_concurrent_assets``).
+    """
+    def __init__(self, bot, atr_period: int = 14):
+        self.bot = bot; self.atr_period = atr_period
+        self.positions: Dict[str, ManagedPosition] = {}
+        self.atr = float("nan")
+        self._task: Optional[asyncio.Task] = None
+
+    def open(self, pos_side: str, entry: float, sl: float, algo_id: Optional[str] = None, ord_ids=None, sz: str = ""):
+        p = self.positions.get(pos_side)
+        if p is None:
+            self.positions[pos_side] = ManagedPosition(pos_side, float(entry), float(sl), abs(float(entry) - float(sl)), algo_id, list(ord_ids or []), sz=str(sz))
+            return
+        n0, n1 = _num(p.sz), _num(sz); n = n0 + n1
+        if n > 0:
+            p.entry = (p.entry * n0 + float(entry) * n1) / n
+            p.risk = (p.risk * n0 + abs(float(entry) - float(sl)) * n1) / n
+        p.sz = f"{n:g}"; p.ord_ids += list(ord_ids or [])
+        if p.algo_id is None: p.algo_id = algo_id
+        if p.trail_algo_id:
+            # the exchange trailer was sized for the old position: hand over again next bar
+            self._cancel_trailer(p.trail_algo_id); p.trail_algo_id = None; p.callback = 0.0
+        new_sl = max(p.sl, float(sl)) if pos_side == "long" else min(p.sl, float(sl))
+        if new_sl != p.sl:
+            p.sl = new_sl
+            if p.algo_id: asyncio.get_running_loop().create_task(self._amend([p]))
+
+    def _cancel_trailer(self, algo_id: str):
+        cli = self.bot.client
+        try: asyncio.get_running_loop().create_task(cli.acall("algo", cli.cancel_algo, self.bot.cfg.inst_id, algo_id, prio="cancel"))
+        except Exception: pass
+
+    def retire(self, pos_side: str):
+        p = self.positions.pop(pos_side, None)
+        if p and p.trail_algo_id:
+            # the exchange trailer outlives a position closed by TP/SL: cancel it
+            self._cancel_trailer(p.trail_algo_id)
+        if not self.positions:
+            try: self.bot._pguard.close_position(self.bot.cfg.inst_id)
+            except Exception as e: print("[POSM] portfolio release error:", e)
+
+    def on_private(self, channel: str, d: dict):
+        if channel == "positions" and d.get("instId") == self.bot.cfg.inst_id:
+            try: flat = float(d.get("pos") or 0) == 0.0
+            except (TypeError, ValueError): return
+            if flat: self.retire(str(d.get("posSide", "")))
+
+    # --- per bar ---
+    def _compute_atr(self) -> float:
+        buf = self.bot.buffer.buf
+        n = len(buf) - 1  # last candle is the bar that just opened
+        if n <= self.atr_period: return float("nan")
+        k = max(0, n - 4 * self.atr_period)
+        bars = [buf[i] for i in range(k, n)]
+        h = np.fromiter((b.h for b in bars), float); l = np.fromiter((b.l for b in bars), float); c = np.fromiter((b.c for b in bars), float)
+        return float(ATR(h, l, c, self.atr_period)[-1])
+
+    def trail_targets(self, close: float) -> List[ManagedPosition]:
+        """Positions whose stop should move at ``close`` (stops updated in place)."""
+        atr = self.atr; cfg = self.bot.cfg; moved = []
+        if not (atr == atr) or not (cfg.trailing_be_rr or cfg.trailing_atr_mult): return moved
+        for p in self.positions.values():
+            if p.callback: continue  # already trailed by the exchange
+            if not (p.algo_id or cfg.native_trailing): continue  # attached TP/SL: nothing to amend
+            progressed = (close - p.entry) if p.pos_side == "long" else (p.entry - close)
+            if progressed < cfg.trailing_be_rr * p.risk: continue
+            if cfg.native_trailing:
+                p.callback = cfg.trailing_atr_mult * atr; moved.append(p); continue
+            if p.pos_side == "long":
+                new_sl = close - cfg.trailing_atr_mult * atr
+                if new_sl <= p.sl: continue
+            else:
+                new_sl = close + cfg.trailing_atr_mult * atr
+                if new_sl >= p.sl: continue
+            p.sl = new_sl; moved.append(p)
+        return moved
+
+    def on_bar(self):
+        """Called by the candle feed when a new bar opens."""
+        if not self.positions or (self._task and not self._task.done()): return
+        self._task = asyncio.get_running_loop().create_task(self._run_bar())
+
+    async def _run_bar(self):
+        bot = self.bot
+        if not bot.cfg.use_private:
+            try:
+                rows = await bot.client.acall("account", bot.client.get_positions, bot.cfg.inst_id)
+                live = {str(d.get("posSide")) for d in rows if float(d.get("pos") or 0) != 0}
+                for ps in list(self.positions):
+                    if ps not in live: self.retire(ps)
+            except Exception as e:
+                print("[POSM] positions poll error:", e)
+        if not self.positions or len(bot.buffer.buf) < 2: return
+        self.atr = self._compute_atr()
+        moved = self.trail_targets(float(bot.buffer.buf[-2].c))
+        if moved: await self._amend(moved)
+
+    async def _amend(self, moved: List[ManagedPosition]):
+        await asyncio.gather(*(self._native(p) if p.callback else self._amend_one(p) for p in moved))
+
+    async def _amend_one(self, p: ManagedPosition):
+        bot = self.bot; sl_trigger = f"{p.sl:.4f}"
+        try:
+            if not p.algo_id: raise RuntimeError("no stop algoId")
+            await bot.client.acall("algo", bot.client.amend_algo, prio="amend", instId=bot.cfg.inst_id, algoId=p.algo_id,
+                                   newSlTriggerPx=sl_trigger, newSlOrdPx="-1")
+            bot._trail_w.write(f"{int(time.time()*1000)},AMEND_OK,{sl_trigger}\n")
+        except Exception as e:
+            bot._trail_w.write(f"{int(time.time()*1000)},AMEND_FAIL,{sl_trigger}\n")
+            print("[TRAIL] amend error:", e)
+
+    async def _native(self, p: ManagedPosition):
+        bot = self.bot; cb = f"{p.callback:.4f}"
+        try:
+            r = await bot.client.acall("algo", bot.client.order_algo, prio="reduce", instId=bot.cfg.inst_id, tdMode=bot.cfg.td_mode,
+                                       side=("sell" if p.pos_side == "long" else "buy"), posSide=p.pos_side, ordType="move_order_stop",
+                                       sz=p.sz, reduceOnly=True, callbackSpread=cb)
+            p.trail_algo_id = r.get("algoId")
+            bot._trail_w.write(f"{int(time.time()*1000)},NATIVE_TRAIL,{cb}\n")
+        except Exception as e:
+            p.callback = 0.0  # retry on the next bar
+            bot._trail_w.write(f"{int(time.time()*1000)},NATIVE_TRAIL_FAIL,{cb}\n")
+            print("[TRAIL] move_order_stop error:", e)
@@ -7,40 +7,58 @@ class POVExecutor:
       min_child: min contracts per child
       adverse_ticks: reprice if mid moves adverse by this many ticks
       queue_max: if best-queue size > queue_max, consider crossing 1 tick on last cycles
-      cycle_s: sleep between cycles
-    Note: requires bot._books (books5) and bot._costs for tick_size.
+      cycle_s: max wait between cycles; the next child goes out earlier when the
+               book moves adverse by adverse_ticks or the last child is filled
+      max_duration_s: give up (and cancel the working child) after this long
+    Note: requires bot._book (parsed books5 snapshot) and bot._costs for tick_size;
+    waits use ``bot._wait_event`` (book / own-order updates).  Live children go
+    through ``bot._orders``: one child works at a time, the next cycle cancels a
+    leftover child and sizes from the filled quantity, not from placements.
     """
-    def __init__(self, pov_rate: float=0.1, min_child:int=1, adverse_ticks:int=2, queue_max: float=5e3, cycle_s:int=2):
+    def __init__(self, pov_rate: float=0.1, min_child:int=1, adverse_ticks:int=2, queue_max: float=5e3, cycle_s:int=2,
+                 max_duration_s: float=600.0):
         self.pov_rate=pov_rate; self.min_child=min_child
         self.adverse_ticks=adverse_ticks; self.queue_max=queue_max; self.cycle_s=cycle_s
+        self.max_duration_s=max_duration_s
+
+    async def _pace(self, bot, side, ticks, ref_mid, child=None):
+        """Wait up to ``cycle_s``; return early on an adverse book move or a finished child."""
+        deadline = time.time() + self.cycle_s; ver = bot._wake.version
+        while True:
+            ver = await bot._wait_event(ver, deadline - time.time())
+            if time.time() >= deadline: return
+            if child is not None and child.done: return
+            b = bot._book
+            if b and ref_mid is not None:
+                mv = (b.mid - ref_mid) / ticks if side == "buy" else (ref_mid - b.mid) / ticks
+                if mv >= self.adverse_ticks: return
 
     def _best(self, bot):
-        b=bot._books
+        b=bot._book
         if not b: return None
-        bids=b.get("bids",[]); asks=b.get("asks",[])
-        best_bid = (float(bids[0][0]), float(bids[0][1])) if bids else (None, None)
-        best_ask = (float(asks[0][0]), float(asks[0][1])) if asks else (None, None)
-        mid = None
-        if best_bid[0] and best_ask[0]:
-            mid=(best_bid[0]+best_ask[0])/2.0
-        return best_bid, best_ask, mid
+        return (b.best_bid, b.bid_q), (b.best_ask, b.ask_q), b.mid
 
     async def execute(self, bot, side:str, pos_side:str, total_sz:int, px_hint:float):
-        remain = int(total_sz); ids=[]
-        last_mid=None; ticks=bot._costs.tick_size
-        while remain>0:
+        total = int(total_sz); remain = total; ids=[]; cls=[]; child_o=None
+        last_mid=None; ticks=bot._costs.tick_size; t_end=time.time()+self.max_duration_s
+        while remain>0 and time.time()<t_end:
+            if child_o is not None:
+                # live: size from what is actually filled, not from what was placed
+                await bot._orders.sync([child_o.cl_ord_id])
+                remain = int(round(total - bot._orders.filled(cls)))
+                if remain<=0: break
             best=self._best(bot)
             if not best:
-                await asyncio.sleep(self.cycle_s); continue
+                await bot._wait_event(bot._wake.version, self.cycle_s); continue
             (bid_px,bid_q),(ask_px,ask_q),mid = best
             if last_mid is None: last_mid=mid
             # decide px: try to be maker; if queue too large near best, allow 1-tick cross on last chunk
             maker_px = bid_px if side=="buy" else ask_px
             cross_px = ask_px if side=="buy" else bid_px
-            child = max(self.min_child, int(remain*self.pov_rate))
             # adverse move?
             adverse = ( (mid - last_mid)/ticks ) if side=="buy" else ( (last_mid - mid)/ticks )
             do_cross = False
+            child = min(remain, max(self.min_child, int(remain*self.pov_rate)))
             if abs(adverse) >= self.adverse_ticks:
                 do_cross = True
             if (ask_q if side=="buy" else bid_q) > self.queue_max and remain <= child*2:
@@ -53,33 +71,39 @@ class POVExecutor:
             else:
                 place_px = maker_px
             place_px = bot._round_px(place_px)
-            clid=f"pov_{int(time.time())}_{remain}"
+            if child_o is not None and not child_o.done:
+                if abs(child_o.px - place_px) < ticks/2:
+                    # still at the right price: keep its queue position
+                    await self._pace(bot, side, ticks, mid, child_o); continue
+                # repricing: the working child is superseded
+                await bot._orders.cancel(child_o)
+                remain = int(round(total - bot._orders.filled(cls)))
+                if remain<=0: break
+                child = min(remain, max(self.min_child, int(remain*self.pov_rate)))
+            clid=f"pov{int(time.time())}r{remain}n{len(cls)}"
             if not bot.cfg.live:
                 print(f"[DRY] POV place sz={child} px={place_px:.6f} maker={not do_cross}")
-                with open(os.path.join(bot._log_dir,"execlog.csv"),"a",encoding="utf-8") as f:
-                    f.write(f"{int(time.time()*1000)},POV_PLACE,{bot.cfg.inst_id},{side},{pos_side},{child},{place_px:.6f}\n")
-                ids.append(clid); remain-=child; last_mid=mid; await asyncio.sleep(self.cycle_s); continue
+                bot._exec_w.write(f"{int(time.time()*1000)},POV_PLACE,{bot.cfg.inst_id},{side},{pos_side},{child},{place_px:.6f}\n")
+                ids.append(clid); remain-=child; last_mid=mid; await self._pace(bot, side, ticks, mid); continue
 
             # queue tracking (heuristic)
             try:
                 from .queue_tracker import QueueTracker
                 if not hasattr(bot, "_qtrk"): bot._qtrk = QueueTracker()
-                bids=bot._books.get("bids", []) if bot._books else []
-                asks=bot._books.get("asks", []) if bot._books else []
-                best = bids[0] if side=="buy" and bids else (asks[0] if side!="buy" and asks else [place_px,0])
-                bot._qtrk.on_new_order(side, float(child), float(best[0]), float(best[1]))
+                bot._qtrk.on_new_order(side, float(child), float(bid_px if side=="buy" else ask_px), float(bid_q if side=="buy" else ask_q))
             except Exception:
                 pass
 
             try:
-                resp = bot.client.place_order(instId=bot.cfg.inst_id, tdMode=bot.cfg.td_mode, side=side, posSide=pos_side,
-                                              ordType="limit", sz=str(child), px=f"{place_px:.6f}", reduceOnly=False, clOrdId=clid)
-                ord_id = resp.get("ordId", resp); ids.append(ord_id); remain-=child
-                with open(os.path.join(bot._log_dir,"execlog.csv"),"a",encoding="utf-8") as f:
-                    f.write(f"{int(time.time()*1000)},{'POV_CROSS' if do_cross else 'POV_MAKE'},{bot.cfg.inst_id},{side},{pos_side},{child},{place_px:.6f}\n")
+                child_o = await bot._orders.place(instId=bot.cfg.inst_id, tdMode=bot.cfg.td_mode, side=side, posSide=pos_side,
+                                                  ordType="limit", sz=str(child), px=f"{place_px:.6f}", reduceOnly=False, clOrdId=clid, **bot._attach)
+                cls.append(clid); ids.append(child_o.ord_id or clid)
+                bot._exec_w.write(f"{int(time.time()*1000)},{'POV_CROSS' if do_cross else 'POV_MAKE'},{bot.cfg.inst_id},{side},{pos_side},{child},{place_px:.6f}\n")
             except Exception as e:
-                with open(os.path.join(bot._log_dir,"execlog.csv"),"a",encoding="utf-8") as f:
-                    f.write(f"{int(time.time()*1000)},POV_PLACE_FAIL,{bot.cfg.inst_id},{side},{pos_side},{child},{place_px:.6f}\n")
+                child_o = None
+                bot._exec_w.write(f"{int(time.time()*1000)},POV_PLACE_FAIL,{bot.cfg.inst_id},{side},{pos_side},{child},{place_px:.6f}\n")
             last_mid=mid
-            await asyncio.sleep(self.cycle_s)
+            await self._pace(bot, side, ticks, mid, child_o)
+        if child_o is not None and not child_o.done and time.time()>=t_end:
+            await bot._orders.cancel(child_o)
         return ids
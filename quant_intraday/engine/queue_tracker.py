@@ -16,12 +16,17 @@ class QueueTracker:
     def on_book(self, bids, asks, tick:float):
         if self.side is None: return 0.0
         # pick best level by side
-        if self.side=="buy":
-            if not bids: return 0.0
-            px, q = float(bids[0][0]), float(bids[0][1])
-        else:
-            if not asks: return 0.0
-            px, q = float(asks[0][0]), float(asks[0][1])
+        lv = bids if self.side=="buy" else asks
+        if not lv: return 0.0
+        return self._on_best(float(lv[0][0]), float(lv[0][1]), tick)
+
+    def on_snapshot(self, book, tick:float):
+        """Same as ``on_book`` but reads a parsed ``BookSnapshot`` (no re-parsing)."""
+        if self.side is None or book is None: return 0.0
+        if self.side=="buy": return self._on_best(book.best_bid, book.bid_q, tick)
+        return self._on_best(book.best_ask, book.ask_q, tick)
+
+    def _on_best(self, px:float, q:float, tick:float):
         # if best price moved, we assume our order got cancelled/reposted at new best => reset
         if self.best_px is None or abs(px - self.best_px) >= tick/2.0:
             self.best_px=px; self.best_q=q; self.last_ts=time.time()
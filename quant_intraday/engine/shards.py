@@ -0,0 +1,138 @@
+import os, json, time, signal, multiprocessing as mp
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional
+from .portfolio import PortfolioItem
+from ..utils.global_risk import GlobalRiskGuard
+from ..utils.portfolio_guard import PortfolioGuard, PortfolioLimits
+from ..utils.notifier import notify
+
+HALT_EXIT = 3   # shard exit code: halted on purpose, do not restart
+
+def load_costs(log_dir: str, insts: List[str]) -> Dict[str, float]:
+    """Per-instrument CPU cost: strategy-loop p50 ms from ``stages_<inst>.json``
+    minus the ``equity`` stage (a REST wait, not CPU).  Instruments without
+    measurements get the median of the measured ones (1.0 if none)."""
+    got = {}
+    for inst in insts:
+        try:
+            with open(os.path.join(log_dir, f"stages_{inst.replace('/','-')}.json"), "r", encoding="utf-8") as f:
+                st = json.load(f)["stages"]
+            got[inst] = max(0.01, float(st["total"]["p50_ms"]) - float(st.get("equity", {}).get("p50_ms", 0.0)))
+        except (OSError, ValueError, KeyError, TypeError):
+            continue
+    v = sorted(got.values()); dflt = v[len(v) // 2] if v else 1.0
+    return {i: got.get(i, dflt) for i in insts}
+
+def plan_shards(costs: Dict[str, float], n: int) -> List[List[str]]:
+    """Longest-processing-time-first: heaviest instrument to the lightest shard."""
+    n = max(1, min(n, len(costs))); load = [0.0] * n; out: List[List[str]] = [[] for _ in range(n)]
+    for inst in sorted(costs, key=lambda k: (-costs[k], k)):
+        i = min(range(n), key=lambda j: (load[j], j))
+        out[i].append(inst); load[i] += costs[inst]
+    return out
+
+def backoff_s(fails: int, base: float = 2.0, cap: float = 120.0) -> float:
+    return min(cap, base * (2 ** max(0, fails - 1)))
+
+def _shard_main(idx: int, items: List[dict], risk_pct: float, dd_limit: float, log_dir: str, live: bool, rate_share: float):
+    """Child process: one PortfolioOrchestrator over this shard's items."""
+    import asyncio
+    os.environ["QI_RATE_SHARE"] = str(rate_share)
+    from .exchange.okx_client import OKXClient
+    from .portfolio import PortfolioOrchestrator
+    cli = OKXClient(os.getenv("OKX_API_KEY"), os.getenv("OKX_API_SECRET"), os.getenv("OKX_API_PASSPHRASE"), os.getenv("OKX_ACCOUNT","trade"))
+    orch = PortfolioOrchestrator(cli, cfg_path="", log_dir=log_dir, risk_pct=risk_pct, dd_limit=dd_limit, live=live)
+    orch.items = [PortfolioItem(**d) for d in items]
+    print(f"[SHARD {idx}] pid={os.getpid()} {[it.inst_id for it in orch.items]}")
+    reason = asyncio.run(orch.run())
+    raise SystemExit(HALT_EXIT if reason else 0)
+
+@dataclass
+class Shard:
+    idx: int
+    items: List[PortfolioItem]
+    proc: Optional[mp.Process] = None
+    fails: int = 0
+    started: float = 0.0
+    next_start: float = 0.0
+    restarts: int = 0
+    cost: float = 0.0
+
+class ShardSupervisor:
+    """
+    Runs a portfolio as ``workers`` processes, each an orchestrator over a
+    subset of instruments, balanced by measured strategy-loop cost.
+    - Risk: each shard gets ``risk_pct`` scaled by its share of the total
+      ``risk_share``, so per-instrument risk matches the single-process run;
+      daily loss / concurrency / equity / halt state is the shared SQLite
+      ``PortfolioGuard``; account-wide rate buckets are split across shards.
+    - Failed shards restart with exponential backoff (reset after ``stable_s``
+      of uptime).
+    - The global drawdown guard (or ``qi halt``) sets the shared halt flag:
+      shards stop their bots and exit with ``HALT_EXIT``; stragglers are
+      terminated after ``grace_s``, and nothing is restarted.
+    """
+    def __init__(self, items: List[PortfolioItem], workers: int, log_dir: str = "live_output", risk_pct: float = 0.007,
+                 dd_limit: float = 0.08, live: bool = True, stable_s: float = 300.0, grace_s: float = 20.0):
+        self.log_dir = log_dir; self.risk_pct = risk_pct; self.dd_limit = dd_limit; self.live = live
+        self.stable_s = stable_s; self.grace_s = grace_s
+        self.guard = GlobalRiskGuard(log_dir, dd_limit); self.pguard = PortfolioGuard(PortfolioLimits())
+        by_inst = {it.inst_id: it for it in items}
+        costs = load_costs(log_dir, list(by_inst))
+        self.shards = [Shard(i, [by_inst[k] for k in ks], cost=sum(costs[k] for k in ks)) for i, ks in enumerate(plan_shards(costs, workers))]
+        self._total_share = sum(max(0.0, it.risk_share) for it in items) or 1.0
+        self._ctx = mp.get_context("spawn"); self._stop = False; self.halt_reason: Optional[str] = None
+
+    def _start(self, s: Shard):
+        share = sum(max(0.0, it.risk_share) for it in s.items) / self._total_share
+        args = (s.idx, [asdict(it) for it in s.items], self.risk_pct * share, self.dd_limit, self.log_dir, self.live, 1.0 / len(self.shards))
+        s.proc = self._ctx.Process(target=_shard_main, args=args, name=f"qi-shard-{s.idx}", daemon=False)
+        s.proc.start(); s.started = time.time()
+
+    def _stop_all(self):
+        deadline = time.time() + self.grace_s
+        for s in self.shards:
+            if s.proc is not None and s.proc.is_alive():
+                s.proc.join(max(0.0, deadline - time.time()))
+                if s.proc.is_alive(): s.proc.terminate(); s.proc.join(5)
+
+    def halt(self, reason: str):
+        self.halt_reason = reason; self.pguard.halt(reason)
+        notify("portfolio_paused", {"reason": reason, "limit": self.dd_limit, "shards": len(self.shards)})
+        print(f"[SHARDS] halt ({reason}), stopping {len(self.shards)} shards")
+        self._stop_all()
+
+    def status(self) -> List[dict]:
+        return [{"shard": s.idx, "pid": s.proc.pid if s.proc else None, "alive": bool(s.proc and s.proc.is_alive()),
+                 "insts": [it.inst_id for it in s.items], "cost_ms": round(s.cost, 3), "restarts": s.restarts} for s in self.shards]
+
+    def run(self, poll_s: float = 1.0) -> Optional[str]:
+        if self.pguard.halted():
+            print("[SHARDS] halted today:", self.pguard.halted(), "(qi halt --resume to clear)"); return self.pguard.halted()
+        def _sig(*_): self._stop = True
+        for sg in (signal.SIGINT, signal.SIGTERM): signal.signal(sg, _sig)
+        for s in self.shards: self._start(s)
+        print("[SHARDS]", json.dumps(self.status()))
+        while not self._stop:
+            reason = self.pguard.halted()
+            if reason is None and self.guard.check(): reason = "dd_limit"
+            if reason is not None:
+                self.halt(reason); return reason
+            now = time.time()
+            for s in self.shards:
+                if s.proc is None:
+                    if now >= s.next_start: self._start(s); s.restarts += 1
+                    continue
+                if s.proc.is_alive(): continue
+                code = s.proc.exitcode; s.proc = None
+                if code == HALT_EXIT:
+                    self.halt(self.pguard.halted() or "shard_halt"); return self.halt_reason
+                s.fails = 1 if now - s.started >= self.stable_s else s.fails + 1
+                s.next_start = now + backoff_s(s.fails)
+                print(f"[SHARDS] shard {s.idx} exited ({code}), restart in {s.next_start - now:.0f}s")
+                notify("shard_restart", {"shard": s.idx, "exitcode": code, "fails": s.fails})
+            time.sleep(poll_s)
+        for s in self.shards:
+            if s.proc is not None and s.proc.is_alive(): s.proc.terminate()
+        self._stop_all()
+        return None
@@ -4,7 +4,10 @@ class SlicerExec:
     """Very simple participation-style slicer.
     - Split total size into <= max_slices slices.
     - Each slice places a limit at book-aware price hint.
-    - Wait slice_timeout_s; then move on to next slice (best-effort, no fill check).
+    - Wait up to slice_timeout_s (returning early once the slice fills); live
+      slices go through ``bot._orders``: an unfilled slice is canceled before
+      the next one, which is sized from the true unfilled remainder.  The last
+      slice is left working.
     """
     def __init__(self, prate: float = 0.1, max_slices: int = 8, slice_timeout_s: int = 3):
         self.prate=prate; self.max_slices=max_slices; self.slice_timeout_s=slice_timeout_s
@@ -13,26 +16,34 @@ class SlicerExec:
         """bot: reference to live Bot (has client, _book_limit_px, cfg)"""
         if total_sz <= 0:
             return []
-        sz_left = int(total_sz)
-        order_ids = []
+        total = int(total_sz); sz_left = total
+        order_ids = []; cls = []; o = None
         slices = max(1, min(self.max_slices, sz_left))
         per = max(1, sz_left // slices)
-        # naive loop
         for i in range(slices):
+            if o is not None:
+                if not o.done: await bot._orders.cancel(o)
+                sz_left = int(round(total - bot._orders.filled(cls)))
             if sz_left <= 0: break
-            cur_sz = per if i < slices-1 else sz_left
+            cur_sz = min(per, sz_left) if i < slices-1 else sz_left
             # adjust px using current book
             px = bot._book_limit_px("buy" if pos_side=="long" else "sell", px_hint)
-            clid=f"bot_slice_{int(time.time())}_{i}"
+            clid=f"slc{int(time.time())}n{i}"
             if not bot.cfg.live:
                 print(f"[DRY] slice {i+1}/{slices} {side}/{pos_side} sz={cur_sz} px={px}")
-            else:
-                try:
-                    resp=bot.client.place_order(instId=bot.cfg.inst_id, tdMode=bot.cfg.td_mode, side=side, posSide=pos_side,
-                                                ordType="limit", sz=str(cur_sz), px=f"{px:.2f}", reduceOnly=False, clOrdId=clid)
-                    order_ids.append(resp.get("ordId", resp))
-                except Exception as e:
-                    print("[SLICER] place error:", e)
-            await asyncio.sleep(self.slice_timeout_s)
-            sz_left -= cur_sz
+                await asyncio.sleep(self.slice_timeout_s)
+                sz_left -= cur_sz
+                continue
+            try:
+                o = await bot._orders.place(instId=bot.cfg.inst_id, tdMode=bot.cfg.td_mode, side=side, posSide=pos_side,
+                                            ordType="limit", sz=str(cur_sz), px=f"{px:.2f}", reduceOnly=False, clOrdId=clid, **bot._attach)
+                cls.append(clid); order_ids.append(o.ord_id or clid)
+            except Exception as e:
+                print("[SLICER] place error:", e); o = None
+                await asyncio.sleep(self.slice_timeout_s); continue
+            if i == slices-1: break
+            t0 = time.time(); ver = bot._wake.version
+            while not o.done and time.time() - t0 < self.slice_timeout_s:
+                ver = await bot._wait_event(ver, self.slice_timeout_s - (time.time() - t0))
+                await bot._orders.sync([clid])
         return order_ids
@@ -1,13 +1,14 @@
 import os, json, time, base64, hashlib, hmac, httpx
+from .trade_api import TradeAPIMixin
 
-OKX_REST = "https://www.okx.com"
+OKX_REST = os.getenv("OKX_REST_BASE", "https://www.okx.com")
 
 def okx_sign(ts: str, method: str, path: str, body: str, secret: str) -> str:
     msg = f"{ts}{method}{path}{body}".encode()
     mac = hmac.new(secret.encode(), msg, hashlib.sha256).digest()
     return base64.b64encode(mac).decode()
 
-class OKXClient:
+class OKXClient(TradeAPIMixin):
     def __init__(self, key, secret, passphrase, account="trade", timeout=10, simulated: bool | None = None):
         self.key, self.secret, self.passphrase = key, secret, passphrase
         self.account = account
@@ -33,7 +34,7 @@ class OKXClient:
         r = self.rest.get(path, headers=self._headers("GET", path, ""), params=params or {})
         r.raise_for_status(); return r.json()
 
-    def post(self, path, payload: dict):
+    def post(self, path, payload):
         body = json.dumps(payload)
         r = self.rest.post(path, headers=self._headers("POST", path, body), content=body)
         r.raise_for_status(); return r.json()
@@ -57,11 +58,6 @@ class OKXClient:
         if j.get("code") != "0": raise RuntimeError(f"place_order error: {j}")
         return j["data"][0]
 
-    def cancel_order(self, **kwargs):
-        j = self.post("/api/v5/trade/cancel-order", kwargs)
-        if j.get("code") != "0": raise RuntimeError(f"cancel_order error: {j}")
-        return j["data"][0]
-
     # low-level (used by attribution/replay)
     def _get(self, path, params=None): return self.get(path, params)
     def _post(self, path, payload): return self.post(path, payload)
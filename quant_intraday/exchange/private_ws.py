@@ -1,8 +1,8 @@
-import os, json, hmac, hashlib, base64, time, asyncio, websockets
+import os, json, hmac, hashlib, base64, time, asyncio, itertools, websockets
 from dataclasses import dataclass, field
-from typing import Dict, Any, Optional, Callable
+from typing import Dict, Any, Optional, Callable, List
 
-OKX_WSS_PRIVATE = "wss://ws.okx.com:8443/ws/v5/private"
+OKX_WSS_PRIVATE = os.getenv("OKX_WSS_PRIVATE", "wss://ws.okx.com:8443/ws/v5/private")
 
 def _sign(ts: str, method: str, path: str, body: str, secret: str)->str:
     mac=hmac.new(secret.encode(), f"{ts}{method}{path}{body}".encode(), hashlib.sha256).digest()
@@ -14,10 +14,27 @@ class PrivateState:
     positions: Dict[str,Any] = field(default_factory=dict)
     orders: Dict[str,Any] = field(default_factory=dict)
 
+class WSNotReady(ConnectionError):
+    """The trading socket is not logged in; nothing was sent (safe to fall back to REST)."""
+
 class OKXPrivateWS:
-    def __init__(self, api_key:str, api_secret:str, passphrase:str, on_event: Optional[Callable[[str,Dict[str,Any],PrivateState],None]]=None):
+    """
+    Private channels (account/positions/orders) plus WS order entry.
+    ``request(op, args)`` sends an ``order``/``batch-orders``/``amend-order``/
+    ``cancel-order`` op tagged with a unique ``id`` and awaits the matching
+    response.  ``WSNotReady`` means the request was never sent; a timeout
+    means it may have reached the exchange and must not be blindly retried.
+    """
+    def __init__(self, api_key:str, api_secret:str, passphrase:str, on_event: Optional[Callable[[str,Dict[str,Any],PrivateState],None]]=None,
+                 url: Optional[str]=None, timeout_s: float=3.0):
         self.key=api_key; self.secret=api_secret; self.passphrase=passphrase; self.on_event=on_event
+        self.url=url or OKX_WSS_PRIVATE; self.timeout_s=timeout_s
         self.state=PrivateState(); self._stop=False
+        self._ws=None; self._ready=False
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._ids=itertools.count(1)
+    @property
+    def ready(self) -> bool: return self._ready and self._ws is not None
     async def _login(self, ws):
         ts=str(int(time.time())); sign=_sign(ts,"GET","/users/self/verify","",self.secret)
         await ws.send(json.dumps({"op":"login","args":[{"apiKey":self.key,"passphrase":self.passphrase,"timestamp":ts,"sign":sign}]}))
@@ -25,19 +42,56 @@ class OKXPrivateWS:
         subs={"op":"subscribe","args":[{"channel":"account"},{"channel":"positions"},{"channel":"orders"}]}
         while not self._stop:
             try:
-                async with websockets.connect(OKX_WSS_PRIVATE, ping_interval=20) as ws:
+                async with websockets.connect(self.url, ping_interval=20) as ws:
+                    self._ws=ws
                     await self._login(ws); await ws.send(json.dumps(subs))
                     async for msg in ws:
                         data=json.loads(msg)
-                        if "event" in data: continue
+                        if "event" in data:
+                            if data.get("event")=="login": self._ready = str(data.get("code","0"))=="0"
+                            continue
+                        if "id" in data and "op" in data:
+                            fut=self._pending.pop(str(data["id"]), None)
+                            if fut and not fut.done(): fut.set_result(data)
+                            continue
                         ch=data.get("arg",{}).get("channel","")
                         for d in data.get("data", []):
                             if ch=="account": self.state.account=d
                             elif ch=="positions": self.state.positions[f"{d.get('instId','')}|{d.get('posSide','')}"]=d
                             elif ch=="orders": self.state.orders[d.get("ordId","")] = d
-                            if self.on_event: 
+                            if self.on_event:
                                 try: self.on_event(ch,d,self.state)
                                 except Exception: pass
             except Exception as e:
                 print("Private WS reconnect:", e); await asyncio.sleep(2)
+            finally:
+                self._ws=None; self._ready=False
+                for fut in self._pending.values():
+                    if not fut.done(): fut.set_exception(ConnectionError("private WS closed before ack"))
+                self._pending.clear()
     def stop(self): self._stop=True
+
+    # ---- order entry ----
+    async def request(self, op: str, args: List[dict], timeout: Optional[float]=None) -> dict:
+        if not self.ready: raise WSNotReady(f"private WS not ready for {op}")
+        rid=f"q{next(self._ids)}"
+        fut=asyncio.get_running_loop().create_future(); self._pending[rid]=fut
+        try:
+            await self._ws.send(json.dumps({"id":rid,"op":op,"args":args}))
+        except Exception as e:
+            self._pending.pop(rid, None); raise WSNotReady(str(e))
+        try:
+            return await asyncio.wait_for(fut, timeout or self.timeout_s)
+        finally:
+            self._pending.pop(rid, None)
+
+    async def _one(self, op: str, kw: dict) -> dict:
+        j=await self.request(op, [kw])
+        d=(j.get("data") or [{}])[0]
+        if j.get("code")!="0": raise RuntimeError(f"ws {op} error: {j}")
+        return d
+    async def order(self, **kw): return await self._one("order", kw)
+    async def amend_order(self, **kw): return await self._one("amend-order", kw)
+    async def cancel_order(self, **kw): return await self._one("cancel-order", kw)
+    async def batch_orders(self, orders: List[dict]) -> dict:
+        return await self.request("batch-orders", orders)
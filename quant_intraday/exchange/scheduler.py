@@ -0,0 +1,83 @@
+import os, time, heapq, asyncio, itertools
+from typing import Dict, List, Optional, Tuple
+from ..utils.rate_limit import AsyncTokenBucket
+from ..utils.metrics import histogram
+
+# OKX v5 published limits: (requests, per seconds, scope). "inst" buckets are
+# keyed per instrument (the exchange limits by user ID + instrument ID).
+LIMITS: Dict[str, Tuple[int, float, str]] = {
+    "order":   (60, 2.0, "inst"),    # /trade/order, WS order
+    "batch":   (300, 2.0, "inst"),   # /trade/batch-orders (counted per order)
+    "cancel":  (60, 2.0, "inst"),    # /trade/cancel-order, cancel-batch-orders
+    "amend":   (60, 2.0, "inst"),    # /trade/amend-order, amend-batch-orders
+    "query":   (60, 2.0, "inst"),    # GET /trade/order
+    "algo":    (20, 2.0, "account"), # /trade/order-algo, amend-algos, cancel-algos
+    "account": (10, 2.0, "account"), # /account/balance, /account/positions
+    "public":  (20, 2.0, "account"), # /public/instruments, /market/candles
+}
+# lower value = served first when a bucket is contended
+PRIORITY = {"cancel": 0, "reduce": 1, "amend": 1, "new": 2, "poll": 3}
+
+class RequestScheduler:
+    """
+    Async admission control for OKX requests.
+    - One ``AsyncTokenBucket`` per (endpoint class, instrument|account).
+    - Uncontended requests pass straight through; once a bucket is empty,
+      waiters queue in a priority heap (cancel < reduce-only/amend < new
+      entry < polling) and are released as tokens refill, so cancels jump
+      ahead of entries and polling.
+    - Queueing delay is observed in ``qi_req_queue_delay_seconds{cls,prio}``.
+    - ``account_share`` (env ``QI_RATE_SHARE``) scales the account-scoped
+      buckets when several processes trade one account (sharded runner);
+      per-instrument buckets are untouched since each instrument lives in one process.
+    """
+    def __init__(self, limits: Optional[Dict[str, Tuple[int, float, str]]] = None, headroom: float = 0.9,
+                 account_share: Optional[float] = None):
+        self.limits = dict(limits or LIMITS); self.headroom = headroom
+        self.account_share = account_share if account_share is not None else float(os.getenv("QI_RATE_SHARE", "1") or 1)
+        self._buckets: Dict[Tuple[str, str], AsyncTokenBucket] = {}
+        self._waiters: Dict[Tuple[str, str], List] = {}
+        self._pumps: Dict[Tuple[str, str], asyncio.Task] = {}
+        self._seq = itertools.count()
+        self._hist = histogram("qi_req_queue_delay_seconds", "Time requests wait for a rate-limit token", ("cls", "prio"),
+                               buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5))
+        self.waited = 0
+
+    def _bucket(self, key):
+        b = self._buckets.get(key)
+        if b is None:
+            n, per, scope = self.limits[key[0]]
+            cap = max(1.0, n * self.headroom * (self.account_share if scope == "account" else 1.0))
+            b = self._buckets[key] = AsyncTokenBucket(cap, cap / per)
+        return b
+
+    async def acquire(self, cls: str, inst: str = "", prio: str = "new", n: float = 1):
+        key = (cls, inst if self.limits[cls][2] == "inst" else "")
+        b = self._bucket(key); heap = self._waiters.setdefault(key, [])
+        t0 = time.perf_counter()
+        if not heap and b.take(n):
+            self._hist.labels(cls, prio).observe(0.0); return
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(heap, (PRIORITY.get(prio, 2), next(self._seq), n, fut))
+        p = self._pumps.get(key)
+        if p is None or p.done(): self._pumps[key] = asyncio.get_running_loop().create_task(self._pump(key))
+        await fut
+        self.waited += 1
+        self._hist.labels(cls, prio).observe(time.perf_counter() - t0)
+
+    async def _pump(self, key):
+        b = self._buckets[key]; heap = self._waiters[key]
+        while heap:
+            _, _, n, fut = heap[0]
+            if fut.cancelled():
+                heapq.heappop(heap); continue
+            if b.take(n):
+                heapq.heappop(heap); fut.set_result(None)
+            else:
+                await asyncio.sleep(b.delay(n))
+
+    async def run(self, cls: str, fn, *args, inst: str = "", prio: str = "new", n: float = 1, **kw):
+        """Wait for admission, then run ``fn`` (coroutine function, or sync in a worker thread)."""
+        await self.acquire(cls, inst, prio, n)
+        if asyncio.iscoroutinefunction(fn): return await fn(*args, **kw)
+        return await asyncio.to_thread(fn, *args, **kw)
@@ -0,0 +1,182 @@
+import asyncio
+from .private_ws import WSNotReady
+from .scheduler import RequestScheduler, PRIORITY
+from ..utils.latency import LATENCY
+
+BATCH_MAX = 20  # OKX batch endpoints accept at most 20 orders per request
+
+class TradeAPIMixin:
+    """
+    OKX v5 trade endpoints shared by both REST clients.
+    The host class provides signed ``_get(path, params)`` / ``_post(path, payload)``
+    returning the decoded JSON envelope.
+    ``batch_*`` split the request into chunks of ``BATCH_MAX`` and return one
+    result per input order, in input order, with ``ok`` set from ``sCode``.
+    When a chunk's request fails in transport (timeout, dropped connection)
+    its orders may still be live, so their ``ok`` is ``None`` (unknown), on
+    both REST and WS; ``areconcile`` resolves unknown placements by clOrdId.
+
+    The ``a*`` coroutines are the executor-facing interface: when ``ws_trade``
+    (a logged-in ``OKXPrivateWS``) is attached they go over the private
+    socket, otherwise (or when the socket is down and nothing was sent) they
+    run the REST call in a worker thread so the event loop never blocks.
+    Every ``a*`` call is admitted by the client's ``RequestScheduler`` first
+    (per-endpoint/instrument rate buckets, cancels ahead of entries and polls).
+    New orders are stamped ``sent``/``ack`` in ``utils.latency.LATENCY`` by
+    ``clOrdId`` after admission, so queueing in the scheduler is not counted
+    as exchange round trip.
+    """
+    ws_trade = None
+    _sched = None
+
+    @property
+    def scheduler(self) -> RequestScheduler:
+        if self._sched is None: self._sched = RequestScheduler()
+        return self._sched
+    def _trade(self, path, payload, what):
+        j = self._post(path, payload)
+        if j.get("code") != "0": raise RuntimeError(f"{what} error: {j}")
+        return j["data"][0] if isinstance(payload, dict) else j["data"]
+
+    def cancel_order(self, **kwargs):
+        return self._trade("/api/v5/trade/cancel-order", kwargs, "cancel_order")
+
+    def amend_order(self, **kwargs):
+        """Amend a live order (``newSz``/``newPx``/``attachAlgoOrds``...)."""
+        return self._trade("/api/v5/trade/amend-order", kwargs, "amend_order")
+
+    def order_algo(self, **kwargs):
+        """Place an algo order (``conditional``/``oco``/``move_order_stop``...); returns ``{"algoId": ...}``."""
+        return self._trade("/api/v5/trade/order-algo", kwargs, "order_algo")
+
+    def amend_algo(self, **kwargs):
+        """Amend a live stop/trigger algo order (``newSlTriggerPx``, ``newTpTriggerPx``...)."""
+        return self._trade("/api/v5/trade/amend-algos", kwargs, "amend_algo")
+
+    def cancel_algo(self, instId: str, algoId: str):
+        return self._trade("/api/v5/trade/cancel-algos", [{"instId": instId, "algoId": algoId}], "cancel_algo")[0]
+
+    def _batch(self, path, orders, what):
+        out = []
+        for i in range(0, len(orders), BATCH_MAX):
+            chunk = [dict(o) for o in orders[i:i+BATCH_MAX]]
+            try:
+                j = self._post(path, chunk)
+            except Exception as e:
+                out += _unknown(chunk, what, e); continue
+            out += _map_batch(chunk, j)
+        return out
+
+    def batch_place(self, orders):
+        return self._batch("/api/v5/trade/batch-orders", orders, "batch_place")
+
+    def batch_amend(self, amends):
+        return self._batch("/api/v5/trade/amend-batch-orders", amends, "batch_amend")
+
+    def batch_cancel(self, cancels):
+        return self._batch("/api/v5/trade/cancel-batch-orders", cancels, "batch_cancel")
+
+    def get_order(self, instId: str, ordId: str | None = None, clOrdId: str | None = None):
+        """Order details (state/accFillSz/avgPx) by ``ordId`` or ``clOrdId``; ``{}`` if unknown."""
+        q = f"?instId={instId}" + (f"&ordId={ordId}" if ordId else f"&clOrdId={clOrdId}")
+        j = self._get("/api/v5/trade/order" + q)
+        return (j.get("data") or [{}])[0]
+
+    def get_positions(self, instId: str | None = None):
+        # query string is part of the signed path
+        j = self._get("/api/v5/account/positions" + (f"?instId={instId}" if instId else ""))
+        return j.get("data", [])
+
+    async def _aone(self, ws_op: str, rest, kw: dict, cls: str, prio: str):
+        await self.scheduler.acquire(cls, kw.get("instId", ""), prio)
+        ws = self.ws_trade
+        if ws is not None and ws.ready:
+            try: return await getattr(ws, ws_op)(**kw)
+            except WSNotReady: pass
+        return await asyncio.to_thread(rest, **kw)
+
+    async def aplace_order(self, **kw):
+        cl = kw.get("clOrdId")
+        await self.scheduler.acquire("order", kw.get("instId", ""), _prio(kw))
+        LATENCY.sent(kw.get("instId", ""), cl)
+        try:
+            ws = self.ws_trade; r = None
+            if ws is not None and ws.ready:
+                try: r = await ws.order(**kw)
+                except WSNotReady: pass
+            if r is None: r = await asyncio.to_thread(self.place_order, **kw)
+        except Exception:
+            LATENCY.ack(cl, ok=False); raise
+        LATENCY.ack(cl)
+        return r
+
+    async def aamend_order(self, **kw):
+        return await self._aone("amend_order", self.amend_order, kw, "amend", "amend")
+
+    async def acancel_order(self, **kw):
+        return await self._aone("cancel_order", self.cancel_order, kw, "cancel", "cancel")
+
+    async def acall(self, cls: str, fn, *args, prio: str = "poll", inst: str = "", **kw):
+        """Any other (sync) client call, rate-limited under endpoint class ``cls``."""
+        return await self.scheduler.run(cls, fn, *args, inst=inst, prio=prio, **kw)
+
+    async def abatch_place(self, orders):
+        out = []
+        for i in range(0, len(orders), BATCH_MAX):
+            chunk = [dict(o) for o in orders[i:i+BATCH_MAX]]
+            await self.scheduler.acquire("batch", chunk[0].get("instId", ""), min((_prio(o) for o in chunk), key=PRIORITY.get), len(chunk))
+            for o in chunk: LATENCY.sent(o.get("instId", ""), o.get("clOrdId"))
+            ws = self.ws_trade; res = None
+            if ws is not None and ws.ready:
+                try: res = _map_batch(chunk, await ws.batch_orders(chunk))
+                except WSNotReady: pass
+                except Exception as e: res = _unknown(chunk, "batch_place", e)
+            if res is None: res = await asyncio.to_thread(self.batch_place, chunk)
+            for r in res: LATENCY.ack(r.get("clOrdId"), bool(r["ok"]))
+            out += res
+        return out
+
+    async def areconcile(self, results):
+        """
+        Resolve placements with ``ok is None`` by ``clOrdId``: a live/filled
+        order becomes ``ok=True`` (with its ``ordId``); one the exchange does
+        not know is cancelled by clOrdId, in case it still lands, and becomes
+        ``ok=False``.  If the query itself fails the result stays ``None``.
+        """
+        for r in results:
+            if r.get("ok") is not None or not r.get("clOrdId"): continue
+            inst = r.get("instId", ""); cl = r["clOrdId"]
+            try:
+                d = await self.acall("query", self.get_order, inst, clOrdId=cl, inst=inst)
+            except Exception:
+                continue
+            try: filled = float(d.get("accFillSz") or 0) > 0
+            except (TypeError, ValueError): filled = False
+            if d.get("state") in ("live", "partially_filled", "filled") or filled:
+                r.update(ordId=d.get("ordId"), sCode="0", ok=True)
+            elif d.get("state") in ("canceled", "mmp_canceled"):
+                r["ok"] = False
+            else:
+                try: await self.acancel_order(instId=inst, clOrdId=cl)
+                except Exception: pass
+                r["ok"] = False
+        return results
+
+def _unknown(chunk, what, e):
+    return [{"sCode": "-1", "sMsg": f"{what}: {e}", "ok": None, **_ids(o)} for o in chunk]
+
+def _map_batch(chunk, j):
+    data = j.get("data") or []
+    by_cl = {d.get("clOrdId"): d for d in data if d.get("clOrdId")}
+    out = []
+    for k, o in enumerate(chunk):
+        d = by_cl.get(o.get("clOrdId")) if o.get("clOrdId") else None
+        if d is None: d = data[k] if k < len(data) else {"sCode": j.get("code", "-1"), "sMsg": j.get("msg", "")}
+        out.append({**_ids(o), **d, "ok": str(d.get("sCode", "")) == "0"})
+    return out
+
+def _prio(o):
+    return "reduce" if str(o.get("reduceOnly", "")).lower() == "true" else "new"
+
+def _ids(o):
+    return {k: o[k] for k in ("instId", "ordId", "clOrdId") if k in o}
@@ -1,20 +1,21 @@
 #!/usr/bin/env python3
 import os, time, json, pandas as pd
+from quant_intraday.utils.exelog import read_events
 
 LIVE=os.getenv("QI_LOG_DIR","live_output")
 OUT=os.path.join(LIVE, "exec_kpis.json")
 
 def compute():
     fp=os.path.join(LIVE, "execlog.csv")
-    if not os.path.exists(fp): return {}
     try:
-        df=pd.read_csv(fp)
+        df=read_events(fp, since_ms=int(time.time()*1000) - 60*60*1000)
     except Exception:
         return {}
     if df.empty: return {}
     df["ts"] = pd.to_numeric(df.get("ts"), errors="coerce").fillna(0).astype(int)
-    df["evt"] = df.get("evt","").astype(str)
-    df["inst"] = df.get("inst","").astype(str)
+    df["evt"] = df["evt"].astype(str) if "evt" in df else ""
+    df["inst"] = df["inst"].astype(str) if "inst" in df else ""
+    if "clOrdId" not in df: df["clOrdId"] = ""
     res = {}
     now = int(time.time()*1000)
     window = now - 60*60*1000
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""Daily order-latency report: p50/p90/p99 per instrument, executor and stage
+from live_output/latency.csv -> live_output/latency_report_<day>.json."""
+import os, sys, time, json, datetime, pandas as pd
+from quant_intraday.utils.latency import SPANS
+
+LIVE=os.getenv("QI_LOG_DIR","live_output")
+
+def compute(df: pd.DataFrame) -> dict:
+    res = {}
+    for (inst, ex), g in df.groupby(["inst","executor"]):
+        r = {"orders": int(len(g))}
+        for name, _, _ in SPANS:
+            s = pd.to_numeric(g.get(f"{name}_us"), errors="coerce").dropna()
+            if s.empty: continue
+            r[name] = {"n": int(len(s)), "p50_us": float(s.quantile(0.5)), "p90_us": float(s.quantile(0.9)),
+                       "p99_us": float(s.quantile(0.99)), "max_us": float(s.max())}
+        res.setdefault(inst, {})[ex or "-"] = r
+    return res
+
+def main(day: str | None = None):
+    day = day or datetime.date.today().isoformat()
+    t0 = int(datetime.datetime.fromisoformat(day).timestamp()*1000); t1 = t0 + 86400*1000
+    fp = os.path.join(LIVE, "latency.csv")
+    try:
+        df = pd.read_csv(fp, dtype={"clOrdId": str, "executor": str})
+        df["executor"] = df["executor"].fillna("")
+    except Exception:
+        df = pd.DataFrame(columns=["ts","inst","executor"])
+    ts = pd.to_numeric(df["ts"], errors="coerce")
+    df = df[(ts >= t0) & (ts < t1)]
+    out = {"day": day, "generated": int(time.time()*1000), "by_inst": compute(df) if not df.empty else {}}
+    os.makedirs(LIVE, exist_ok=True)
+    path = os.path.join(LIVE, f"latency_report_{day}.json")
+    json.dump(out, open(path,"w"), ensure_ascii=False, indent=2)
+    print(json.dumps(out, indent=2)); return out
+
+if __name__=="__main__":
+    main(sys.argv[1] if len(sys.argv)>1 else None)
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""Load test: PortfolioOrchestrator with ``n`` bots (dry-run) against the local
+OKX stand-in (quant_intraday/sim) pushing ``rate`` book messages/s per
+instrument.  Samples event-loop lag, per-message latency (exchange ts -> parsed
+book), time to first evaluation, strategy-loop latency (StageTimer "total"),
+CPU and RSS over time, and checks them against SLOs -> live_output/loadtest_<ts>.json."""
+import os, sys, time, json, asyncio, multiprocessing as mp
+from typing import Dict, List, Optional
+
+LIVE=os.getenv("QI_LOG_DIR","live_output")
+
+SLO={"loop_lag_p99_ms": 50.0, "msg_latency_p99_ms": 100.0, "strategy_p99_ms": 250.0, "cpu_pct_mean": 80.0, "rss_mb_per_bot": 60.0}
+
+def pct(xs: List[float]) -> dict:
+    if not xs: return {"n": 0}
+    v=sorted(xs); k=len(v)
+    return {"n": k, "p50": v[k//2], "p90": v[min(k-1, int(k*0.9))], "p99": v[min(k-1, int(k*0.99))], "max": v[-1]}
+
+def check_slo(rep: dict, slo: Dict[str, float]) -> dict:
+    """``{name: {"limit", "value", "ok"}}``; a metric with no samples fails."""
+    vals={"loop_lag_p99_ms": rep["loop_lag_ms"].get("p99"), "msg_latency_p99_ms": rep["msg_latency_ms"].get("p99"),
+          "strategy_p99_ms": rep["strategy_ms"].get("p99"), "cpu_pct_mean": rep["cpu_pct"].get("mean"),
+          "rss_mb_per_bot": rep["rss_mb"].get("per_bot")}
+    return {k: {"limit": lim, "value": vals.get(k), "ok": vals.get(k) is not None and vals[k] <= lim} for k, lim in slo.items()}
+
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f: return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, IndexError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+def _serve(port: int, insts: List[str], tick_ms: float, seed: int):
+    from quant_intraday.sim import server
+    sys.stdout = open(os.devnull, "w")
+    server.main("127.0.0.1", port, insts, tick_ms=tick_ms, seed=seed, history_bars=3000)
+
+class _Probe:
+    """Loop lag, book latency and process CPU/RSS collectors; samples before ``t_start`` are dropped."""
+    def __init__(self, t_start: float):
+        self.t_start=t_start; self.lag: List[float]=[]; self.msg: List[float]=[]; self.books=0; self.timeline: List[dict]=[]
+
+    def hook(self, bot):
+        from quant_intraday.engine.conflate import ConflatingSlot
+        probe=self
+        class _Wake(ConflatingSlot):
+            # the book loops publish "book" right after parsing; b.ts is the exchange push time
+            def publish(self, value):
+                if value=="book" and time.time()>=probe.t_start:
+                    b=bot._book; probe.books+=1
+                    if b is not None and b.ts: probe.msg.append(max(0.0, time.time()*1000 - b.ts))
+                super().publish(value)
+        bot._wake=_Wake()
+
+    async def lag_loop(self, every_s: float = 0.05):
+        while True:
+            t0=time.perf_counter(); await asyncio.sleep(every_s)
+            if time.time()>=self.t_start: self.lag.append((time.perf_counter()-t0-every_s)*1000)
+
+    async def proc_loop(self, every_s: float = 1.0):
+        c0, w0 = time.process_time(), time.perf_counter()
+        while True:
+            await asyncio.sleep(every_s)
+            c1, w1 = time.process_time(), time.perf_counter()
+            self.timeline.append({"t": round(time.time(), 3), "cpu_pct": 100*(c1-c0)/max(w1-w0, 1e-9), "rss_mb": _rss_mb(),
+                                  "warmup": time.time()<self.t_start})
+            c0, w0 = c1, w1
+
+async def _run(n: int, duration_s: float, warmup_s: float, port: int, book_channel: str, rss0: float) -> dict:
+    from quant_intraday.engine.exchange.okx_client import OKXClient
+    from quant_intraday.engine.portfolio import PortfolioOrchestrator, PortfolioItem
+    client=OKXClient("sim", "sim", "sim", base_url=f"http://127.0.0.1:{port}")
+    orch=PortfolioOrchestrator(client, cfg_path="", log_dir=os.environ["QI_LOG_DIR"], live=False, dd_limit=1.0)
+    orch.items=[PortfolioItem(f"T{i:03d}-USDT-SWAP", "1m") for i in range(n)]
+    # open the quality gates so every bot evaluates the router each cycle
+    bots=orch.build_bots(book_channel=book_channel, min_atr_pct=0.0, min_vol_pct=0.0, adaptive_cool=False)
+    probe=_Probe(time.time()+warmup_s)
+    for b in bots: probe.hook(b)
+    tasks=[asyncio.create_task(x) for x in (orch.run(), probe.lag_loop(), probe.proc_loop())]
+    await asyncio.sleep(warmup_s+duration_s)
+    for t in tasks: t.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    strat=[]
+    for b in bots:
+        tot=b._stages.summary().get("total")
+        if tot: strat.append(tot["p99_ms"])
+    steady=[x for x in probe.timeline if not x["warmup"]] or probe.timeline
+    cpu=[x["cpu_pct"] for x in steady]; rss=[x["rss_mb"] for x in probe.timeline]
+    return {"loop_lag_ms": pct(probe.lag), "msg_latency_ms": pct(probe.msg), "books_per_s": probe.books/max(duration_s, 1e-9),
+            "strategy_ms": pct(strat), "ttfe_s": pct([b.ttfe_s for b in bots if b.ttfe_s is not None]), "cpu_pct": {"mean": sum(cpu)/len(cpu) if cpu else None, "max": max(cpu) if cpu else None},
+            "rss_mb": {"start": rss0, "end": rss[-1] if rss else None, "max": max(rss) if rss else None,
+                       "per_bot": (max(rss)-rss0)/n if rss else None},
+            "timeline": probe.timeline}
+
+def main(n: int = 10, rate: float = 20.0, duration_s: float = 60.0, warmup_s: float = 15.0, port: int = 8799,
+         book_channel: str = "books5", seed: int = 7, slo: Optional[Dict[str, float]] = None) -> dict:
+    insts=[f"T{i:03d}-USDT-SWAP" for i in range(n)]
+    srv=mp.Process(target=_serve, args=(port, insts, 1000.0/max(rate, 0.1), seed), daemon=True); srv.start()
+    os.environ.update({"OKX_REST_BASE": f"http://127.0.0.1:{port}", "OKX_WSS_PUBLIC": f"ws://127.0.0.1:{port}/ws/v5/public",
+                       "OKX_WSS_PRIVATE": f"ws://127.0.0.1:{port}/ws/v5/private", "OKX_SIMULATED": "0",
+                       "QI_LOG_DIR": os.path.join(LIVE, "loadtest")})
+    # own risk state: sim equity must never reach the host-wide PortfolioGuard of real bots
+    os.environ["QI_RISK_STATE"]=os.path.join(os.environ["QI_LOG_DIR"], "risk_state.db")
+    os.makedirs(os.environ["QI_LOG_DIR"], exist_ok=True)
+    import httpx
+    t0=time.time()
+    while True:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/api/v5/public/time", timeout=1.0).raise_for_status(); break
+        except httpx.HTTPError:
+            if time.time()-t0>30 or not srv.is_alive(): srv.terminate(); raise RuntimeError("sim exchange did not start")
+            time.sleep(0.2)
+    try:
+        rep=asyncio.run(_run(n, duration_s, warmup_s, port, book_channel, _rss_mb()))
+    finally:
+        srv.terminate(); srv.join(5)
+    rep={"config": {"instruments": n, "rate_per_inst": rate, "offered_msgs_per_s": n*rate, "duration_s": duration_s,
+                    "warmup_s": warmup_s, "book_channel": book_channel}, **rep}
+    rep["slo"]=check_slo(rep, {**SLO, **(slo or {})}); rep["pass"]=all(x["ok"] for x in rep["slo"].values())
+    os.makedirs(LIVE, exist_ok=True)
+    path=os.path.join(LIVE, f"loadtest_{int(time.time())}.json")
+    json.dump(rep, open(path,"w"), ensure_ascii=False, indent=2)
+    print(json.dumps({k: v for k, v in rep.items() if k!="timeline"}, indent=2)); print("report ->", path)
+    return rep
+
+if __name__=="__main__":
+    sys.exit(0 if main(int(sys.argv[1]) if len(sys.argv)>1 else 10)["pass"] else 1)
@@ -0,0 +1,302 @@
+import re, math, time, itertools, random
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from .matching import MatchingEngine, SimOrder, Fill, OrderError, EPS
+
+BAR_MS = {"1m": 60_000, "3m": 180_000, "5m": 300_000, "15m": 900_000, "30m": 1_800_000,
+          "1H": 3_600_000, "2H": 7_200_000, "4H": 14_400_000, "1D": 86_400_000}
+
+CL_ORD_ID = re.compile(r"[A-Za-z0-9]{1,32}")   # OKX: case-sensitive alphanumerics, up to 32 characters
+
+def _f(x, default=0.0) -> float:
+    try: return float(x) if x not in (None, "") else default
+    except (TypeError, ValueError): return default
+
+def _s(x: float) -> str:
+    return f"{x:.10f}".rstrip("0").rstrip(".") if x else "0"
+
+def inst_defaults(inst_id: str) -> Tuple[float, float, float]:
+    """(mid, tickSz, ctVal) for the stand-in's instruments."""
+    sym = inst_id.split("-")[0].upper()
+    return {"BTC": (60000.0, 0.1, 0.01), "ETH": (3000.0, 0.01, 0.1), "SOL": (150.0, 0.01, 1.0)}.get(sym, (100.0, 0.01, 1.0))
+
+@dataclass
+class SimInstrument:
+    inst_id: str
+    mid: float
+    tick: float
+    ct_val: float
+    lot: float = 1.0
+
+    def meta(self) -> dict:
+        base, quote = (self.inst_id.split("-") + ["USDT"])[:2]
+        return {"instType": "SWAP", "instId": self.inst_id, "uly": f"{base}-{quote}", "instFamily": f"{base}-{quote}",
+                "settleCcy": quote, "ctVal": _s(self.ct_val), "ctValCcy": base, "ctType": "linear", "tickSz": _s(self.tick),
+                "lotSz": _s(self.lot), "minSz": _s(self.lot), "lever": "100", "state": "live"}
+
+@dataclass
+class SimAlgo:
+    algo_id: str
+    inst_id: str
+    ord_type: str              # conditional | oco | move_order_stop
+    side: str                  # side of the closing order
+    pos_side: str
+    sz: float = 0.0            # 0 -> whole position (closeFraction=1)
+    tp_trigger: float = 0.0
+    tp_px: float = -1.0
+    sl_trigger: float = 0.0
+    sl_px: float = -1.0
+    callback: float = 0.0      # move_order_stop callbackSpread
+    callback_ratio: float = 0.0
+    extreme: float = 0.0       # best price seen since a trailing stop was placed
+    state: str = "live"        # live | effective | canceled
+    cl_ord_id: str = ""
+    parent: str = ""           # ordId of the entry order for attached TP/SL
+
+    def data(self) -> dict:
+        return {"algoId": self.algo_id, "instId": self.inst_id, "ordType": self.ord_type, "side": self.side, "posSide": self.pos_side,
+                "sz": _s(self.sz), "tpTriggerPx": _s(self.tp_trigger), "slTriggerPx": _s(self.sl_trigger),
+                "callbackSpread": _s(self.callback), "state": self.state, "algoClOrdId": self.cl_ord_id}
+
+    def check(self, px: float) -> Optional[float]:
+        """Trigger price hit by last trade ``px``: returns the close order price (-1 = market) or None."""
+        closing_long = self.side == "sell"
+        if self.ord_type == "move_order_stop":
+            self.extreme = (max if closing_long else min)(self.extreme or px, px)
+            dist = self.callback or self.extreme * self.callback_ratio
+            hit = px <= self.extreme - dist if closing_long else px >= self.extreme + dist
+            return -1.0 if hit else None
+        if self.tp_trigger and (px >= self.tp_trigger if closing_long else px <= self.tp_trigger): return self.tp_px
+        if self.sl_trigger and (px <= self.sl_trigger if closing_long else px >= self.sl_trigger): return self.sl_px
+        return None
+
+class SimAccount:
+    """USDT-margined account: signed positions per (instId, posSide), realized PnL and fees into cash."""
+    def __init__(self, equity: float = 10_000.0, maker_bps: float = 2.0, taker_bps: float = 5.0):
+        self.cash = float(equity); self.maker_bps = maker_bps; self.taker_bps = taker_bps
+        self.positions: Dict[Tuple[str, str], List[float]] = {}   # -> [signed contracts, avg px]
+
+    def position(self, inst_id: str, pos_side: str) -> float:
+        return self.positions.get((inst_id, pos_side), [0.0, 0.0])[0]
+
+    def on_fill(self, o: SimOrder, px: float, sz: float, maker: bool, ct_val: float) -> float:
+        fee = px * sz * ct_val * (self.maker_bps if maker else self.taker_bps) / 1e4
+        self.cash -= fee; o.fee -= fee
+        p = self.positions.setdefault((o.inst_id, o.pos_side), [0.0, 0.0])
+        d = sz if o.side == "buy" else -sz
+        if p[0] * d < 0:
+            close = min(abs(d), abs(p[0])); sgn = 1.0 if p[0] > 0 else -1.0
+            self.cash += (px - p[1]) * close * ct_val * sgn
+            p[0] -= sgn * close; d += sgn * close
+            if abs(p[0]) <= EPS: p[0] = 0.0; p[1] = 0.0
+        if abs(d) > EPS:
+            n = abs(p[0]) + abs(d); p[1] = (p[1] * abs(p[0]) + px * abs(d)) / n; p[0] += d
+        return fee
+
+    def upl(self, marks: Dict[str, float], ct_vals: Dict[str, float]) -> float:
+        return sum((marks.get(i, a) - a) * q * ct_vals.get(i, 1.0) for (i, _), (q, a) in self.positions.items() if q)
+
+    def equity(self, marks, ct_vals) -> float: return self.cash + self.upl(marks, ct_vals)
+
+class CandleSeries:
+    """1m bars (pre-seeded history + live trades); other bar sizes are aggregated on request."""
+    def __init__(self):
+        self.ts: List[int] = []; self.ohlcv: List[List[float]] = []
+
+    def seed(self, end_px: float, n: int, now_ms: int, vol: float, rng: random.Random):
+        # random walk backwards from the current price so the history ends at the live mid
+        px = end_px; rows = []
+        t0 = now_ms - now_ms % 60_000
+        for i in range(n):
+            o = px * math.exp(rng.gauss(0, vol)); hi = max(o, px) * (1 + abs(rng.gauss(0, vol / 2))); lo = min(o, px) * (1 - abs(rng.gauss(0, vol / 2)))
+            rows.append((t0 - (i + 1) * 60_000, [o, hi, lo, px, float(rng.randint(10, 500))])); px = o
+        rows.reverse()
+        self.ts = [t for t, _ in rows]; self.ohlcv = [r for _, r in rows]
+
+    def on_trade(self, px: float, sz: float, ts: int):
+        t = ts - ts % 60_000
+        if self.ts and self.ts[-1] == t:
+            b = self.ohlcv[-1]; b[1] = max(b[1], px); b[2] = min(b[2], px); b[3] = px; b[4] += sz
+        else:
+            self.ts.append(t); self.ohlcv.append([px, px, px, px, sz])
+
+    def bars(self, bar: str, after: int = 0, before: int = 0, limit: int = 100) -> List[list]:
+        """OKX rows newest first: [ts,o,h,l,c,vol,volCcy,volCcyQuote,confirm]; ``after``/``before`` are exclusive bounds."""
+        span = BAR_MS.get(bar, 60_000); out = []; cur = None
+        for i in range(len(self.ts) - 1, -1, -1):
+            bt = self.ts[i] - self.ts[i] % span
+            if after and bt >= after: continue
+            if before and bt <= before: break
+            o, h, l, c, v = self.ohlcv[i]
+            if cur is None or cur[0] != bt:
+                if cur is not None:
+                    out.append(cur); cur = None
+                    if len(out) >= limit: break
+                cur = [bt, o, h, l, c, v]
+            else:
+                cur[1] = o; cur[2] = max(cur[2], h); cur[3] = min(cur[3], l); cur[5] += v
+        if cur is not None and len(out) < limit: out.append(cur)
+        now = int(time.time() * 1000); live = now - now % span
+        return [[str(r[0]), _s(r[1]), _s(r[2]), _s(r[3]), _s(r[4]), _s(r[5]), _s(r[5]), _s(r[5] * r[4]), "0" if r[0] >= live else "1"] for r in out]
+
+class SimExchange:
+    """
+    Transport-independent OKX stand-in: instruments, matching, account,
+    algo orders and candles.  The HTTP/WS server calls ``place``/``cancel``/
+    ``amend``/``*_algo`` with OKX request payloads (``OrderError`` carries the
+    OKX ``sCode``) and drains ``pop_events()`` after every flow step to push
+    public and private channel updates.
+    """
+    def __init__(self, instruments: List[SimInstrument], equity: float = 10_000.0, history_bars: int = 20_000, seed: int = 7):
+        self.rng = random.Random(seed)
+        self.inst: Dict[str, SimInstrument] = {i.inst_id: i for i in instruments}
+        self.engine = MatchingEngine(); self.account = SimAccount(equity)
+        self.algos: Dict[str, SimAlgo] = {}; self._algo_ids = itertools.count(1)
+        self.candles: Dict[str, CandleSeries] = {}
+        now = self.now()
+        for i in instruments:
+            self.engine.add_instrument(i.inst_id, i.tick); self.engine.last_px[i.inst_id] = i.mid
+            cs = self.candles[i.inst_id] = CandleSeries(); cs.seed(i.mid, history_bars, now, 0.0015, self.rng)
+        self.engine.listeners.append(self._on_engine)
+        self._orders_out: List[dict] = []; self._trades_out: Dict[str, List[Fill]] = {}
+        self._pos_dirty = False
+
+    @staticmethod
+    def now() -> int: return int(time.time() * 1000)
+
+    # ---- engine events ----
+    def _on_engine(self, kind: str, obj):
+        if kind == "trade":
+            f: Fill = obj
+            self.candles[f.inst_id].on_trade(f.px, f.sz, f.ts)
+            self._trades_out.setdefault(f.inst_id, []).append(f)
+            ct = self.inst[f.inst_id].ct_val
+            for o, maker in ((f.maker, True), (f.taker, False)):
+                if o.owner == "user":
+                    self.account.on_fill(o, f.px, f.sz, maker, ct); self._pos_dirty = True
+                    if o.attach: self._attach_fill(o)
+        else:
+            self._orders_out.append(self.order_data(obj))
+
+    def pop_events(self) -> Tuple[List[dict], Dict[str, List[Fill]], bool]:
+        o, t, p = self._orders_out, self._trades_out, self._pos_dirty
+        self._orders_out = []; self._trades_out = {}; self._pos_dirty = False
+        return o, t, p
+
+    def order_data(self, o: SimOrder) -> dict:
+        return {"instType": "SWAP", "instId": o.inst_id, "ordId": o.ord_id, "clOrdId": o.cl_ord_id, "px": _s(o.px), "sz": _s(o.sz),
+                "ordType": o.ord_type, "side": o.side, "posSide": o.pos_side, "tdMode": o.td_mode, "state": o.state,
+                "accFillSz": _s(o.filled), "avgPx": _s(o.avg_px), "fillPx": _s(o.fill_px), "fillSz": _s(o.fill_sz), "tradeId": o.trade_id,
+                "fee": _s(o.fee), "feeCcy": "USDT", "reduceOnly": str(o.reduce_only).lower(), "cTime": str(o.c_time), "uTime": str(o.u_time)}
+
+    # ---- views ----
+    def marks(self) -> Dict[str, float]:
+        out = {}
+        for k, b in self.engine.books.items():
+            bb, ba = b.best("buy"), b.best("sell")
+            out[k] = (bb + ba) / 2 if bb and ba else self.engine.last_px.get(k, self.inst[k].mid)
+        return out
+
+    def balance(self) -> dict:
+        ct = {k: i.ct_val for k, i in self.inst.items()}; eq = self.account.equity(self.marks(), ct)
+        return {"totalEq": _s(eq), "uTime": str(self.now()), "details": [{"ccy": "USDT", "eq": _s(eq), "cashBal": _s(self.account.cash),
+                "availBal": _s(eq), "upl": _s(self.account.upl(self.marks(), ct))}]}
+
+    def positions(self, inst_id: str = "") -> List[dict]:
+        marks = self.marks(); out = []
+        for (i, ps), (q, a) in self.account.positions.items():
+            if inst_id and i != inst_id: continue
+            ct = self.inst[i].ct_val
+            out.append({"instType": "SWAP", "instId": i, "posSide": ps, "pos": _s(q if ps == "net" else abs(q)), "avgPx": _s(a),
+                        "markPx": _s(marks.get(i, a)), "upl": _s((marks.get(i, a) - a) * q * ct), "uTime": str(self.now())})
+        return out
+
+    def book5(self, inst_id: str, n: int = 5) -> dict:
+        b = self.engine.books[inst_id]; bids, asks = b.depth(n)
+        lv = lambda xs: [[_s(p), _s(q), "0", str(c)] for p, q, c in xs]
+        return {"asks": lv(asks), "bids": lv(bids), "ts": str(self.now()), "seqId": b.seq}
+
+    def ticker(self, inst_id: str) -> dict:
+        b = self.engine.books[inst_id]; last = self.engine.last_px.get(inst_id, self.inst[inst_id].mid)
+        return {"instType": "SWAP", "instId": inst_id, "last": _s(last), "bidPx": _s(b.best("buy") or 0), "askPx": _s(b.best("sell") or 0), "ts": str(self.now())}
+
+    # ---- trading requests (OKX payloads in, OKX result rows out) ----
+    def place(self, d: dict) -> dict:
+        inst = d.get("instId", "")
+        if inst not in self.inst: raise OrderError("51001", f"Instrument ID {inst} does not exist")
+        side = d.get("side", ""); ps = d.get("posSide") or "net"
+        sz = _f(d.get("sz")); reduce = str(d.get("reduceOnly", "")).lower() == "true"
+        if side not in ("buy", "sell"): raise OrderError("51000", "Parameter side error")
+        if d.get("clOrdId") and not CL_ORD_ID.fullmatch(d["clOrdId"]): raise OrderError("51000", "Parameter clOrdId error")
+        if reduce:
+            held = self.account.position(inst, ps)
+            if not held or (held > 0) == (side == "buy"): raise OrderError("51169", "Order failed because you don't have any positions to reduce")
+            sz = min(sz, abs(held))
+        o = SimOrder("", inst, side, sz, _f(d.get("px")), d.get("ordType", "limit"), d.get("clOrdId", ""), ps, reduce,
+                     td_mode=d.get("tdMode", "cross"), attach=list(d.get("attachAlgoOrds") or []))
+        self.engine.submit(o, self.now())
+        return {"ordId": o.ord_id, "clOrdId": o.cl_ord_id, "tag": "", "sCode": "0", "sMsg": "Order placed"}
+
+    def cancel(self, d: dict) -> dict:
+        o = self.engine.cancel(d.get("instId", ""), d.get("ordId", ""), d.get("clOrdId", ""), self.now())
+        return {"ordId": o.ord_id, "clOrdId": o.cl_ord_id, "sCode": "0", "sMsg": ""}
+
+    def amend(self, d: dict) -> dict:
+        o = self.engine.amend(d.get("instId", ""), d.get("ordId", ""), d.get("clOrdId", ""), _f(d.get("newSz")), _f(d.get("newPx")), self.now())
+        return {"ordId": o.ord_id, "clOrdId": o.cl_ord_id, "reqId": d.get("reqId", ""), "sCode": "0", "sMsg": ""}
+
+    def get_order(self, inst_id: str, ord_id: str = "", cl_ord_id: str = "") -> dict:
+        return self.order_data(self.engine.get(inst_id, ord_id, cl_ord_id))
+
+    # ---- algo orders ----
+    def place_algo(self, d: dict, parent: str = "") -> dict:
+        inst = d.get("instId", "")
+        if inst not in self.inst: raise OrderError("51001", f"Instrument ID {inst} does not exist")
+        t = d.get("ordType", "conditional")
+        if t not in ("conditional", "oco", "move_order_stop"): raise OrderError("51000", f"Parameter ordType error: {t}")
+        a = SimAlgo(str(next(self._algo_ids)), inst, t, d.get("side", ""), d.get("posSide") or "net", _f(d.get("sz")),
+                    _f(d.get("tpTriggerPx")), _f(d.get("tpOrdPx"), -1.0), _f(d.get("slTriggerPx")), _f(d.get("slOrdPx"), -1.0),
+                    _f(d.get("callbackSpread")), _f(d.get("callbackRatio")), cl_ord_id=d.get("algoClOrdId", ""), parent=parent)
+        self.algos[a.algo_id] = a
+        return {"algoId": a.algo_id, "algoClOrdId": a.cl_ord_id, "sCode": "0", "sMsg": ""}
+
+    def amend_algo(self, d: dict) -> dict:
+        a = self.algos.get(d.get("algoId", ""))
+        if a is None or a.state != "live": raise OrderError("51603", "Algo order does not exist")
+        if d.get("newSz"): a.sz = _f(d["newSz"])
+        if d.get("newTpTriggerPx"): a.tp_trigger = _f(d["newTpTriggerPx"])
+        if d.get("newSlTriggerPx"): a.sl_trigger = _f(d["newSlTriggerPx"])
+        return {"algoId": a.algo_id, "reqId": d.get("reqId", ""), "sCode": "0", "sMsg": ""}
+
+    def cancel_algo(self, d: dict) -> dict:
+        a = self.algos.get(d.get("algoId", ""))
+        if a is None or a.state != "live": raise OrderError("51603", "Algo order does not exist")
+        a.state = "canceled"
+        return {"algoId": a.algo_id, "sCode": "0", "sMsg": ""}
+
+    def _attach_fill(self, o: SimOrder):
+        # attached TP/SL: one OCO per entry order covering what has filled so far
+        a = next((x for x in self.algos.values() if x.parent == o.ord_id), None)
+        if a is None:
+            at = o.attach[0]
+            self.place_algo({"instId": o.inst_id, "ordType": "oco", "side": "sell" if o.side == "buy" else "buy", "posSide": o.pos_side,
+                             "sz": _s(o.filled), **{k: at[k] for k in ("tpTriggerPx", "tpOrdPx", "slTriggerPx", "slOrdPx") if k in at}}, parent=o.ord_id)
+        else:
+            a.sz = o.filled
+
+    def check_algos(self):
+        for a in list(self.algos.values()):
+            if a.state != "live": continue
+            px = self.engine.last_px.get(a.inst_id)
+            if px is None: continue
+            ord_px = a.check(px)
+            if ord_px is None: continue
+            a.state = "effective"
+            held = abs(self.account.position(a.inst_id, a.pos_side))
+            sz = min(a.sz, held) if a.sz else held
+            if sz <= EPS: continue
+            try:
+                self.place({"instId": a.inst_id, "side": a.side, "posSide": a.pos_side, "sz": _s(sz), "reduceOnly": "true",
+                            "ordType": "market" if ord_px == -1 else "limit", "px": _s(ord_px if ord_px != -1 else 0)})
+            except OrderError:
+                pass
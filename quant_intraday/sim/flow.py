@@ -0,0 +1,94 @@
+import csv, math, random
+from typing import Iterator, List, Optional, Tuple
+from .matching import SimOrder, OrderError
+from .exchange import SimExchange
+
+Print = Tuple[int, float, float, str]   # (ts_ms, px, sz, aggressor side)
+
+def read_tape(path: str) -> List[Print]:
+    """Recorded trades CSV with ``ts,px,sz,side`` columns (OKX trades/history-trades layout)."""
+    out = []
+    with open(path, newline="", encoding="utf-8") as f:
+        for r in csv.DictReader(f):
+            try: out.append((int(r["ts"]), float(r["px"]), float(r["sz"]), r.get("side", "buy")))
+            except (KeyError, TypeError, ValueError): continue
+    out.sort(key=lambda x: x[0])
+    return out
+
+class FlowDriver:
+    """
+    Background order flow for one instrument of a ``SimExchange``.
+    - A fair value follows a random walk (``vol_bps`` per sqrt-second) or a
+      recorded trade tape (replayed at ``speed``x).
+    - A ``levels``-deep maker ladder (owner ``flow``) is kept around the fair
+      value: levels that now cross it are pulled, missing size is topped up
+      at the back of the queue, so resting user orders keep their priority.
+    - Takers arrive as a Poisson process (``taker_hz``) with market orders;
+      tape prints are replayed as takers of the recorded side and size.
+    """
+    def __init__(self, ex: SimExchange, inst_id: str, levels: int = 10, level_sz: Tuple[float, float] = (5, 60),
+                 taker_hz: float = 4.0, taker_sz: Tuple[float, float] = (1, 20), vol_bps: float = 3.0,
+                 tape: Optional[List[Print]] = None, speed: float = 1.0, rng: Optional[random.Random] = None):
+        self.ex = ex; self.inst = ex.inst[inst_id]; self.book = ex.engine.books[inst_id]
+        self.levels = levels; self.level_sz = level_sz; self.taker_hz = taker_hz; self.taker_sz = taker_sz
+        self.vol = vol_bps / 1e4; self.rng = rng or random.Random(hash(inst_id) & 0xffff)
+        self.fair = ex.engine.last_px.get(inst_id, self.inst.mid)
+        self._tape: Optional[Iterator[Print]] = iter(tape) if tape else None
+        self._next: Optional[Print] = None; self._tape_t0 = None; self._clock = 0.0; self.speed = speed
+
+    def _lot(self, x: float) -> float:
+        lot = self.inst.lot
+        return max(lot, round(x / lot) * lot)
+
+    def _prints(self, dt: float) -> List[Print]:
+        self._clock += dt * self.speed; out = []
+        while True:
+            if self._next is None:
+                self._next = next(self._tape, None)
+                if self._next is None: self._tape = None; break
+                if self._tape_t0 is None: self._tape_t0 = self._next[0]
+            if (self._next[0] - self._tape_t0) / 1000.0 > self._clock: break
+            out.append(self._next); self._next = None
+        return out
+
+    def _quote(self):
+        b = self.book; t = self.inst.tick
+        best_bid = math.floor((self.fair - t / 2) / t); best_ask = math.ceil((self.fair + t / 2) / t)
+        for side, best, sgn in (("buy", best_bid, -1), ("sell", best_ask, 1)):
+            want = {best + sgn * i for i in range(self.levels)}
+            have = {}
+            for k, q in list(b._lv[side].items()):
+                for o in list(q):
+                    if o.owner != "flow": continue
+                    if k not in want: b.unlink(o); o.state = "canceled"
+                    else: have[k] = have.get(k, 0.0) + o.remaining
+            for k in want:
+                target = self.level_sz[0] + (self.level_sz[1] - self.level_sz[0]) * abs(k - best) / max(1, self.levels - 1)
+                if have.get(k, 0.0) < target / 2:
+                    self._submit(side, k * t, self._lot(target - have.get(k, 0.0)), "post_only")
+
+    def _submit(self, side: str, px: float, sz: float, ord_type: str):
+        try:
+            self.ex.engine.submit(SimOrder("", self.inst.inst_id, side, sz, px, ord_type, owner="flow"), self.ex.now())
+        except OrderError:
+            pass
+
+    def step(self, dt: float):
+        takers: List[Tuple[str, float]] = []
+        if self._tape is not None:
+            for _, px, sz, side in self._prints(dt):
+                self.fair = px; takers.append((side, sz))
+        else:
+            self.fair *= math.exp(self.rng.gauss(0.0, self.vol * math.sqrt(max(dt, 1e-6))))
+            n = self._poisson(self.taker_hz * dt)
+            for _ in range(n):
+                takers.append(("buy" if self.rng.random() < 0.5 else "sell", self._lot(self.rng.uniform(*self.taker_sz))))
+        self._quote()
+        for side, sz in takers:
+            self._submit(side, 0.0, self._lot(sz), "market")
+
+    def _poisson(self, lam: float) -> int:
+        l = math.exp(-lam); k = 0; p = self.rng.random()
+        while p > l:
+            k += 1; p *= self.rng.random()
+        return k
@@ -0,0 +1,233 @@
+import bisect, itertools
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+EPS = 1e-9
+
+class OrderError(Exception):
+    """Rejected request; ``code`` is the OKX ``sCode`` the stand-in reports."""
+    def __init__(self, code: str, msg: str):
+        super().__init__(msg); self.code = code; self.msg = msg
+
+@dataclass
+class SimOrder:
+    ord_id: str
+    inst_id: str
+    side: str                  # buy | sell
+    sz: float
+    px: float = 0.0            # 0 for market orders
+    ord_type: str = "limit"    # limit | market | post_only | ioc | fok
+    cl_ord_id: str = ""
+    pos_side: str = "net"
+    reduce_only: bool = False
+    owner: str = "user"        # "user" orders are reported on the private channels; "flow" is synthetic liquidity
+    td_mode: str = "cross"
+    attach: list = field(default_factory=list)
+    state: str = "live"        # live | partially_filled | filled | canceled
+    filled: float = 0.0
+    notional: float = 0.0
+    fee: float = 0.0
+    c_time: int = 0
+    u_time: int = 0
+    fill_px: float = 0.0       # last fill (orders channel fillPx/fillSz)
+    fill_sz: float = 0.0
+    trade_id: str = ""
+
+    @property
+    def remaining(self) -> float: return max(0.0, self.sz - self.filled)
+    @property
+    def avg_px(self) -> float: return self.notional / self.filled if self.filled > EPS else 0.0
+    @property
+    def done(self) -> bool: return self.state in ("filled", "canceled")
+
+@dataclass
+class Fill:
+    trade_id: str
+    inst_id: str
+    px: float
+    sz: float
+    taker_side: str
+    maker: SimOrder
+    taker: SimOrder
+    ts: int
+
+class OrderBook:
+    """
+    Price-time priority book for one instrument.  Prices are held as integer
+    ticks; each level is a FIFO ``deque``; level keys are kept sorted (bids
+    negated) so the best level of either side is index 0.
+    """
+    def __init__(self, inst_id: str, tick: float):
+        self.inst_id = inst_id; self.tick = tick
+        self._lv: Dict[str, Dict[int, Deque[SimOrder]]] = {"buy": {}, "sell": {}}
+        self._keys: Dict[str, List[int]] = {"buy": [], "sell": []}
+        self._where: Dict[str, Tuple[str, int]] = {}
+        self.seq = 0
+
+    def ticks(self, px: float) -> int: return int(round(px / self.tick))
+    def _sk(self, side: str, k: int) -> int: return -k if side == "buy" else k
+
+    def best(self, side: str) -> Optional[float]:
+        ks = self._keys[side]
+        return abs(ks[0]) * self.tick if ks else None
+
+    def __contains__(self, ord_id: str) -> bool: return ord_id in self._where
+
+    def rest(self, o: SimOrder):
+        k = self.ticks(o.px); lv = self._lv[o.side]
+        q = lv.get(k)
+        if q is None:
+            q = lv[k] = deque(); bisect.insort(self._keys[o.side], self._sk(o.side, k))
+        q.append(o); self._where[o.ord_id] = (o.side, k); self.seq += 1
+
+    def unlink(self, o: SimOrder) -> bool:
+        w = self._where.pop(o.ord_id, None)
+        if w is None: return False
+        side, k = w; q = self._lv[side][k]; q.remove(o)
+        if not q: self._drop_level(side, k)
+        self.seq += 1
+        return True
+
+    def _drop_level(self, side: str, k: int):
+        del self._lv[side][k]; ks = self._keys[side]
+        ks.pop(bisect.bisect_left(ks, self._sk(side, k)))
+
+    def crosses(self, side: str, px: float) -> bool:
+        b = self.best("sell" if side == "buy" else "buy")
+        if b is None: return False
+        return px >= b - EPS if side == "buy" else px <= b + EPS
+
+    def available(self, side: str, px: Optional[float]) -> float:
+        """Opposite-side size an order on ``side`` limited at ``px`` could take."""
+        opp = "sell" if side == "buy" else "buy"; tot = 0.0
+        for sk in self._keys[opp]:
+            k = abs(sk)
+            if px is not None and (k * self.tick > px + EPS if side == "buy" else k * self.tick < px - EPS): break
+            tot += sum(o.remaining for o in self._lv[opp][k])
+        return tot
+
+    def match(self, o: SimOrder, ts: int, ids) -> List[Fill]:
+        opp = "sell" if o.side == "buy" else "buy"; ks = self._keys[opp]; fills = []
+        limit = o.px if o.ord_type != "market" else None
+        while o.remaining > EPS and ks:
+            k = abs(ks[0]); px = k * self.tick
+            if limit is not None and (px > limit + EPS if o.side == "buy" else px < limit - EPS): break
+            q = self._lv[opp][k]
+            while q and o.remaining > EPS:
+                m = q[0]; x = min(m.remaining, o.remaining); tid = str(next(ids))
+                for a in (m, o):
+                    a.filled += x; a.notional += x * px; a.fill_px = px; a.fill_sz = x; a.trade_id = tid; a.u_time = ts
+                    a.state = "filled" if a.remaining <= EPS else "partially_filled"
+                fills.append(Fill(tid, self.inst_id, px, x, o.side, m, o, ts))
+                if m.remaining <= EPS:
+                    q.popleft(); self._where.pop(m.ord_id, None)
+            if not q: self._drop_level(opp, k)
+        if fills: self.seq += 1
+        return fills
+
+    def depth(self, n: int = 5) -> Tuple[List[Tuple[float, float, int]], List[Tuple[float, float, int]]]:
+        out = []
+        for side in ("buy", "sell"):
+            lv = []
+            for sk in self._keys[side][:n]:
+                k = abs(sk); q = self._lv[side][k]
+                lv.append((k * self.tick, sum(x.remaining for x in q), len(q)))
+            out.append(lv)
+        return out[0], out[1]
+
+    def orders(self, owner: Optional[str] = None) -> List[SimOrder]:
+        return [o for side in ("buy", "sell") for q in self._lv[side].values() for o in q if owner is None or o.owner == owner]
+
+class MatchingEngine:
+    """
+    Multi-instrument matching with OKX order semantics: ``limit``, ``market``,
+    ``post_only`` (canceled instead of taking), ``ioc`` and ``fok``.
+    Listeners receive ``("order", SimOrder)`` on every state change of a user
+    order and ``("trade", Fill)`` for every execution.
+    """
+    def __init__(self):
+        self.books: Dict[str, OrderBook] = {}
+        self.orders: Dict[str, SimOrder] = {}          # user orders by ordId
+        self._cl: Dict[Tuple[str, str], str] = {}      # (instId, clOrdId) -> ordId
+        self._oids = itertools.count(1); self._tids = itertools.count(1)
+        self.listeners: List[Callable[[str, object], None]] = []
+        self.last_px: Dict[str, float] = {}
+
+    def add_instrument(self, inst_id: str, tick: float) -> OrderBook:
+        b = self.books[inst_id] = OrderBook(inst_id, tick)
+        return b
+
+    def _emit(self, kind: str, obj):
+        for f in self.listeners: f(kind, obj)
+
+    def _book(self, inst_id: str) -> OrderBook:
+        b = self.books.get(inst_id)
+        if b is None: raise OrderError("51001", f"Instrument ID {inst_id} does not exist")
+        return b
+
+    def get(self, inst_id: str, ord_id: str = "", cl_ord_id: str = "") -> SimOrder:
+        oid = ord_id or self._cl.get((inst_id, cl_ord_id), "")
+        o = self.orders.get(oid)
+        if o is None or o.inst_id != inst_id: raise OrderError("51603", "Order does not exist")
+        return o
+
+    def submit(self, o: SimOrder, ts: int) -> SimOrder:
+        b = self._book(o.inst_id)
+        if o.sz <= EPS: raise OrderError("51000", "Parameter sz error")
+        if o.ord_type != "market" and o.px <= 0: raise OrderError("51000", "Parameter px error")
+        if o.cl_ord_id and o.owner == "user" and (o.inst_id, o.cl_ord_id) in self._cl:
+            raise OrderError("51016", "Duplicated clOrdId")
+        o.ord_id = o.ord_id or str(next(self._oids)); o.c_time = o.u_time = ts
+        if o.owner == "user":
+            self.orders[o.ord_id] = o
+            if o.cl_ord_id: self._cl[(o.inst_id, o.cl_ord_id)] = o.ord_id
+            self._emit("order", o)
+        if o.ord_type == "post_only" and b.crosses(o.side, o.px):
+            return self._kill(o, ts)
+        if o.ord_type == "fok" and b.available(o.side, o.px) < o.sz - EPS:
+            return self._kill(o, ts)
+        self._fills(b.match(o, ts, self._tids))
+        if o.remaining > EPS:
+            if o.ord_type in ("limit", "post_only"): b.rest(o)
+            else: return self._kill(o, ts)
+        return o
+
+    def _fills(self, fills: List[Fill]):
+        for f in fills:
+            self.last_px[f.inst_id] = f.px
+            self._emit("trade", f)
+            for a in (f.maker, f.taker):
+                if a.owner == "user": self._emit("order", a)
+
+    def _kill(self, o: SimOrder, ts: int) -> SimOrder:
+        o.state = "canceled"; o.u_time = ts; o.fill_sz = 0.0
+        if o.owner == "user": self._emit("order", o)
+        return o
+
+    def cancel(self, inst_id: str, ord_id: str = "", cl_ord_id: str = "", ts: int = 0) -> SimOrder:
+        o = self.get(inst_id, ord_id, cl_ord_id)
+        if o.done: raise OrderError("51400", "Order cancellation failed as the order has been filled, canceled or does not exist")
+        self.books[inst_id].unlink(o)
+        return self._kill(o, ts)
+
+    def cancel_owner(self, inst_id: str, owner: str):
+        b = self.books[inst_id]
+        for o in b.orders(owner): b.unlink(o); o.state = "canceled"
+
+    def amend(self, inst_id: str, ord_id: str = "", cl_ord_id: str = "", new_sz: float = 0.0, new_px: float = 0.0, ts: int = 0) -> SimOrder:
+        o = self.get(inst_id, ord_id, cl_ord_id); b = self.books[inst_id]
+        if o.done: raise OrderError("51503", "Order modification failed as the order has been filled, canceled or does not exist")
+        if new_sz and new_sz <= o.filled + EPS: raise OrderError("51512", "New size must be greater than the filled size")
+        keep = (not new_px or abs(new_px - o.px) < EPS) and (not new_sz or new_sz <= o.sz)
+        if new_sz: o.sz = new_sz
+        o.fill_sz = 0.0; o.u_time = ts
+        if keep:                       # size-down keeps time priority
+            self._emit("order", o); return o
+        b.unlink(o)
+        if new_px: o.px = new_px
+        if o.ord_type == "post_only" and b.crosses(o.side, o.px): return self._kill(o, ts)
+        self._emit("order", o)
+        self._fills(b.match(o, ts, self._tids))
+        if o.remaining > EPS: b.rest(o)
+        return o
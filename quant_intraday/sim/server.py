@@ -0,0 +1,261 @@
+"""FastAPI transport for the local OKX stand-in (``qi sim-exchange``).
+
+REST under ``/api/v5/...`` and WebSockets at ``/ws/v5/{public,private,business}``
+(each path serves every channel; private channels and order ops need a
+``login``, which is accepted without verifying the signature).  Point a bot at
+it with ``OKX_REST_BASE=http://host:port``, ``OKX_WSS_PUBLIC=ws://host:port/ws/v5/public``
+and ``OKX_WSS_PRIVATE=ws://host:port/ws/v5/private``.
+"""
+import os, json, time, asyncio, itertools
+from typing import Dict, List, Optional, Set, Tuple
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
+from .exchange import SimExchange, SimInstrument, inst_defaults, BAR_MS
+from .flow import FlowDriver, read_tape
+from .matching import OrderError
+from ..engine.l2book import okx_checksum
+
+PRIVATE_CHANNELS = ("orders", "positions", "account")
+
+def _env(data: list, code: str = "0", msg: str = "") -> dict:
+    return {"code": code, "msg": msg, "data": data}
+
+def _rows(fn, items: List[dict]) -> dict:
+    """Run ``fn`` per request row; OKX batch envelope (code 0 all ok / 1 all failed / 2 partial)."""
+    out = []
+    for d in items:
+        try: out.append(fn(d))
+        except OrderError as e: out.append({"ordId": d.get("ordId", ""), "clOrdId": d.get("clOrdId", ""), "sCode": e.code, "sMsg": e.msg})
+    bad = sum(1 for r in out if r.get("sCode") != "0")
+    code = "0" if not bad else ("1" if bad == len(out) else "2")
+    return _env(out, code, "" if code == "0" else "Operation failed." if code == "1" else "Bulk operation partially succeeded.")
+
+class _Conn:
+    def __init__(self, ws: WebSocket, maxsize: int = 2000):
+        self.ws = ws; self.subs: Set[Tuple[str, str]] = set(); self.private = False
+        self.q: asyncio.Queue = asyncio.Queue(maxsize); self.dropped = 0
+
+    def push(self, text: str):
+        try: self.q.put_nowait(text)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            try: self.q.get_nowait(); self.q.put_nowait(text)
+            except (asyncio.QueueEmpty, asyncio.QueueFull): pass
+
+    async def writer(self):
+        while True:
+            await self.ws.send_text(await self.q.get())
+
+class SimServer:
+    """Drives flow every ``tick_s`` and pushes what changed; ``latency_ms`` delays every trading request."""
+    def __init__(self, ex: SimExchange, flows: List[FlowDriver], tick_s: float = 0.05, latency_ms: float = 0.0):
+        self.ex = ex; self.flows = flows; self.tick_s = tick_s; self.latency_ms = latency_ms
+        self.conns: Set[_Conn] = set(); self._seq_sent: Dict[str, int] = {}
+        self._conn_ids = itertools.count(1); self.steps = 0
+
+    async def delay(self):
+        if self.latency_ms: await asyncio.sleep(self.latency_ms / 1000.0)
+
+    async def pump(self):
+        last = time.perf_counter()
+        while True:
+            await asyncio.sleep(self.tick_s)
+            now = time.perf_counter(); dt = now - last; last = now
+            try:
+                for f in self.flows: f.step(dt)
+                self.ex.check_algos(); self.steps += 1
+                self.publish()
+            except Exception as e:  # keep the stand-in alive; the bot under test sees a gap, not a dead server
+                print("[SIM] step error:", e)
+
+    def _send(self, key: Tuple[str, str], arg: dict, data: list, action: Optional[str] = None):
+        subs = [c for c in self.conns if key in c.subs]
+        if not subs: return
+        msg = {"arg": arg, "data": data}
+        if action: msg["action"] = action
+        text = json.dumps(msg)
+        for c in subs: c.push(text)
+
+    def publish(self):
+        ex = self.ex
+        orders, trades, pos_dirty = ex.pop_events()
+        wanted = {k for c in self.conns for k in c.subs}
+        for inst, b in ex.engine.books.items():
+            if self._seq_sent.get(inst) == b.seq: continue
+            prev = self._seq_sent.get(inst, -1); self._seq_sent[inst] = b.seq
+            if ("books5", inst) in wanted:
+                self._send(("books5", inst), {"channel": "books5", "instId": inst}, [ex.book5(inst, 5)])
+            if ("books", inst) in wanted:
+                d = ex.book5(inst, 400); d["prevSeqId"] = -1
+                d["checksum"] = okx_checksum(d["bids"], d["asks"])
+                self._send(("books", inst), {"channel": "books", "instId": inst}, [d], "snapshot")
+            if ("tickers", inst) in wanted:
+                self._send(("tickers", inst), {"channel": "tickers", "instId": inst}, [ex.ticker(inst)])
+        for inst, fills in trades.items():
+            if ("trades", inst) in wanted:
+                self._send(("trades", inst), {"channel": "trades", "instId": inst},
+                           [{"instId": inst, "tradeId": f.trade_id, "px": str(f.px), "sz": str(f.sz), "side": f.taker_side, "ts": str(f.ts)} for f in fills])
+            for ch, i in wanted:
+                if i == inst and ch.startswith("candle") and ch[6:] in BAR_MS:
+                    self._send((ch, inst), {"channel": ch, "instId": inst}, ex.candles[inst].bars(ch[6:], limit=1))
+        if orders:
+            by_inst: Dict[str, list] = {}
+            for d in orders: by_inst.setdefault(d["instId"], []).append(d)
+            for c in self.conns:
+                if not c.private or not any(k[0] == "orders" for k in c.subs): continue
+                for inst, ds in by_inst.items():
+                    c.push(json.dumps({"arg": {"channel": "orders", "instType": "SWAP"}, "data": ds}))
+        if pos_dirty:
+            pos = json.dumps({"arg": {"channel": "positions", "instType": "SWAP"}, "data": ex.positions()})
+            acc = json.dumps({"arg": {"channel": "account"}, "data": [ex.balance()]})
+            for c in self.conns:
+                if not c.private: continue
+                if any(k[0] == "positions" for k in c.subs): c.push(pos)
+                if any(k[0] == "account" for k in c.subs): c.push(acc)
+
+    # ---- websocket ----
+    async def serve_ws(self, ws: WebSocket):
+        await ws.accept()
+        c = _Conn(ws); self.conns.add(c); w = asyncio.get_running_loop().create_task(c.writer())
+        try:
+            while True:
+                try: m = json.loads(await ws.receive_text())
+                except ValueError: continue
+                if m == "ping": continue
+                op = m.get("op")
+                if op == "login":
+                    c.private = True; c.push(json.dumps({"event": "login", "code": "0", "msg": "", "connId": str(next(self._conn_ids))}))
+                elif op in ("subscribe", "unsubscribe"):
+                    for a in m.get("args", []):
+                        ch = a.get("channel", "")
+                        if ch in PRIVATE_CHANNELS and not c.private:
+                            c.push(json.dumps({"event": "error", "code": "60011", "msg": "Please log in"})); continue
+                        key = (ch, "" if ch in PRIVATE_CHANNELS else a.get("instId", ""))
+                        (c.subs.add if op == "subscribe" else c.subs.discard)(key)
+                        c.push(json.dumps({"event": op, "arg": a}))
+                        if op == "subscribe": self._initial(c, key, a)
+                elif op in ("order", "batch-orders", "cancel-order", "batch-cancel-orders", "amend-order", "batch-amend-orders"):
+                    if not c.private:
+                        c.push(json.dumps({"id": m.get("id", ""), "op": op, "code": "60011", "msg": "Please log in", "data": []})); continue
+                    await self.delay()
+                    fn = {"order": self.ex.place, "batch-orders": self.ex.place, "cancel-order": self.ex.cancel,
+                          "batch-cancel-orders": self.ex.cancel, "amend-order": self.ex.amend, "batch-amend-orders": self.ex.amend}[op]
+                    r = _rows(fn, m.get("args", []))
+                    c.push(json.dumps({"id": m.get("id", ""), "op": op, **r}))
+                    self.publish()
+        except WebSocketDisconnect:
+            pass
+        finally:
+            self.conns.discard(c); w.cancel()
+
+    def _initial(self, c: _Conn, key: Tuple[str, str], arg: dict):
+        ch, inst = key; ex = self.ex
+        if inst and inst not in ex.inst: return
+        if ch == "books5": c.push(json.dumps({"arg": arg, "data": [ex.book5(inst, 5)]}))
+        elif ch == "books":
+            d = ex.book5(inst, 400); d["prevSeqId"] = -1; d["checksum"] = okx_checksum(d["bids"], d["asks"])
+            c.push(json.dumps({"arg": arg, "action": "snapshot", "data": [d]}))
+        elif ch == "tickers": c.push(json.dumps({"arg": arg, "data": [ex.ticker(inst)]}))
+        elif ch.startswith("candle") and ch[6:] in BAR_MS: c.push(json.dumps({"arg": arg, "data": ex.candles[inst].bars(ch[6:], limit=1)}))
+        elif ch == "account": c.push(json.dumps({"arg": arg, "data": [ex.balance()]}))
+        elif ch == "positions": c.push(json.dumps({"arg": arg, "data": ex.positions()}))
+
+def create_app(sim: SimServer) -> FastAPI:
+    app = FastAPI(title="OKX stand-in", version="0.1.0"); ex = sim.ex
+
+    @app.on_event("startup")
+    async def _start():
+        app.state.pump = asyncio.get_running_loop().create_task(sim.pump())
+
+    @app.get("/api/v5/public/time")
+    async def public_time(): return _env([{"ts": str(ex.now())}])
+
+    @app.get("/api/v5/public/instruments")
+    async def instruments(instType: str = "SWAP", instId: str = ""):
+        if instType != "SWAP": return _env([])
+        return _env([i.meta() for k, i in ex.inst.items() if not instId or k == instId])
+
+    @app.get("/api/v5/public/mark-price")
+    async def mark_price(instId: str):
+        return _env([{"instType": "SWAP", "instId": instId, "markPx": str(ex.marks().get(instId, 0)), "ts": str(ex.now())}] if instId in ex.inst else [])
+
+    @app.get("/api/v5/public/funding-rate")
+    async def funding_rate(instId: str):
+        return _env([{"instType": "SWAP", "instId": instId, "fundingRate": "0.0001", "nextFundingRate": "0.0001",
+                      "fundingTime": str(ex.now() - ex.now() % 28_800_000 + 28_800_000)}] if instId in ex.inst else [])
+
+    @app.get("/api/v5/market/ticker")
+    async def ticker(instId: str): return _env([ex.ticker(instId)] if instId in ex.inst else [])
+
+    @app.get("/api/v5/market/books")
+    async def books(instId: str, sz: int = 5): return _env([ex.book5(instId, sz)] if instId in ex.inst else [])
+
+    @app.get("/api/v5/market/candles")
+    async def candles(instId: str, bar: str = "1m", after: int = 0, before: int = 0, limit: int = 100):
+        if instId not in ex.inst: return _env([], "51001", f"Instrument ID {instId} does not exist")
+        return _env(ex.candles[instId].bars(bar, after, before, min(limit, 300)))
+
+    @app.get("/api/v5/market/history-candles")
+    async def history_candles(instId: str, bar: str = "1m", after: int = 0, before: int = 0, limit: int = 100):
+        if instId not in ex.inst: return _env([], "51001", f"Instrument ID {instId} does not exist")
+        return _env(ex.candles[instId].bars(bar, after, before, min(limit, 100)))
+
+    @app.get("/api/v5/account/balance")
+    async def balance(): return _env([ex.balance()])
+
+    @app.get("/api/v5/account/positions")
+    async def positions(instId: str = ""): return _env(ex.positions(instId))
+
+    @app.get("/api/v5/trade/order")
+    async def get_order(instId: str, ordId: str = "", clOrdId: str = ""):
+        try: return _env([ex.get_order(instId, ordId, clOrdId)])
+        except OrderError as e: return _env([], e.code, e.msg)
+
+    async def _trade(request: Request, fn, many: bool):
+        await sim.delay()
+        body = await request.json()
+        r = _rows(fn, body if many else [body])
+        sim.publish()
+        return r
+
+    routes = {"/api/v5/trade/order": (ex.place, False), "/api/v5/trade/batch-orders": (ex.place, True),
+              "/api/v5/trade/cancel-order": (ex.cancel, False), "/api/v5/trade/cancel-batch-orders": (ex.cancel, True),
+              "/api/v5/trade/amend-order": (ex.amend, False), "/api/v5/trade/amend-batch-orders": (ex.amend, True),
+              "/api/v5/trade/order-algo": (ex.place_algo, False), "/api/v5/trade/amend-algos": (ex.amend_algo, False),
+              "/api/v5/trade/cancel-algos": (ex.cancel_algo, True)}
+    def _route(fn, many):              # closure, not defaults: FastAPI would treat those as query params
+        async def handler(request: Request): return await _trade(request, fn, many)
+        return handler
+    for path, (fn, many) in routes.items():
+        app.post(path)(_route(fn, many))
+
+    @app.get("/sim/stats")
+    async def stats():
+        return {"steps": sim.steps, "conns": len(sim.conns), "dropped": sum(c.dropped for c in sim.conns),
+                "orders": len(ex.engine.orders), "equity": ex.balance()["totalEq"], "last": ex.engine.last_px}
+
+    @app.websocket("/ws/v5/{kind}")
+    async def ws(websocket: WebSocket, kind: str): await sim.serve_ws(websocket)
+
+    return app
+
+def build(insts: List[str], flow: str = "synthetic", equity: float = 10_000.0, tick_ms: float = 50.0, latency_ms: float = 0.0,
+          speed: float = 1.0, seed: int = 7, history_bars: int = 20_000, taker_hz: float = 4.0) -> SimServer:
+    """``insts`` items are ``INST`` or ``INST:MID``; ``flow`` is ``synthetic`` or a trades CSV path (single instrument)."""
+    specs = []
+    for s in insts:
+        inst, _, mid = s.partition(":"); m, tick, ct = inst_defaults(inst)
+        specs.append(SimInstrument(inst, float(mid) if mid else m, tick, ct))
+    tape = read_tape(flow) if flow != "synthetic" else None
+    if tape: specs[0].mid = tape[0][1]
+    ex = SimExchange(specs, equity=equity, history_bars=history_bars, seed=seed)
+    flows = [FlowDriver(ex, sp.inst_id, taker_hz=taker_hz, tape=tape if k == 0 else None, speed=speed) for k, sp in enumerate(specs)]
+    for f in flows: f.step(0.0)
+    return SimServer(ex, flows, tick_s=tick_ms / 1000.0, latency_ms=latency_ms)
+
+def main(host: str = "127.0.0.1", port: int = 8765, insts: Optional[List[str]] = None, **kw):
+    import uvicorn
+    sim = build(insts or ["BTC-USDT-SWAP"], **kw)
+    print(f"export OKX_REST_BASE=http://{host}:{port}")
+    print(f"export OKX_WSS_PUBLIC=ws://{host}:{port}/ws/v5/public")
+    print(f"export OKX_WSS_PRIVATE=ws://{host}:{port}/ws/v5/private")
+    uvicorn.run(create_app(sim), host=host, port=port, log_level="warning", ws_ping_interval=None)
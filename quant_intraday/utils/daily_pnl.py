@@ -0,0 +1,73 @@
+import os, json, time, datetime
+from typing import Dict, Optional
+
+FILE = "daily_pnl.json"
+
+class DailyPnL:
+    """
+    Running UTC-day PnL/drawdown maintained from equity snapshots.
+    - ``update(equity)`` is O(1): rolls the day, tracks start/last/peak and the
+      worst intraday drawdown; state is persisted to ``daily_pnl.json`` at most
+      every ``persist_s`` seconds (and on day roll) so restarts keep the day start.
+    - ``today()``/``drawdown()`` are plain attribute reads for risk guards.
+    """
+    def __init__(self, log_dir: str = "live_output", persist_s: float = 10.0):
+        self.path = os.path.join(log_dir, FILE); self.persist_s = persist_s
+        self.day = ""; self.start = self.last = self.peak = 0.0; self.maxdd = 0.0; self.ts = 0
+        self._saved = 0.0
+        s = read_state(log_dir)
+        if s and s.get("day") == _day():
+            self.day = s["day"]; self.start = float(s["start"]); self.last = float(s["last"])
+            self.peak = float(s["peak"]); self.maxdd = float(s["maxdd"]); self.ts = int(s.get("ts", 0))
+
+    def update(self, equity: float, ts_ms: Optional[int] = None):
+        equity = float(equity)
+        ts_ms = int(ts_ms if ts_ms is not None else time.time() * 1000)
+        day = _day(ts_ms / 1000.0); rolled = day != self.day
+        if rolled:
+            self.day = day; self.start = self.peak = equity; self.maxdd = 0.0
+        self.last = equity; self.ts = ts_ms
+        if equity > self.peak: self.peak = equity
+        elif self.peak > 0:
+            dd = equity / self.peak - 1.0
+            if dd < self.maxdd: self.maxdd = dd
+        if rolled or time.time() - self._saved >= self.persist_s: self.save()
+
+    def today(self) -> float:
+        return (self.last - self.start) if self.day == _day() else 0.0
+
+    def drawdown(self) -> float:
+        return self.maxdd if self.day == _day() else 0.0
+
+    def state(self) -> Dict:
+        return {"day": self.day, "start": self.start, "last": self.last, "peak": self.peak,
+                "maxdd": self.maxdd, "pnl": self.last - self.start, "ts": self.ts}
+
+    def save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f: json.dump(self.state(), f)
+            os.replace(tmp, self.path)
+            self._saved = time.time()
+        except Exception:
+            pass
+
+def _day(t: Optional[float] = None) -> str:
+    return datetime.datetime.fromtimestamp(time.time() if t is None else t, datetime.timezone.utc).date().isoformat()
+
+def read_state(log_dir: str = "live_output") -> Optional[Dict]:
+    """Last persisted tracker state (for other processes, e.g. the metrics exporter)."""
+    try:
+        with open(os.path.join(log_dir, FILE), "r", encoding="utf-8") as f: return json.load(f)
+    except Exception:
+        return None
+
+_TRACKERS: Dict[str, DailyPnL] = {}
+
+def get_daily_pnl(log_dir: str = "live_output") -> DailyPnL:
+    """One tracker per log dir, shared by every bot in the process."""
+    key = os.path.abspath(log_dir)
+    t = _TRACKERS.get(key)
+    if t is None: t = _TRACKERS[key] = DailyPnL(log_dir)
+    return t
@@ -1,38 +1,168 @@
-import os, csv, threading
+"""Execution event log (``execlog.csv``) appender.
+
+The header of each log is resolved once and cached per path, so a write is a
+dict lookup plus an enqueue on the shared background writer
+(``utils.logwriter``).  History is never rewritten: when an event carries a
+key the current header does not have, a new schema segment is opened next to
+the base file (``execlog.v2.csv``, ``execlog.v3.csv`` ...) with the union
+header.  ``read_events`` concatenates every segment back into one frame.
+Files are created with their header in place (hard link of a temp file), so
+processes sharing a log never write two schemas into one segment: a process
+that loses the race adopts the other's segment if its header covers the
+event, else moves on to the next version.  Positional rows (the bots'
+``_exec_w``) go through ``RowWriter`` so they share the same schema.
+
+``QI_EXECLOG_FORMAT=npz`` switches to a compact columnar format for high-rate
+events: rows are buffered and written in chunks of ``QI_EXECLOG_CHUNK`` rows
+as ``execlog.<n>.npz`` (one array per column, numeric columns as float64).
+"""
+import os, io, re, csv, glob, atexit, threading
+from typing import Dict, List, Optional
+from .logwriter import get_writer, find_writer
 
 _lock = threading.Lock()
 
-def _ensure_header(path, keys):
-    exists = os.path.exists(path) and os.path.getsize(path)>0
-    if not exists:
-        os.makedirs(os.path.dirname(path), exist_ok=True)
-        with open(path, "w", newline="", encoding="utf-8") as f:
-            w = csv.DictWriter(f, fieldnames=list(keys))
-            w.writeheader()
-            return list(keys)
-    else:
-        # read header
+def _split(path):
+    stem, ext = os.path.splitext(path)
+    return stem, ext or ".csv"
+
+def segments(path) -> List[str]:
+    """Base file followed by its schema segments (``<stem>.v<n><ext>``), oldest first; other files are ignored."""
+    stem, ext = _split(path)
+    seg = re.compile(re.escape(stem) + r"\.v(\d+)" + re.escape(ext) + "$")
+    segs = [(int(m.group(1)), p) for p in glob.glob(f"{glob.escape(stem)}.v*{ext}") for m in [seg.match(p)] if m]
+    return ([path] if os.path.exists(path) else []) + [p for _, p in sorted(segs)]
+
+def _read_header(path) -> List[str]:
+    try:
         with open(path, "r", newline="", encoding="utf-8") as f:
-            r = csv.reader(f)
-            header = next(r, [])
-        # if header lacks keys, rewrite header by merging
-        union = list(dict.fromkeys([*header, *keys]))
-        if union != header:
-            # rewrite whole file with new header
-            rows = []
-            with open(path, "r", newline="", encoding="utf-8") as f:
-                r = csv.DictReader(f)
-                rows = list(r)
-            with open(path, "w", newline="", encoding="utf-8") as f:
-                w = csv.DictWriter(f, fieldnames=union)
-                w.writeheader()
-                for row in rows:
-                    w.writerow(row)
-        return union
+            return next(csv.reader(f), [])
+    except OSError:
+        return []
+
+def _create(path, header) -> bool:
+    """Create ``path`` holding just ``header``; False if it already exists."""
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f: f.write(",".join(header) + "\n")
+    try:
+        os.link(tmp, path); return True
+    except FileExistsError:
+        return False
+    finally:
+        os.remove(tmp)
+
+class _CsvLog:
+    __slots__ = ("path", "header", "fields", "writer", "version")
+    def __init__(self, path):
+        self.path = path
+        segs = segments(path)
+        cur = segs[-1] if segs else path
+        self.version = 1 if cur == path else int(cur[len(_split(path)[0])+2:-len(_split(path)[1])])
+        self.header = _read_header(cur) if segs else []
+        self.writer = get_writer(cur) if segs else None
+        w = find_writer(cur)
+        if not self.header and w is not None and w.header:
+            # another component owns this file and has not flushed its header yet
+            self.header = w.header.strip().split(","); self.writer = w
+        self.fields = set(self.header)
+
+    def _open_segment(self, keys):
+        union = list(dict.fromkeys([*self.header, *keys]))
+        stem, ext = _split(self.path)
+        v = self.version if self.writer is None and not self.header else self.version + 1
+        while True:
+            target = self.path if v == 1 else f"{stem}.v{v}{ext}"
+            if _create(target, union): break
+            theirs = _read_header(target)
+            if set(theirs).issuperset(union):
+                union = theirs; break
+            v += 1
+        self.version = v; self.header = union; self.fields = set(union)
+        self.writer = get_writer(target, ",".join(union))
+
+    def write(self, data: dict):
+        if self.writer is None or not self.fields.issuperset(data.keys()):
+            with _lock:
+                if self.writer is None or not self.fields.issuperset(data.keys()):
+                    self._open_segment(data.keys())
+        buf = io.StringIO()
+        csv.writer(buf, lineterminator="\n").writerow([data.get(k, "") for k in self.header])
+        self.writer.write(buf.getvalue())
+
+class _NpzLog:
+    def __init__(self, path, chunk: int):
+        self.stem = _split(path)[0]; self.chunk = chunk
+        self.rows: List[dict] = []
+        self.n = len(glob.glob(f"{glob.escape(self.stem)}.*.npz"))
+
+    def write(self, data: dict):
+        self.rows.append(data)
+        if len(self.rows) >= self.chunk: self.flush()
+
+    def flush(self):
+        import numpy as np
+        with _lock:
+            rows, self.rows = self.rows, []
+            if not rows: return
+            path = f"{self.stem}.{self.n:06d}.npz"; self.n += 1
+        cols = {}
+        for k in dict.fromkeys(k for r in rows for k in r):
+            vals = [r.get(k, "") for r in rows]
+            try: cols[k] = np.asarray([float("nan") if v == "" else float(v) for v in vals])
+            except (TypeError, ValueError): cols[k] = np.asarray([str(v) for v in vals])
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        np.savez_compressed(path, **cols)
+
+_LOGS: Dict[str, object] = {}
+
+def _log_for(path):
+    log = _LOGS.get(path)
+    if log is None:
+        with _lock:
+            log = _LOGS.get(path)
+            if log is None:
+                if os.getenv("QI_EXECLOG_FORMAT", "csv").lower() == "npz":
+                    log = _NpzLog(path, int(os.getenv("QI_EXECLOG_CHUNK", "5000")))
+                else:
+                    d = os.path.dirname(path)
+                    if d: os.makedirs(d, exist_ok=True)
+                    log = _CsvLog(path)
+                _LOGS[path] = log
+    return log
 
 def write_event(path, data: dict):
-    with _lock:
-        header = _ensure_header(path, data.keys())
-        with open(path, "a", newline="", encoding="utf-8") as f:
-            w = csv.DictWriter(f, fieldnames=header)
-            w.writerow(data)
+    _log_for(path).write(data)
+
+class RowWriter:
+    """``write(line)`` for positional CSV rows of ``fields``, appended to ``path`` as events."""
+    def __init__(self, path, fields):
+        self.path = path; self.fields = tuple(fields)
+
+    def write(self, line: str):
+        for row in csv.reader(io.StringIO(line)):
+            if row: write_event(self.path, dict(zip(self.fields, row)))
+
+@atexit.register
+def flush_columnar():
+    for log in list(_LOGS.values()):
+        if isinstance(log, _NpzLog): log.flush()
+
+def read_events(path, since_ms: Optional[int] = None):
+    """All events for ``path`` (CSV segments and npz chunks) as one DataFrame sorted by ``ts``."""
+    import numpy as np, pandas as pd
+    frames = []
+    for p in segments(path):
+        try: frames.append(pd.read_csv(p))
+        except Exception: pass
+    for p in sorted(glob.glob(f"{glob.escape(_split(path)[0])}.*.npz")):
+        try:
+            with np.load(p) as z: frames.append(pd.DataFrame({k: z[k] for k in z.files}))
+        except Exception: pass
+    frames = [f for f in frames if not f.empty]
+    if not frames: return pd.DataFrame()
+    df = pd.concat(frames, ignore_index=True, sort=False)
+    if "ts" in df:
+        df["ts"] = pd.to_numeric(df["ts"], errors="coerce").fillna(0).astype("int64")
+        if since_ms is not None: df = df[df["ts"] >= since_ms]
+        df = df.sort_values("ts", kind="stable").reset_index(drop=True)
+    return df
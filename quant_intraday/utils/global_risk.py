@@ -1,22 +1,34 @@
-import os, time, pandas as pd
+import os, time
 from .notifier import notify
+from .daily_pnl import read_state, _day
+from .tail import TailReader
 
 class GlobalRiskGuard:
-    """Kill switch by daily drawdown on equity.csv (per-bot) or equity_*.csv (portfolio)."""
-    def __init__(self, log_dir="live_output", dd_limit=0.08):
-        self.log_dir=log_dir; self.dd_limit=dd_limit; self._tripped=False
+    """Kill switch by daily drawdown.
+    Reads the running ``DailyPnL`` (in-process, or its persisted ``daily_pnl.json``);
+    falls back to tailing equity*.csv only when no tracker state exists."""
+    def __init__(self, log_dir="live_output", dd_limit=0.08, pnl=None):
+        self.log_dir=log_dir; self.dd_limit=dd_limit; self._tripped=False; self.pnl=pnl
+        self._tail=TailReader(os.path.join(log_dir, "equity*.csv")); self._peak=0.0; self._dd=0.0
 
     def tripped(self): return self._tripped
 
+    def _drawdown(self):
+        if self.pnl is not None: return self.pnl.drawdown()
+        s=read_state(self.log_dir)
+        if s is not None: return float(s.get("maxdd", 0.0)) if s.get("day")==_day() else 0.0
+        # running peak / max drawdown over the latest equity*.csv, read incrementally
+        lines=self._tail.poll()
+        if self._tail.restarted: self._peak=0.0; self._dd=0.0
+        for line in lines:
+            try: eq=float(line.split(",")[1])
+            except (IndexError, ValueError): continue
+            if eq>self._peak: self._peak=eq
+            elif self._peak>0: self._dd=min(self._dd, eq/self._peak-1.0)
+        return self._dd
+
     def check(self):
-        # Take latest equity*.csv if exists else return False
-        import glob
-        files=sorted(glob.glob(os.path.join(self.log_dir, "equity*.csv")))
-        if not files: return False
-        df=pd.read_csv(files[-1])
-        if "equity" not in df.columns: return False
-        eq=df["equity"]
-        dd = (eq/eq.cummax()-1.0).min()
+        dd = self._drawdown()
         if dd <= -abs(self.dd_limit):
             if not self._tripped:
                 notify("global_dd_trip", {"dd": float(dd)})
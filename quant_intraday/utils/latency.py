@@ -0,0 +1,83 @@
+"""Signal-to-fill latency tracing.
+
+Stages (``time.perf_counter_ns``): signal -> risk_ok -> sent -> ack ->
+first_fill -> full_fill.  ``signal``/``risk_ok`` are stamped per instrument by
+the bot; ``sent``/``ack`` by the client's async order methods (so every
+executor is covered); fills by the private ``orders`` channel, or, without
+it, by the order tracker's REST polls (stamped when the poll answers, so an
+upper bound).  Orders are correlated by ``clOrdId``.  A finished trace is observed once into
+``qi_order_latency_seconds{inst,executor,stage}`` and appended to
+``latency.csv`` for the daily report; recording a stage is a clock read and a
+list store.  ``latency.csv`` goes to the log dir of the first bot that calls
+``use_log_dir`` (``QI_LOG_DIR`` if none did before the first trace finished).
+"""
+import os, time
+from collections import OrderedDict
+from typing import Dict, Optional
+from .metrics import histogram
+from .logwriter import get_writer
+
+SIG, RISK, SENT, ACK, FIRST, FULL = range(6)
+# reported spans: (name, from-stage, to-stage)
+SPANS = (("signal_to_risk", SIG, RISK), ("risk_to_sent", RISK, SENT), ("sent_to_ack", SENT, ACK),
+         ("sent_to_first_fill", SENT, FIRST), ("sent_to_full_fill", SENT, FULL), ("signal_to_full_fill", SIG, FULL))
+HEADER = "ts,inst,executor,clOrdId," + ",".join(f"{n}_us" for n, _, _ in SPANS)
+
+class LatencyTracker:
+    def __init__(self, log_dir: Optional[str] = None, max_open: int = 10000):
+        self.log_dir = log_dir; self.max_open = max_open
+        self._cur: Dict[str, list] = {}                 # inst -> [sig_ns, risk_ns, executor]
+        self._open: "OrderedDict[str, list]" = OrderedDict()  # clOrdId -> [6 stamps, inst, executor]
+        self._hist = None; self._w = None
+
+    def use_log_dir(self, log_dir: str):
+        """Set the log dir on first use (the bot's resolved dir); later calls are ignored."""
+        if self.log_dir is None: self.log_dir = log_dir
+
+    def signal(self, inst: str, executor: str = ""):
+        self._cur[inst] = [time.perf_counter_ns(), 0, executor]
+
+    def risk_ok(self, inst: str):
+        c = self._cur.get(inst)
+        if c: c[1] = time.perf_counter_ns()
+
+    def sent(self, inst: str, cl_ord_id: Optional[str]):
+        if not cl_ord_id: return
+        now = time.perf_counter_ns()
+        c = self._cur.get(inst) or (0, 0, "")
+        self._open[cl_ord_id] = [c[0], c[1], now, 0, 0, 0, inst, c[2]]
+        if len(self._open) > self.max_open: self._finish(*self._open.popitem(last=False))
+
+    def ack(self, cl_ord_id: Optional[str], ok: bool = True):
+        r = self._open.get(cl_ord_id) if cl_ord_id else None
+        if r is None: return
+        r[ACK] = time.perf_counter_ns()
+        if not ok: self._finish(cl_ord_id, self._open.pop(cl_ord_id))
+
+    def on_order(self, d: dict):
+        """Private ``orders`` channel update (or a REST order query result)."""
+        cl = d.get("clOrdId")
+        r = self._open.get(cl) if cl else None
+        if r is None: return
+        now = time.perf_counter_ns(); state = d.get("state", "")
+        if not r[ACK]: r[ACK] = now
+        if state in ("partially_filled", "filled") and not r[FIRST]: r[FIRST] = now
+        if state == "filled": r[FULL] = now
+        if state in ("filled", "canceled", "mmp_canceled"): self._finish(cl, self._open.pop(cl))
+
+    def _finish(self, cl: str, r: list):
+        if self._hist is None:
+            self._hist = histogram("qi_order_latency_seconds", "Order lifecycle latency by stage", ("inst", "executor", "stage"),
+                                   buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30))
+            self.use_log_dir(os.getenv("QI_LOG_DIR", "live_output"))
+            self._w = get_writer(os.path.join(self.log_dir, "latency.csv"), HEADER)
+        inst, ex = r[6], r[7]; cols = []
+        for name, a, b in SPANS:
+            if r[a] and r[b] and r[b] >= r[a]:
+                dt = r[b] - r[a]; cols.append(str(dt // 1000))
+                self._hist.labels(inst, ex, name).observe(dt / 1e9)
+            else:
+                cols.append("")
+        self._w.write(f"{int(time.time()*1000)},{inst},{ex},{cl},{','.join(cols)}")
+
+LATENCY = LatencyTracker()
@@ -0,0 +1,139 @@
+"""Background, batched append-only writers for CSV/log files.
+
+Hot-path callers only pay for ``queue.put``; one daemon thread per file drains
+the queue, writes whole batches, flushes, and fsyncs on a time policy.  All
+writers in a process are shared by path, so several bots appending to the same
+``execlog.csv`` are serialised through one writer instead of racing.
+
+Environment knobs (read when a writer is created):
+- ``QI_LOG_QUEUE``     bounded queue size (default 10000); when full the new line is
+                       dropped and counted (``dropped``, reported by the writer
+                       thread) so the caller, usually the event loop, never blocks.
+- ``QI_LOG_FSYNC_S``   fsync interval in seconds (default 1.0; 0 = every batch, <0 = never).
+- ``QI_LOG_ROTATE_MB`` rotate when the file exceeds this size (default 0 = off).
+- ``QI_LOG_ROTATE_S``  rotate after this many seconds (default 0 = off).
+Rotated files are renamed ``<path>.<YYYYmmdd-HHMMSS>`` and the header is re-written.
+"""
+import os, time, queue, atexit, threading
+from typing import Dict, Optional
+
+_STOP = object()
+
+class LogWriter:
+    def __init__(self, path: str, header: Optional[str] = None, maxsize: int | None = None,
+                 fsync_s: float | None = None, rotate_bytes: int | None = None, rotate_s: float | None = None,
+                 batch: int = 512):
+        self.path = path; self.header = header
+        self.fsync_s = float(os.getenv("QI_LOG_FSYNC_S", "1.0") if fsync_s is None else fsync_s)
+        self.rotate_bytes = int(float(os.getenv("QI_LOG_ROTATE_MB", "0")) * 1e6) if rotate_bytes is None else rotate_bytes
+        self.rotate_s = float(os.getenv("QI_LOG_ROTATE_S", "0") if rotate_s is None else rotate_s)
+        self.batch = batch
+        self._q: queue.Queue = queue.Queue(int(maxsize or os.getenv("QI_LOG_QUEUE", "10000")))
+        self.written = 0; self.dropped = 0; self.errors = 0; self._reported = 0
+        self._f = None; self._opened = 0.0; self._synced = 0.0
+        self._thread = threading.Thread(target=self._run, name=f"logwriter:{os.path.basename(path)}", daemon=True)
+        self._thread.start()
+
+    def write(self, line: str):
+        """Enqueue one line (a trailing newline is added if missing); dropped if the queue is full."""
+        if not line.endswith("\n"): line += "\n"
+        try:
+            self._q.put_nowait(line)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self):
+        """Block until everything enqueued so far is on disk (tests / shutdown)."""
+        self._q.join()
+
+    def close(self):
+        if self._thread.is_alive():
+            self._q.put(_STOP); self._thread.join(timeout=5)
+
+    # --- writer thread ---
+    def _open(self):
+        d = os.path.dirname(self.path)
+        if d: os.makedirs(d, exist_ok=True)
+        new = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        self._f = open(self.path, "a", encoding="utf-8")
+        if new and self.header: self._f.write(self.header if self.header.endswith("\n") else self.header + "\n")
+        self._opened = time.time()
+
+    def _maybe_rotate(self):
+        if not self._f: return
+        size_hit = self.rotate_bytes and self._f.tell() >= self.rotate_bytes
+        time_hit = self.rotate_s and time.time() - self._opened >= self.rotate_s
+        if not (size_hit or time_hit): return
+        self._f.close(); self._f = None
+        dst = f"{self.path}.{time.strftime('%Y%m%d-%H%M%S')}"
+        if os.path.exists(dst): dst += f".{int(time.time()*1000) % 1000:03d}"
+        os.replace(self.path, dst)
+
+    def _run(self):
+        stop = False
+        while not stop:
+            try:
+                item = self._q.get(timeout=max(0.05, self.fsync_s) if self.fsync_s > 0 else 0.5)
+            except queue.Empty:
+                self._sync(); continue
+            buf = []; n = 1
+            if item is _STOP: stop = True
+            else: buf.append(item)
+            while len(buf) < self.batch and not stop:
+                try: item = self._q.get_nowait()
+                except queue.Empty: break
+                n += 1
+                if item is _STOP: stop = True
+                else: buf.append(item)
+            try:
+                if buf:
+                    self._maybe_rotate()
+                    if self._f is None: self._open()
+                    self._f.write("".join(buf)); self._f.flush()
+                    self.written += len(buf)
+                    if self.fsync_s == 0: self._sync(force=True)
+            except Exception as e:
+                self.errors += 1; print("[LOGWRITER]", self.path, e)
+            finally:
+                for _ in range(n): self._q.task_done()
+            if self.dropped != self._reported:
+                print(f"[LOGWRITER] {self.path}: queue full, {self.dropped - self._reported} lines dropped")
+                self._reported = self.dropped
+        self._sync(force=True)
+        if self._f: self._f.close(); self._f = None
+
+    def _sync(self, force: bool = False):
+        if self._f is None or self.fsync_s < 0: return
+        now = time.time()
+        if force or now - self._synced >= self.fsync_s:
+            try: os.fsync(self._f.fileno())
+            except Exception: pass
+            self._synced = now
+
+_WRITERS: Dict[str, LogWriter] = {}
+_lock = threading.Lock()
+
+def get_writer(path: str, header: Optional[str] = None) -> LogWriter:
+    """Shared writer for ``path`` (created on first use; ``header`` only applies to new files)."""
+    key = os.path.abspath(path)
+    w = _WRITERS.get(key)
+    if w is None:
+        with _lock:
+            w = _WRITERS.get(key)
+            if w is None: w = _WRITERS[key] = LogWriter(path, header)
+    return w
+
+def find_writer(path: str) -> Optional[LogWriter]:
+    return _WRITERS.get(os.path.abspath(path))
+
+def append_line(path: str, line: str, header: Optional[str] = None):
+    get_writer(path, header).write(line)
+
+def flush_all():
+    for w in list(_WRITERS.values()): w.flush()
+
+@atexit.register
+def close_all():
+    with _lock:
+        ws = list(_WRITERS.values()); _WRITERS.clear()
+    for w in ws: w.close()
@@ -0,0 +1,54 @@
+"""In-process Prometheus metrics shared by bot components.
+
+Metrics are created lazily and memoised by name, so modules can call
+``counter(...)``/``gauge(...)``/``histogram(...)`` freely.  When
+``prometheus_client`` is missing every metric degrades to a no-op.
+``maybe_serve()`` starts the HTTP endpoint once if ``QI_PROM_PORT`` is set.
+"""
+import os, threading
+
+try:
+    from prometheus_client import Counter, Gauge, Histogram, start_http_server  # type: ignore
+except ImportError:  # pragma: no cover
+    Counter = Gauge = Histogram = start_http_server = None
+
+class _Noop:
+    def labels(self, *a, **k): return self
+    def inc(self, *a, **k): pass
+    def dec(self, *a, **k): pass
+    def set(self, *a, **k): pass
+    def observe(self, *a, **k): pass
+
+_NOOP = _Noop()
+_REG: dict = {}
+_lock = threading.Lock()
+_served = False
+
+def _get(kind, name: str, doc: str, labels=(), **kw):
+    m = _REG.get(name)
+    if m is not None: return m
+    with _lock:
+        m = _REG.get(name)
+        if m is None:
+            m = _REG[name] = kind(name, doc, list(labels), **kw) if kind else _NOOP
+    return m
+
+def counter(name: str, doc: str, labels=()):
+    return _get(Counter, name, doc, labels)
+
+def gauge(name: str, doc: str, labels=()):
+    return _get(Gauge, name, doc, labels)
+
+def histogram(name: str, doc: str, labels=(), buckets=None):
+    kw = {"buckets": buckets} if buckets and Histogram else {}
+    return _get(Histogram, name, doc, labels, **kw)
+
+def maybe_serve(port: int | None = None) -> bool:
+    """Expose /metrics from this process once (``QI_PROM_PORT`` or ``port``)."""
+    global _served
+    port = port or int(os.getenv("QI_PROM_PORT", "0") or 0)
+    if _served or not port or start_http_server is None: return False
+    with _lock:
+        if _served: return False
+        start_http_server(port); _served = True
+    return True
@@ -1,35 +1,49 @@
-import os, time, pandas as pd
+import os, time
+from collections import deque
+from .tail import TailReader
 
 class PerformanceGuard:
     """Pause entries when rolling TP/SL quality deteriorates."""
     def __init__(self, log_dir="live_output", lookback=100, max_consec_loss=3, min_tp_ratio=0.35, cool_s=300):
         self.log_dir=log_dir; self.lookback=lookback; self.max_consec=max_consec_loss; self.min_tp=min_tp_ratio; self.cool_s=cool_s
         self._last_bad=0.0
+        # rolling aggregates over exits.log, fed incrementally by a tail reader
+        self._tail=TailReader(os.path.join(log_dir, "exits.log"))
+        self._reasons=deque(maxlen=lookback); self._tp=0; self._sl=0; self._sl_since_tp=0
+
+    def _reset(self):
+        self._reasons.clear(); self._tp=self._sl=self._sl_since_tp=0
+
+    def _push(self, reason):
+        if len(self._reasons)==self._reasons.maxlen:
+            old=self._reasons[0]
+            if old=="TP": self._tp-=1
+            elif old=="SL": self._sl-=1
+        self._reasons.append(reason)
+        if reason=="TP": self._tp+=1; self._sl_since_tp=0
+        elif reason=="SL": self._sl+=1; self._sl_since_tp+=1
 
     def _read_exits(self):
-        fp=os.path.join(self.log_dir, "exits.log")
-        if not os.path.exists(fp): return []
-        rows=[]
-        for line in open(fp,"r",encoding="utf-8"):
-            try:
-                ts,inst,pos,reason,px,sz=line.strip().split(",")
-                rows.append((int(ts),reason))
-            except Exception: continue
-        return rows[-self.lookback:]
+        lines=self._tail.poll()
+        if self._tail.restarted: self._reset()
+        for line in lines:
+            parts=line.split(",")
+            if len(parts)==6 and parts[0].isdigit(): self._push(parts[3])
+        return len(self._reasons)
+
+    def stats(self):
+        self._read_exits()
+        n=len(self._reasons)
+        # SLs since the last TP, counted inside the window only
+        return {"n": n, "tp_ratio": self._tp/max(1,n), "consec_sl": min(self._sl_since_tp, self._sl)}
 
     def should_pause(self) -> bool:
         now=time.time()
         if now - self._last_bad < self.cool_s:
             return True
-        rows=self._read_exits()
-        if not rows: return False
-        consec=0; tp_count=0; n=0
-        for _,reason in rows:
-            n+=1
-            if reason=="TP": tp_count+=1; consec=0
-            elif reason=="SL": consec+=1
-        hit=tp_count/max(1,n)
-        if consec>=self.max_consec or hit<self.min_tp:
+        st=self.stats()
+        if not st["n"]: return False
+        if st["consec_sl"]>=self.max_consec or st["tp_ratio"]<self.min_tp:
             self._last_bad=now
             return True
         return False
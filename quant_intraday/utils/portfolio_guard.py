@@ -1,7 +1,21 @@
-import os, json, datetime, fcntl
+import os, json, time, sqlite3, hashlib, datetime, threading
 from dataclasses import dataclass
 
-STATE_PATH = os.getenv("QI_RISK_STATE","/tmp/qi_risk_state.json")
+# Shared by every bot process on the host; SQLite in WAL mode gives atomic
+# read-modify-write updates and lock-free snapshot reads.  ``QI_RISK_STATE`` is
+# also re-read per guard, so a harness can isolate its state after import.
+# A JSON state file left by the pre-SQLite guard is imported on first open
+# (and kept as ``<path>.bak``).
+STATE_PATH = os.getenv("QI_RISK_STATE","/tmp/qi_risk_state.db")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS day (acct TEXT PRIMARY KEY, date TEXT NOT NULL,
+    equity_open REAL NOT NULL, equity_now REAL NOT NULL, entries_today INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS instruments (acct TEXT NOT NULL, inst TEXT NOT NULL, active INTEGER NOT NULL, consumed REAL NOT NULL,
+    PRIMARY KEY (acct, inst));
+CREATE TABLE IF NOT EXISTS account_equity (acct TEXT PRIMARY KEY, equity REAL NOT NULL, ts REAL NOT NULL);
+CREATE TABLE IF NOT EXISTS halt (id INTEGER PRIMARY KEY CHECK (id=1), date TEXT NOT NULL, reason TEXT NOT NULL, ts REAL NOT NULL);
+"""
 
 @dataclass
 class PortfolioLimits:
@@ -9,26 +23,70 @@ class PortfolioLimits:
     max_concurrent_assets: int = 3
 
 class PortfolioGuard:
-    def __init__(self, limits: PortfolioLimits = PortfolioLimits()):
-        self.limits=limits; self.path=STATE_PATH
-        if not os.path.exists(self.path):
-            self._write({"date":"", "equity_open":0.0, "equity_now":0.0, "instruments":{}, "entries_today":0})
-    def _read(self):
-        os.makedirs(os.path.dirname(self.path), exist_ok=True)
-        with open(self.path,"a+",encoding="utf-8") as f:
-            fcntl.flock(f, fcntl.LOCK_EX); f.seek(0)
-            txt=f.read() or "{}"; import json; d=json.loads(txt); fcntl.flock(f, fcntl.LOCK_UN)
-        return d
-    def _write(self, obj):
-        with open(self.path, "w", encoding="utf-8") as f:
-            json.dump(obj, f)
+    """
+    Cross-bot daily loss / concurrency guard backed by a shared SQLite database.
+    - Writers use ``BEGIN IMMEDIATE`` transactions, so increments from many
+      processes are never lost; readers see a consistent snapshot (WAL).
+    - One connection per process+thread; ``busy_timeout`` absorbs short waits.
+    - Also the account state shared across shards: the last polled equity
+      (``equity(max_age_s)`` lets bots skip their own balance poll) and a
+      day-scoped halt flag that blocks every entry and stops the runners.
+      The day (open/current equity, entries) and instrument slots, like the
+      equity, are keyed by ``account`` (a hash of the API key, else
+      ``OKX_API_KEY`` / ``OKX_ACCOUNT``), so other accounts on the host never
+      feed into this one's loss limit, concurrency or sizing; the halt flag
+      is host-wide (``qi halt`` stops every bot).
+    """
+    def __init__(self, limits: PortfolioLimits = PortfolioLimits(), path: str | None = None, account: str | None = None):
+        self.limits=limits; self.path=path or os.getenv("QI_RISK_STATE") or STATE_PATH
+        acct=account or os.getenv("OKX_API_KEY") or os.getenv("OKX_ACCOUNT", "trade")
+        self.account=hashlib.sha256(str(acct).encode()).hexdigest()[:16]
+        self._local=threading.local()
+        legacy=_legacy_json(self.path)
+        c=self._conn()
+        with _Tx(c):
+            _migrate_v1(c, self.account)
+            for stmt in _SCHEMA.split(";"):
+                if stmt.strip(): c.execute(stmt)
+            c.execute("INSERT OR IGNORE INTO day VALUES (?, '', 0.0, 0.0, 0)", (self.account,))
+            if legacy is not None: _import_json(c, self.account, legacy)
+
+    def _conn(self) -> sqlite3.Connection:
+        c=getattr(self._local, "conn", None)
+        if c is None or getattr(self._local, "pid", None)!=os.getpid():
+            d=os.path.dirname(self.path)
+            if d: os.makedirs(d, exist_ok=True)
+            c=sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            c.execute("PRAGMA journal_mode=WAL"); c.execute("PRAGMA synchronous=NORMAL")
+            c.execute("PRAGMA busy_timeout=30000")
+            self._local.conn=c; self._local.pid=os.getpid()
+        return c
+
+    def _tx(self):
+        return _Tx(self._conn())
+
+    def snapshot(self) -> dict:
+        """Same shape as the former JSON state file."""
+        c=self._conn()
+        c.execute("BEGIN")  # one read snapshot for both tables
+        try:
+            date, eq_open, eq_now, entries = c.execute("SELECT date, equity_open, equity_now, entries_today FROM day WHERE acct=?", (self.account,)).fetchone()
+            inst={k: {"active": bool(a), "consumed": v} for k, a, v in c.execute("SELECT inst, active, consumed FROM instruments WHERE acct=?", (self.account,))}
+        finally:
+            c.execute("COMMIT")
+        return {"date": date, "equity_open": eq_open, "equity_now": eq_now, "instruments": inst, "entries_today": entries}
+
     def open_day(self, total_equity: float):
-        s=self._read(); today=datetime.date.today().isoformat()
-        if s.get("date")!=today:
-            s={"date":today,"equity_open":float(total_equity),"equity_now":float(total_equity),"instruments":{},"entries_today":0}
-            self._write(s)
+        today=datetime.date.today().isoformat()
+        with self._tx() as c:
+            if c.execute("SELECT date FROM day WHERE acct=?", (self.account,)).fetchone()[0]!=today:
+                c.execute("UPDATE day SET date=?, equity_open=?, equity_now=?, entries_today=0 WHERE acct=?",
+                          (today, float(total_equity), float(total_equity), self.account))
+                c.execute("DELETE FROM instruments WHERE acct=?", (self.account,))
+
     def can_enter(self, inst_id: str, est_worst_loss: float)->bool:
-        s=self._read(); today=datetime.date.today().isoformat()
+        if self.halted(): return False
+        s=self.snapshot(); today=datetime.date.today().isoformat()
         if s.get("date")!=today: return True
         eq_open=float(s.get("equity_open",0.0)); eq_now=float(s.get("equity_now",eq_open))
         if eq_open>0 and (eq_open-eq_now+est_worst_loss) > self.limits.daily_loss_limit_pct*eq_open:
@@ -37,16 +95,83 @@ class PortfolioGuard:
         if len(active)>=self.limits.max_concurrent_assets and inst_id not in active:
             return False
         return True
+
     def consume(self, inst_id: str, est_worst_loss: float):
-        s=self._read(); s.setdefault("instruments",{})
-        s["instruments"].setdefault(inst_id, {"active":True,"consumed":0.0})
-        s["instruments"][inst_id]["active"]=True
-        s["instruments"][inst_id]["consumed"] += float(est_worst_loss)
-        s["entries_today"]=int(s.get("entries_today",0))+1
-        self._write(s)
+        with self._tx() as c:
+            c.execute("INSERT INTO instruments VALUES (?, ?, 1, ?) ON CONFLICT(acct, inst) DO UPDATE SET active=1, consumed=consumed+excluded.consumed",
+                      (self.account, inst_id, float(est_worst_loss)))
+            c.execute("UPDATE day SET entries_today=entries_today+1 WHERE acct=?", (self.account,))
+
     def mark_pnl(self, total_equity_now: float):
-        s=self._read(); s["equity_now"]=float(total_equity_now); self._write(s)
+        c=self._conn(); eq=float(total_equity_now)
+        c.execute("UPDATE day SET equity_now=? WHERE acct=?", (eq, self.account))
+        c.execute("INSERT INTO account_equity VALUES (?, ?, ?) ON CONFLICT(acct) DO UPDATE SET equity=excluded.equity, ts=excluded.ts",
+                  (self.account, eq, time.time()))
+
+    def equity(self, max_age_s: float = 1.0):
+        """This account's equity polled by any bot/shard within ``max_age_s``, else None."""
+        r=self._conn().execute("SELECT equity, ts FROM account_equity WHERE acct=?", (self.account,)).fetchone()
+        return r[0] if r and time.time()-r[1] <= max_age_s else None
+
+    def halt(self, reason: str):
+        self._conn().execute("INSERT INTO halt VALUES (1, ?, ?, ?) ON CONFLICT(id) DO UPDATE SET date=excluded.date, reason=excluded.reason, ts=excluded.ts",
+                             (datetime.date.today().isoformat(), str(reason), time.time()))
+
+    def halted(self):
+        """Halt reason set today, else None (a halt expires with the day)."""
+        r=self._conn().execute("SELECT date, reason FROM halt WHERE id=1").fetchone()
+        return r[1] if r and r[0]==datetime.date.today().isoformat() else None
+
+    def resume(self):
+        self._conn().execute("DELETE FROM halt")
+
     def close_position(self, inst_id: str):
-        s=self._read(); 
-        if "instruments" in s and inst_id in s["instruments"]: s["instruments"][inst_id]["active"]=False
-        self._write(s)
+        self._conn().execute("UPDATE instruments SET active=0 WHERE acct=? AND inst=?", (self.account, inst_id))
+
+def _legacy_json(path: str):
+    """
+    The state of a pre-SQLite JSON file at ``path`` (moved to ``<path>.bak``),
+    else None.  Any other non-SQLite file is refused rather than overwritten.
+    """
+    try:
+        with open(path, "rb") as f: head=f.read(16)
+    except FileNotFoundError:
+        return None
+    if not head or head==b"SQLite format 3\x00": return None
+    try:
+        with open(path, encoding="utf-8") as f: state=json.load(f)
+        if not isinstance(state, dict): raise ValueError("not a JSON object")
+    except ValueError as e:
+        raise RuntimeError(f"risk state {path} is neither SQLite nor the legacy JSON state ({e}); "
+                           "move it away or point QI_RISK_STATE at another file") from None
+    try:
+        os.replace(path, path+".bak")
+    except FileNotFoundError:
+        return None   # another process is importing it
+    return state
+
+def _import_json(c, acct: str, s: dict):
+    c.execute("REPLACE INTO day VALUES (?, ?, ?, ?, ?)", (acct, str(s.get("date", "")), float(s.get("equity_open", 0.0)),
+              float(s.get("equity_now", s.get("equity_open", 0.0))), int(s.get("entries_today", 0))))
+    c.execute("DELETE FROM instruments WHERE acct=?", (acct,))
+    for inst, v in (s.get("instruments") or {}).items():
+        c.execute("INSERT INTO instruments VALUES (?, ?, ?, ?)", (acct, inst, int(bool(v.get("active"))), float(v.get("consumed", 0.0))))
+
+def _migrate_v1(c, acct: str):
+    """Hand a pre-account database's day and instrument rows to ``acct`` (the first guard to open it)."""
+    if "id" not in [r[1] for r in c.execute("PRAGMA table_info(day)")]: return
+    c.execute("ALTER TABLE day RENAME TO day_v1"); c.execute("ALTER TABLE instruments RENAME TO instruments_v1")
+    for stmt in _SCHEMA.split(";"):
+        if stmt.strip(): c.execute(stmt)
+    c.execute("INSERT INTO day SELECT ?, date, equity_open, equity_now, entries_today FROM day_v1", (acct,))
+    c.execute("INSERT INTO instruments SELECT ?, inst, active, consumed FROM instruments_v1", (acct,))
+    c.execute("DROP TABLE day_v1"); c.execute("DROP TABLE instruments_v1")
+
+class _Tx:
+    """``BEGIN IMMEDIATE`` ... ``COMMIT``/``ROLLBACK`` on an autocommit connection."""
+    def __init__(self, conn): self.c=conn
+    def __enter__(self):
+        self.c.execute("BEGIN IMMEDIATE"); return self.c
+    def __exit__(self, et, ev, tb):
+        self.c.execute("ROLLBACK" if et else "COMMIT")
+        return False
@@ -11,3 +11,22 @@ class TokenBucket:
             return False
     def wait(self, n:int=1):
         while not self.take(n): time.sleep(0.05)
+
+class AsyncTokenBucket:
+    """Token bucket for a single event loop: no locks, waits are ``await``-able."""
+    def __init__(self, capacity: float, rate: float):
+        self.capacity=float(capacity); self.tokens=float(capacity); self.rate=float(rate); self.ts=time.monotonic()
+    def _refill(self):
+        now=time.monotonic()
+        self.tokens=min(self.capacity, self.tokens+(now-self.ts)*self.rate); self.ts=now
+    def take(self, n: float = 1) -> bool:
+        self._refill()
+        if self.tokens>=n: self.tokens-=n; return True
+        return False
+    def delay(self, n: float = 1) -> float:
+        """Seconds until ``n`` tokens are available (0 if available now)."""
+        self._refill()
+        return max(0.0, (n-self.tokens)/self.rate) if self.rate>0 else float("inf")
+    async def wait(self, n: float = 1):
+        import asyncio
+        while not self.take(n): await asyncio.sleep(self.delay(n))
@@ -0,0 +1,97 @@
+"""Always-on stage timers and an on-demand sampling profiler for bot loops.
+
+``StageTimer`` keeps the last ``size`` durations of every named stage in a
+fixed ring buffer (``lap`` = one ``perf_counter_ns`` read and an array store);
+quantiles are only computed when ``summary``/``export`` is called.
+
+``SamplingProfiler`` samples one thread's Python stack from a side thread and
+writes folded stacks (``a;b;c <count>``), the input format of flamegraph.pl and
+speedscope.
+"""
+import os, sys, time, json, threading
+from array import array
+from collections import Counter
+from typing import Dict, Optional
+from .metrics import gauge
+
+class StageTimer:
+    def __init__(self, name: str, size: int = 512):
+        self.name = name; self.size = size
+        self._buf: Dict[str, array] = {}; self._n: Dict[str, int] = {}
+        self._t = time.perf_counter_ns(); self._t0 = self._t
+        self._gauge = None; self._last_export = 0.0
+
+    def start(self):
+        self._t = self._t0 = time.perf_counter_ns()
+
+    def lap(self, stage: str):
+        """Record the time since the previous ``start``/``lap`` under ``stage``."""
+        now = time.perf_counter_ns(); self.record(stage, now - self._t); self._t = now
+
+    def stop(self, stage: str = "total"):
+        """Record the whole iteration (since ``start``)."""
+        self.record(stage, time.perf_counter_ns() - self._t0)
+
+    def record(self, stage: str, ns: int):
+        b = self._buf.get(stage)
+        if b is None: b = self._buf[stage] = array("q", bytes(8 * self.size)); self._n[stage] = 0
+        n = self._n[stage]; b[n % self.size] = ns; self._n[stage] = n + 1
+
+    def summary(self) -> dict:
+        out = {}
+        for stage, b in self._buf.items():
+            n = self._n[stage]; k = min(n, self.size)
+            v = sorted(b[:k]); last = b[(n - 1) % self.size]
+            out[stage] = {"n": n, "p50_ms": v[k // 2] / 1e6, "p99_ms": v[min(k - 1, int(k * 0.99))] / 1e6, "last_ms": last / 1e6}
+        return out
+
+    def export(self, path: str, every_s: float = 10.0) -> Optional[dict]:
+        """Publish the summary to ``path`` (JSON) and Prometheus, at most every ``every_s``."""
+        now = time.time()
+        if now - self._last_export < every_s: return None
+        self._last_export = now
+        s = self.summary()
+        if self._gauge is None:
+            self._gauge = gauge("qi_loop_stage_seconds", "Recent strategy-loop stage duration quantiles", ("inst", "stage", "q"))
+        for stage, r in s.items():
+            self._gauge.labels(self.name, stage, "0.5").set(r["p50_ms"] / 1e3)
+            self._gauge.labels(self.name, stage, "0.99").set(r["p99_ms"] / 1e3)
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            tmp = f"{path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f: json.dump({"name": self.name, "ts": int(now * 1000), "stages": s}, f)
+            os.replace(tmp, path)
+        except Exception:
+            pass
+        return s
+
+class SamplingProfiler:
+    def __init__(self, thread_id: Optional[int] = None, interval_s: float = 0.002):
+        self.thread_id = thread_id or threading.get_ident(); self.interval_s = interval_s
+        self.stacks: Counter = Counter(); self.samples = 0
+        self._stop = threading.Event(); self._th: Optional[threading.Thread] = None
+
+    def start(self) -> "SamplingProfiler":
+        self._th = threading.Thread(target=self._run, name="qi-profiler", daemon=True); self._th.start()
+        return self
+
+    def _run(self):
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval_s):
+            f = sys._current_frames().get(self.thread_id)
+            if f is None or self.thread_id == me: continue
+            st = []
+            while f is not None:
+                c = f.f_code; st.append(f"{os.path.basename(c.co_filename)}:{c.co_name}"); f = f.f_back
+            self.stacks[";".join(reversed(st))] += 1; self.samples += 1
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        if self._th: self._th.join(timeout=1.0)
+        return self.stacks
+
+    def dump(self, path: str) -> str:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            for st, n in self.stacks.most_common(): f.write(f"{st} {n}\n")
+        return path
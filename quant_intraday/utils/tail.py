@@ -0,0 +1,42 @@
+import os, glob
+from typing import List, Optional
+
+class TailReader:
+    """
+    Incremental line reader for append-only logs.
+    - Remembers the byte offset and only reads what was appended since the
+      last ``poll()``; a trailing partial line is held until it is completed.
+    - ``path`` may be a glob (e.g. ``equity*.csv``): the lexically latest match
+      is followed.
+    - Rotation (different file/inode) and truncation (size < offset) restart
+      from the beginning of the current file and set ``restarted`` so callers
+      can reset their aggregates.
+    """
+    def __init__(self, path: str):
+        self.pattern = path; self.is_glob = glob.has_magic(path)
+        self.path: Optional[str] = None; self.ino = None; self.offset = 0
+        self._partial = b""
+        self.restarted = False
+
+    def _current(self) -> Optional[str]:
+        if not self.is_glob: return self.pattern if os.path.exists(self.pattern) else None
+        files = sorted(glob.glob(self.pattern))
+        return files[-1] if files else None
+
+    def poll(self) -> List[str]:
+        """New complete lines since the previous call (without newlines)."""
+        self.restarted = False
+        p = self._current()
+        if p is None: return []
+        try: st = os.stat(p)
+        except OSError: return []
+        if p != self.path or st.st_ino != self.ino or st.st_size < self.offset:
+            self.restarted = self.path is not None
+            self.path = p; self.ino = st.st_ino; self.offset = 0; self._partial = b""
+        if st.st_size == self.offset: return []
+        with open(p, "rb") as f:
+            f.seek(self.offset); chunk = f.read()
+        self.offset += len(chunk)
+        data = self._partial + chunk
+        lines = data.split(b"\n"); self._partial = lines.pop()
+        return [l.decode("utf-8", "replace").rstrip("\r") for l in lines if l]
@@ -42,3 +42,46 @@ async def root(request: Request):
 @app.get("/healthz")
 async def healthz():
     return {"ok": True, "live_dir": str(LIVE_DIR)}
+
+# control files (control/weights/alloc/thresholds/cooling/risk_overrides)
+from ..engine.control_plane import CONTROL_FILES, atomic_write_json
+
+def _auth(request: Request):
+    if TOKEN and request.headers.get("authorization", "") != f"Bearer {TOKEN}":
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="unauthorized")
+
+@app.get("/api/control/{name}")
+async def control_get(name: str, request: Request):
+    _auth(request)
+    if name not in CONTROL_FILES: raise HTTPException(status_code=404, detail="unknown control file")
+    fp = os.path.join(LIVE_DIR, f"{name}.json")
+    if not os.path.exists(fp): return {}
+    with open(fp, "r", encoding="utf-8") as f:
+        return json.load(f) or {}
+
+@app.post("/api/control/{name}")
+async def control_put(name: str, request: Request, body: dict = Body(...)):
+    """Replace one control file atomically; bots pick it up on the next watcher tick."""
+    _auth(request)
+    if name not in CONTROL_FILES: raise HTTPException(status_code=404, detail="unknown control file")
+    atomic_write_json(os.path.join(LIVE_DIR, f"{name}.json"), body)
+    return {"ok": True, "name": name}
+
+# debug: strategy-loop stage timings published by each bot (stages_<inst>.json)
+@app.get("/api/debug/stages")
+async def debug_stages(request: Request):
+    _auth(request)
+    out = {}
+    for fp in sorted(glob.glob(os.path.join(LIVE_DIR, "stages_*.json"))):
+        try:
+            with open(fp, "r", encoding="utf-8") as f: d = json.load(f)
+            out[d.get("name") or os.path.basename(fp)[7:-5]] = d
+        except Exception:
+            continue
+    return out
+
+@app.get("/api/debug/profiles")
+async def debug_profiles(request: Request):
+    """Folded-stack profiles written on request (control.json "profile")."""
+    _auth(request)
+    return sorted(os.path.basename(p) for p in glob.glob(os.path.join(LIVE_DIR, "profiles", "*.folded")))
@@ -5,12 +5,12 @@ Outputs replay/replay_YYYYMMDD.html
 """
 import os, json, pandas as pd, datetime as dt
 from quant_intraday.exchange.okx_client import OKXClient
+from quant_intraday.utils.exelog import read_events
 
 def load_execlog(live_dir="live_output"):
-    ex=os.path.join(live_dir, "execlog.csv")
-    if not os.path.exists(ex):
+    df=read_events(os.path.join(live_dir, "execlog.csv"))
+    if df.empty:
         return pd.DataFrame(columns=["ts","evt","inst","side","pos","sz","px"])
-    df=pd.read_csv(ex)
     df["dt"]=pd.to_datetime(df["ts"], unit="ms", utc=True)
     return df
 
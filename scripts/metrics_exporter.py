@@ -1,11 +1,13 @@
 #!/usr/bin/env python3
 from prometheus_client import start_http_server, Gauge, Counter
 import time, os, glob, pandas as pd
+from quant_intraday.utils.daily_pnl import read_state
 
 def main(port:int=8008, live_dir:str="live_output"):
     g_eq=Gauge("qi_equity","Equity from live_output/equity.csv")
     g_dd=Gauge("qi_drawdown","Drawdown from equity.csv")
     g_last_ts=Gauge("qi_equity_last_ts","Last equity ts")
+    g_day_pnl=Gauge("qi_day_pnl","Today's PnL (UTC day) from daily_pnl.json")
     g_trades=Gauge("qi_recent_trades","Recent trade count across instruments")
     c_amend_ok=Counter("qi_amend_ok","Trailing amend success count")
     c_amend_fail=Counter("qi_amend_fail","Trailing amend fail count")
@@ -33,8 +35,13 @@ def main(port:int=8008, live_dir:str="live_output"):
                 pass
             # we can't access bot here; left as future hook via separate endpoint
 
+            st=read_state(live_dir)
             eq_p=os.path.join(live_dir,"equity.csv")
-            if os.path.exists(eq_p):
+            if st:
+                # O(1): the bot keeps a running daily tracker, no need to re-read equity.csv
+                g_eq.set(float(st["last"])); g_dd.set(float(st["last"])/float(st["peak"])-1.0 if st.get("peak") else 0.0)
+                g_last_ts.set(float(st.get("ts", 0))); g_day_pnl.set(float(st.get("pnl", 0.0)))
+            elif os.path.exists(eq_p):
                 df=pd.read_csv(eq_p)
                 if len(df)>0:
                     ts=float(df.iloc[-1,0]); eq=float(df.iloc[-1,1])
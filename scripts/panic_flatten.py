@@ -16,26 +16,24 @@ def list_pending(cli, inst=None):
 
 def cancel_all(cli, inst=None):
     pend = list_pending(cli, inst)
-    for o in pend:
-        try:
-            cli.cancel_order(instId=o.get("instId"), ordId=o.get("ordId"))
-            time.sleep(0.05)
-        except Exception as e:
-            print("cancel err:", e)
+    # 20 orders per batch request instead of one request per order
+    for r in cli.batch_cancel([{"instId": o.get("instId"), "ordId": o.get("ordId")} for o in pend]):
+        if not r["ok"]: print("cancel err:", r.get("ordId"), r.get("sMsg"))
 
 def close_all(cli, inst=None, tdMode="cross"):
     poss = list_positions(cli, inst)
-    for p in poss:
+    reqs = []
+    for i, p in enumerate(poss):
+        instId = p.get("instId"); posSide = p.get("posSide")
+        sz = p.get("availPos") or p.get("pos") or "0"
         try:
-            instId = p.get("instId"); posSide = p.get("posSide")
-            sz = p.get("availPos") or p.get("pos") or "0"
-            if float(sz) == 0: 
-                continue
-            side = "sell" if posSide=="long" else "buy"
-            cli.place_order(instId=instId, tdMode=tdMode, side=side, posSide=posSide, ordType="market", sz=sz, reduceOnly="true", clOrdId=f"panic_{int(time.time())}")
-            time.sleep(0.05)
-        except Exception as e:
-            print("close err:", e)
+            if float(sz) == 0: continue
+        except ValueError:
+            continue
+        side = "sell" if posSide=="long" else "buy"
+        reqs.append(dict(instId=instId, tdMode=tdMode, side=side, posSide=posSide, ordType="market", sz=sz, reduceOnly="true", clOrdId=f"panic{int(time.time())}n{i}"))
+    for r in cli.batch_place(reqs):
+        if not r["ok"]: print("close err:", r.get("instId"), r.get("sMsg"))
 
 def main(inst=None, dry=False):
     cli = OKXClient(os.getenv("OKX_API_KEY"), os.getenv("OKX_API_SECRET"), os.getenv("OKX_API_PASSPHRASE"), os.getenv("OKX_ACCOUNT","trade"))
@@ -0,0 +1,11 @@
+from quant_intraday.engine.book import parse_books
+
+def test_parse_and_vwap():
+    d={"ts":"1","bids":[["99.9","2","0","1"],["99.8","3","0","1"]],"asks":[["100.1","1","0","1"],["100.2","4","0","1"]]}
+    b=parse_books(d, tick=0.1)
+    assert b.best_bid==99.9 and b.ask_q==1.0 and round(b.spread_ticks)==2
+    assert abs(b.imbalance-0.0)<1e-9 and b.top_imbalance>0
+    # 150 notional: 100.1 fully (100.1) + 49.9 at 100.2
+    q=1+49.9/100.2
+    assert abs(b.vwap("buy",150.0)-150.0/q)<1e-9
+    assert parse_books({"bids":[],"asks":[["1","1"]]}) is None
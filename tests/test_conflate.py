@@ -0,0 +1,23 @@
+import asyncio
+from quant_intraday.engine.conflate import ConflatingChannel
+
+def test_conflation_latest_wins():
+    async def main():
+        ch=ConflatingChannel()
+        ch.publish("A", 1, seq=1); v,x=await ch.next("A", 0); assert (v,x)==(1,1)
+        ch.publish("A", 2, seq=2, prev_seq=1); ch.publish("A", 3, seq=5, prev_seq=4)
+        v,x=await ch.next("A", v); assert x==3
+        st=ch.stats()["A"]; assert st["drops"]==1 and st["gaps"]==1
+        t=asyncio.create_task(ch.next("A", v)); await asyncio.sleep(0)
+        ch.publish("A", 4); assert (await t)[1]==4
+        assert (await ch.next("A", 4, timeout=0.01))[0]==4
+    asyncio.run(main())
+
+def test_hub_fanout_conflates_and_counts_gaps():
+    from quant_intraday.engine.md_hub import MarketDataHub
+    from quant_intraday.engine.conflate import ConflatingSlot
+    hub=MarketDataHub(); sk=("u", ("books5", "X")); slot=ConflatingSlot(); hub._latest[sk]=(slot, 1)
+    for seq, prev in ((1, -1), (2, 1), (4, 3)):
+        hub._fanout("u", sk[1], {"data": [{"seqId": seq, "prevSeqId": prev}]})
+    assert slot.version==3 and slot.value["data"][0]["seqId"]==4
+    assert hub.stats()["gaps"]==1 and slot.gaps==1
@@ -0,0 +1,13 @@
+import json, time
+from quant_intraday.engine.control_plane import ControlPlane
+
+def test_control_plane_snapshot(tmp_path):
+    cp=ControlPlane(str(tmp_path))
+    v0=cp.snapshot.version; assert not cp.snapshot.paused()
+    (tmp_path/'control.json').write_text(json.dumps({"paused": True}))
+    assert cp.refresh() and cp.snapshot.paused() and cp.snapshot.version==v0+1
+    assert not cp.refresh()  # unchanged files are not re-parsed
+    s=cp.publish('weights', {"trend": 0.5})
+    assert s.weights["trend"]==0.5 and json.loads((tmp_path/'weights.json').read_text())["trend"]==0.5
+    cp.publish('control', {"pause_until": time.time()+60})
+    assert cp.snapshot.paused()
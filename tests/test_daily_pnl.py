@@ -0,0 +1,10 @@
+from quant_intraday.utils.daily_pnl import DailyPnL, read_state
+from quant_intraday.utils.global_risk import GlobalRiskGuard
+
+def test_running_day_pnl_and_restart(tmp_path):
+    d=DailyPnL(str(tmp_path), persist_s=0)
+    for eq in (100, 110, 99, 105): d.update(eq)
+    assert d.today()==5 and abs(d.drawdown()-(99/110-1))<1e-12
+    assert read_state(str(tmp_path))["start"]==100
+    r=DailyPnL(str(tmp_path)); assert r.today()==5
+    assert GlobalRiskGuard(str(tmp_path), dd_limit=0.05).check()
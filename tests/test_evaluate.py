@@ -0,0 +1,38 @@
+import time, asyncio
+import numpy as np
+import quant_intraday.engine.evaluate as ev
+from quant_intraday.engine.evaluate import EvalInput, EvalResult, EvalSlot, EvalPool, evaluate
+from quant_intraday.engine.live_bot import CandleBuffer
+
+def _bars(n):
+    b = CandleBuffer(); rng = np.random.default_rng(1); px = 100.0
+    for i in range(n):
+        px *= 1 + rng.normal(0, 0.002)
+        b.upsert(1_700_000_000_000 + i * 60_000, px, px * 1.001, px * 0.999, px, float(rng.uniform(1, 10)))
+    return b.snapshot()
+
+def test_evaluate_pipeline():
+    assert not evaluate(EvalInput("X", _bars(50))).enough
+    r = evaluate(EvalInput("X", _bars(300)))
+    assert r.enough and r.quality_ok and 0 <= r.atr_pct <= 1 and r.atrp > 0
+    assert {"frame", "indicators", "route"} <= set(r.stages_ns)
+    r = evaluate(EvalInput("X", _bars(300), min_atr_pct=2.0))
+    assert not r.quality_ok and r.sig is None and "route" not in r.stages_ns
+
+def test_offload_skips_instead_of_queueing(monkeypatch):
+    def slow(inp):
+        time.sleep(0.3); return EvalResult(enough=True, stages_ns={"route": 300_000_000})
+    monkeypatch.setattr(ev, "evaluate", slow)
+    async def go():
+        a = EvalSlot("A", "thread", workers=7, timeout_s=0.05); b = EvalSlot("B", "thread", workers=7, timeout_s=0.05)
+        a.pool = b.pool = EvalPool("thread", 1)
+        inp = EvalInput("A", ())
+        assert await a.run(inp) is None            # timed out, still running
+        assert await a.run(inp) is None            # busy: skipped, not queued
+        assert await b.run(inp) is None            # pool saturated by A
+        assert a.skipped == 2 and b.skipped == 1 and a.pool.inflight == 1
+        await asyncio.sleep(0.35)
+        a.timeout_s = 1.0
+        r = await a.run(inp)
+        assert r is not None and r.enough and abs(a.saved_s - 0.3) < 1e-9
+    asyncio.run(go())
@@ -0,0 +1,49 @@
+import os
+from quant_intraday.utils import exelog
+from quant_intraday.utils.logwriter import flush_all
+
+def test_new_keys_open_segment_without_rewrite(tmp_path):
+    p=str(tmp_path/"execlog.csv")
+    exelog.write_event(p, {"ts": 1, "evt": "PLACE"})
+    exelog.write_event(p, {"ts": 3, "evt": "FILL", "fillSz": 2})
+    exelog.write_event(p, {"ts": 2, "evt": "CANCEL"})
+    flush_all()
+    assert open(p).read()=="ts,evt\n1,PLACE\n"
+    assert exelog.segments(p)[-1].endswith("execlog.v2.csv")
+    df=exelog.read_events(p)
+    assert list(df["evt"])==["PLACE", "CANCEL", "FILL"] and df["fillSz"].iloc[-1]==2
+
+def test_columnar_chunks(tmp_path, monkeypatch):
+    monkeypatch.setenv("QI_EXECLOG_FORMAT", "npz"); monkeypatch.setenv("QI_EXECLOG_CHUNK", "2")
+    p=str(tmp_path/"hi.csv")
+    for i in range(5): exelog.write_event(p, {"ts": i, "evt": "X", "px": 1.5})
+    exelog.flush_columnar()
+    df=exelog.read_events(p, since_ms=1)
+    assert len(df)==4 and df["px"].sum()==6.0
+
+def test_segments_ignore_stray_files(tmp_path):
+    p=str(tmp_path/"execlog.csv")
+    for name in ("execlog.csv", "execlog.v10.csv", "execlog.v2.csv", "execlog.vbak.csv", "execlog.v3.old.csv"):
+        (tmp_path/name).write_text("ts,evt\n")
+    assert [os.path.basename(x) for x in exelog.segments(p)]==["execlog.csv", "execlog.v2.csv", "execlog.v10.csv"]
+
+def test_racing_logs_never_mix_schemas(tmp_path):
+    # three processes' views of one log, all created before any of them wrote
+    p=str(tmp_path/"execlog.csv"); a, b, c=(exelog._CsvLog(p) for _ in range(3))
+    a.write({"ts": 1, "evt": "PLACE"})
+    b.write({"ts": 2, "evt": "FILL", "fillSz": 2})
+    c.write({"ts": 3, "evt": "CANCEL"})
+    flush_all()
+    assert open(p).read()=="ts,evt\n1,PLACE\n3,CANCEL\n"
+    assert open(str(tmp_path/"execlog.v2.csv")).read()=="ts,evt,fillSz\n2,FILL,2\n"
+    assert sorted(os.listdir(tmp_path))==["execlog.csv", "execlog.v2.csv"]
+
+def test_positional_rows_share_the_event_schema(tmp_path):
+    p=str(tmp_path/"execlog.csv")
+    w=exelog.RowWriter(p, ("ts", "evt", "inst", "side", "pos", "sz", "px"))
+    w.write("1,PLACE,X,buy,long,3,100.000000\n")
+    exelog.write_event(p, {"ts": 2, "evt": "FILL", "inst": "X", "clOrdId": "c1"})
+    w.write("3,CANCEL,X,buy,long,3,100.000000\n")
+    flush_all()
+    df=exelog.read_events(p)
+    assert list(df["evt"])==["PLACE", "FILL", "CANCEL"] and list(df["pos"].fillna(""))==["long", "", "long"]
@@ -0,0 +1,30 @@
+import asyncio
+from quant_intraday.engine.history import CandleCache, load_history
+
+class _Client:
+    """Serves newest-first OKX rows for minute bars 0..n-1 and records the requests."""
+    def __init__(self, n):
+        self.ts=[i*60000 for i in range(n)]; self.paths=[]
+    async def acall(self, cls, fn, client, path, prio="poll", inst=""):
+        assert cls=="public"
+        self.paths.append(path)
+        q=dict(x.split("=") for x in path.split("?")[1].split("&"))
+        after=int(q.get("after", 0)); lim=int(q["limit"])
+        xs=[t for t in reversed(self.ts) if not after or t<after][:lim]
+        return [[str(t), "1", "2", "0.5", "1.5", "10", "10", "15", "1"] for t in xs]
+
+def test_paged_load_and_cache(tmp_path):
+    cli=_Client(1000); cache=CandleCache(str(tmp_path))
+    h=asyncio.run(load_history(cli, "X-USDT-SWAP", "1m", 700, cache))
+    assert [r[0] for r in h.rows]==cli.ts[-700:] and h.rows[0][5]==15.0
+    assert h.pages==5 and "market/candles" in cli.paths[0] and all("history-candles" in p for p in cli.paths[1:])
+    cache.save("X-USDT-SWAP", "1m", h.rows[:-1])
+    # restart 50 bars later: only the gap (one page) is downloaded
+    cli.ts+= [cli.ts[-1]+60000*(i+1) for i in range(50)]; cli.paths=[]
+    h=asyncio.run(load_history(cli, "X-USDT-SWAP", "1m", 700, cache))
+    assert h.pages==1 and h.cached==699 and [r[0] for r in h.rows]==cli.ts[-700:]
+
+def test_short_history_stops(tmp_path):
+    cli=_Client(150)
+    h=asyncio.run(load_history(cli, "X-USDT-SWAP", "1m", 4000))
+    assert len(h.rows)==150 and h.pages==1
@@ -0,0 +1,14 @@
+import pytest
+from quant_intraday.engine.l2book import L2Book, BookResync, okx_checksum
+
+def test_l2_apply_and_checksum():
+    b=L2Book("X")
+    snap={"bids":[["100.0","2","0","1"],["99.0","1","0","1"]],"asks":[["101.0","3","0","1"]],"seqId":10,"prevSeqId":-1}
+    snap["checksum"]=okx_checksum([["100.0","2"],["99.0","1"]],[["101.0","3"]])
+    assert b.apply(snap, "snapshot")
+    b.apply({"bids":[["100.0","0","0","0"],["99.5","4","0","1"]],"asks":[],"seqId":11,"prevSeqId":10}, "update")
+    s=b.snapshot(5, tick=0.5)
+    assert s.best_bid==99.5 and list(s.bid_px)==[99.5,99.0] and s.seq_id==11
+    with pytest.raises(BookResync):
+        b.apply({"bids":[],"asks":[],"seqId":20,"prevSeqId":15}, "update")
+    assert not b.ready and not b.apply({"bids":[],"asks":[],"seqId":21,"prevSeqId":20}, "update")
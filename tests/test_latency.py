@@ -0,0 +1,59 @@
+import time, asyncio
+from types import SimpleNamespace
+from quant_intraday.engine import order_tracker
+from quant_intraday.utils.latency import LatencyTracker
+from quant_intraday.utils.logwriter import flush_all
+from quant_intraday.scripts import latency_report
+
+
+def test_trace_signal_to_fill(tmp_path, monkeypatch):
+    lt = LatencyTracker(log_dir=str(tmp_path))
+    lt.signal("BTC-USDT-SWAP", "pov"); lt.risk_ok("BTC-USDT-SWAP")
+    lt.sent("BTC-USDT-SWAP", "c1"); lt.ack("c1")
+    lt.on_order({"clOrdId": "c1", "state": "partially_filled"})
+    lt.on_order({"clOrdId": "c1", "state": "filled"})
+    lt.sent("BTC-USDT-SWAP", "c2"); lt.ack("c2", ok=False)   # rejected: closed at ack
+    lt.on_order({"clOrdId": "unknown", "state": "filled"})     # not ours: ignored
+    assert not lt._open
+    flush_all()
+    lines = (tmp_path / "latency.csv").read_text().splitlines()
+    assert len(lines) == 3
+    full = dict(zip(lines[0].split(","), lines[1].split(",")))
+    assert full["clOrdId"] == "c1" and full["executor"] == "pov"
+    assert int(full["signal_to_full_fill_us"]) >= int(full["sent_to_first_fill_us"]) >= 0
+    rej = dict(zip(lines[0].split(","), lines[2].split(",")))
+    assert rej["sent_to_ack_us"] != "" and rej["sent_to_full_fill_us"] == ""
+
+    monkeypatch.setattr(latency_report, "LIVE", str(tmp_path))
+    rep = latency_report.main()
+    r = rep["by_inst"]["BTC-USDT-SWAP"]["pov"]
+    assert r["orders"] == 2 and r["sent_to_ack"]["n"] == 2 and r["signal_to_full_fill"]["n"] == 1
+
+
+def test_mark_overhead_is_small(tmp_path):
+    lt = LatencyTracker(log_dir=str(tmp_path), max_open=1 << 20)
+    n = 20000; t0 = time.perf_counter()
+    for i in range(n):
+        lt.sent("X", f"c{i}"); lt.ack(f"c{i}")
+    assert (time.perf_counter() - t0) / (2 * n) < 20e-6
+
+
+def test_log_dir_set_on_first_use(tmp_path):
+    lt = LatencyTracker()
+    lt.use_log_dir(str(tmp_path / "a")); lt.use_log_dir(str(tmp_path / "b"))
+    lt.sent("X", "c1"); lt.ack("c1", ok=False)
+    flush_all()
+    assert (tmp_path / "a" / "latency.csv").exists() and not (tmp_path / "b").exists()
+
+
+def test_rest_polls_finish_traces_without_private_stream(tmp_path, monkeypatch):
+    lt = LatencyTracker(log_dir=str(tmp_path)); monkeypatch.setattr(order_tracker, "LATENCY", lt)
+    async def acall(cls, fn, *a, inst="", prio="poll", **kw): return fn(*a, **kw)
+    client = SimpleNamespace(acall=acall, get_order=lambda inst, clOrdId=None: {"clOrdId": clOrdId, "state": "filled", "accFillSz": "2"})
+    t = order_tracker.OrderTracker(SimpleNamespace(cfg=SimpleNamespace(inst_id="X", use_private=False), client=client))
+    t.track("c1", 2); lt.sent("X", "c1"); lt.ack("c1")
+    asyncio.run(t.sync(["c1"]))
+    assert not lt._open
+    flush_all()
+    row = dict(zip(*(l.split(",") for l in (tmp_path / "latency.csv").read_text().splitlines())))
+    assert row["clOrdId"] == "c1" and row["sent_to_full_fill_us"] != ""
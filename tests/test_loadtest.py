@@ -0,0 +1,14 @@
+from quant_intraday.scripts.loadtest import pct, check_slo, SLO
+
+def test_pct():
+    r = pct([float(x) for x in range(1, 101)])
+    assert r["n"] == 100 and r["p50"] == 51 and r["p99"] == 100 and r["max"] == 100
+    assert pct([]) == {"n": 0}
+
+def test_check_slo():
+    rep = {"loop_lag_ms": pct([1.0, 2.0]), "msg_latency_ms": pct([500.0]), "strategy_ms": {"n": 0},
+           "cpu_pct": {"mean": 10.0}, "rss_mb": {"per_bot": 5.0}}
+    r = check_slo(rep, SLO)
+    assert r["loop_lag_p99_ms"]["ok"] and r["cpu_pct_mean"]["ok"] and r["rss_mb_per_bot"]["ok"]
+    assert not r["msg_latency_p99_ms"]["ok"]
+    assert not r["strategy_p99_ms"]["ok"] and r["strategy_p99_ms"]["value"] is None   # no samples fails
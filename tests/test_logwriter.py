@@ -0,0 +1,20 @@
+import os
+from quant_intraday.utils.logwriter import LogWriter, get_writer
+
+def test_writer_batches_header_and_rotation(tmp_path):
+    p=str(tmp_path/"x.csv")
+    w=get_writer(p, "ts,v"); assert get_writer(p) is w
+    for i in range(1000): w.write(f"{i},{i*2}")
+    w.flush()
+    lines=open(p).read().splitlines()
+    assert lines[0]=="ts,v" and len(lines)==1001 and lines[-1]=="999,1998"
+    r=LogWriter(str(tmp_path/"r.log"), "h", rotate_bytes=10, fsync_s=-1)
+    r.write("0123456789"); r.flush(); r.write("b"); r.close()
+    assert open(tmp_path/"r.log").read()=="h\nb\n"
+    assert len([f for f in os.listdir(tmp_path) if f.startswith("r.log.")])==1
+
+def test_writer_drops_instead_of_blocking(tmp_path):
+    w=LogWriter(str(tmp_path/"d.log"), maxsize=1, fsync_s=-1)
+    w.close()                       # no consumer: the queue stays full after one line
+    for i in range(3): w.write(str(i))
+    assert w.dropped==2
@@ -0,0 +1,30 @@
+import time, asyncio
+from quant_intraday.engine.control_plane import get_control_plane
+from quant_intraday.engine.loop_monitor import LoopMonitor, HOLD
+
+def _block(s):
+    time.sleep(s)
+
+def test_stall_dump_and_safe_mode(tmp_path):
+    mon=LoopMonitor(str(tmp_path), interval_s=0.02, stall_s=0.1, safe_mode=True, hold_s=0.3)
+    cp=get_control_plane(str(tmp_path))
+    async def go():
+        mon.ensure(asyncio.get_running_loop())
+        await asyncio.sleep(0.1)
+        async def blocker(): _block(0.4)
+        await asyncio.create_task(blocker(), name="blocker")
+        await asyncio.sleep(0.05)
+        tripped=cp.snapshot.paused() and HOLD in cp.snapshot.holds
+        await asyncio.sleep(0.6)
+        return tripped
+    assert asyncio.run(go())
+    assert mon.stalls==1 and mon.max_lag_s>=0.3
+    assert not mon.tripped and not cp.snapshot.paused()
+    mon._w.flush()
+    log=(tmp_path/'stalls.log').read_text()
+    assert "task=blocker" in log and "_block" in log and "safe mode on" in log and "safe mode off" in log
+
+def test_observe_without_safe_mode(tmp_path):
+    mon=LoopMonitor(str(tmp_path), stall_s=0.1)
+    mon.observe(0.5, now=0.0); mon.observe(0.0, now=100.0)
+    assert not mon.tripped and not get_control_plane(str(tmp_path)).snapshot.holds and mon.max_lag_s==0.5
@@ -0,0 +1,26 @@
+import asyncio, json, websockets
+from quant_intraday.engine.md_hub import MarketDataHub
+
+def test_hub_fanout_and_refcount():
+    async def main():
+        subs=[]; conns=[]
+        async def handler(ws):
+            conns.append(ws)
+            async for m in ws:
+                j=json.loads(m); subs.append(j)
+                if j["op"]=="subscribe":
+                    for a in j["args"]:
+                        await ws.send(json.dumps({"arg":a,"data":[{"x":1}]}))
+        async with websockets.serve(handler, "127.0.0.1", 0) as srv:
+            url=f"ws://127.0.0.1:{srv.sockets[0].getsockname()[1]}"
+            hub=MarketDataHub(max_subs=1)
+            q1=hub.subscribe(url,"books5","A"); q2=hub.subscribe(url,"books5","A")
+            q3=hub.subscribe(url,"books5","B")  # max_subs=1 -> second shard
+            m1,m2,m3=await asyncio.wait_for(asyncio.gather(q1.get(),q2.get(),q3.get()), 5)
+            assert m1 is m2 and m1["arg"]["instId"]=="A" and m3["arg"]["instId"]=="B"
+            assert len(conns)==2 and hub.stats()["subscriptions"]==2
+            hub.unsubscribe(url,"books5","A",q1); assert hub.stats()["subscriptions"]==2
+            hub.unsubscribe(url,"books5","A",q2); assert hub.stats()["subscriptions"]==1
+            hub.unsubscribe(url,"books5","B",q3); await asyncio.sleep(0.05)
+            assert hub.stats()["connections"]==0
+    asyncio.run(main())
@@ -0,0 +1,117 @@
+import asyncio
+import pytest
+from types import SimpleNamespace
+from quant_intraday.engine.live_bot import Bot, RunConfig
+from quant_intraday.engine.conflate import ConflatingSlot
+from quant_intraday.engine.order_tracker import OrderTracker
+from quant_intraday.engine.optimizer import ExecOptimizer
+from quant_intraday.engine.lob_executor import LOBExecutor
+from quant_intraday.sim.exchange import CL_ORD_ID
+
+class _W:
+    def write(self, line): pass
+
+class _Exchange:
+    """Fills half of the first order on placement; the repost fills completely."""
+    def __init__(self): self.bot=None; self.placed=[]; self.cancels=[]
+    def _push(self, d):
+        self.bot._orders.on_order({"instId": "X", **d}); self.bot._wake.publish("order")
+    async def aplace_order(self, **kw):
+        self.placed.append(kw); n=len(self.placed); sz=kw["sz"]
+        loop=asyncio.get_running_loop()
+        if n==1: loop.call_soon(self._push, {"clOrdId": kw["clOrdId"], "ordId": "o1", "state": "partially_filled", "accFillSz": "4", "avgPx": "100"})
+        else: loop.call_soon(self._push, {"clOrdId": kw["clOrdId"], "ordId": f"o{n}", "state": "filled", "accFillSz": sz, "avgPx": "101"})
+        return {"ordId": f"o{n}", "clOrdId": kw["clOrdId"], "sCode": "0"}
+    async def acancel_order(self, **kw):
+        self.cancels.append(kw)
+        asyncio.get_running_loop().call_soon(self._push, {"clOrdId": kw["clOrdId"], "state": "canceled", "accFillSz": "4"})
+        return {"sCode": "0"}
+
+class _Bot(SimpleNamespace):
+    _wait_event = Bot._wait_event
+
+def _bot():
+    ex=_Exchange()
+    bot=_Bot(cfg=RunConfig("X", live=True, use_private=True), client=ex, _private_ws=SimpleNamespace(ready=True), _wake=ConflatingSlot(),
+             _attach={}, _exec_w=_W(), _costs=SimpleNamespace(tick_size=0.1), _book_limit_px=lambda side, px: px)
+    bot._orders=OrderTracker(bot); ex.bot=bot
+    return bot, ex
+
+def test_tracker_fills_are_monotonic_and_terminal_states_stick():
+    bot, _ = _bot(); t=bot._orders
+    o=t.track("c1", 10)
+    t.on_order({"clOrdId": "c1", "ordId": "o1", "state": "partially_filled", "accFillSz": "6", "avgPx": "100"})
+    t.on_order({"ordId": "o1", "state": "live", "accFillSz": "2"})          # stale, matched by ordId
+    assert (o.filled, o.state, o.remaining) == (6.0, "live", 4.0)
+    t.on_order({"clOrdId": "c1", "state": "filled", "accFillSz": "10", "avgPx": "100.5"})
+    t.on_order({"clOrdId": "c1", "state": "live"})
+    assert o.done and o.state == "filled" and o.remaining == 0 and t.avg_px(["c1"]) == 100.5
+    assert t.on_order({"clOrdId": "other", "state": "filled"}) is None
+
+def test_optimizer_cancels_and_reposts_only_the_remainder():
+    bot, ex = _bot()
+    opt=ExecOptimizer(step_ticks=1, slice_timeout_s=0.2, max_reposts=3, cross_when_last=False)
+    ids=asyncio.run(opt.execute(bot, "buy", "long", 10, 100.0))
+    assert [p["sz"] for p in ex.placed] == ["10", "6"]
+    assert len(ex.cancels) == 1 and ex.cancels[0]["clOrdId"] == ex.placed[0]["clOrdId"]
+    assert ids == ["o1", "o2"]
+    assert bot._orders.filled([p["clOrdId"] for p in ex.placed]) == 10
+    assert all(CL_ORD_ID.fullmatch(p["clOrdId"]) for p in ex.placed)
+
+def test_cancel_settles_over_rest_when_pushes_are_lost():
+    bot, ex = _bot(); t=bot._orders
+    ex.acancel_order=lambda **kw: asyncio.sleep(0, {"sCode": "0"})      # cancel ack, but the push never comes
+    ex.get_order=lambda inst, clOrdId=None: {"clOrdId": clOrdId, "state": "canceled", "accFillSz": "7"}
+    async def acall(cls, fn, *a, inst="", prio="poll", **kw): return fn(*a, **kw)
+    ex.acall=acall
+    o=t.track("c1", 10)
+    asyncio.run(t.cancel(o, settle_s=0.05))
+    assert o.done and o.filled == 7 and o.remaining == 0
+
+def _rest(ex, orders):
+    ex.get_order=lambda inst, clOrdId=None: dict(orders.get(clOrdId, {}))
+    async def acall(cls, fn, *a, inst="", prio="poll", **kw): return fn(*a, **kw)
+    ex.acall=acall
+
+def test_place_timeout_keeps_a_landed_order_and_reposts_only_the_remainder():
+    bot, ex = _bot(); orders={}
+    place=ex.aplace_order
+    async def flaky(**kw):
+        if not ex.placed:                              # lands on the exchange, the ack is lost
+            ex.placed.append(kw)
+            orders[kw["clOrdId"]]={"clOrdId": kw["clOrdId"], "ordId": "o1", "state": "partially_filled", "accFillSz": "4", "avgPx": "100"}
+            raise TimeoutError("read timeout")
+        return await place(**kw)
+    ex.aplace_order=flaky; _rest(ex, orders)
+    opt=ExecOptimizer(step_ticks=1, slice_timeout_s=0.2, max_reposts=3, cross_when_last=False)
+    asyncio.run(opt.execute(bot, "buy", "long", 10, 100.0))
+    assert [p["sz"] for p in ex.placed] == ["10", "6"]
+    assert bot._orders.filled([p["clOrdId"] for p in ex.placed]) == 10
+
+def test_place_timeout_cancels_an_unknown_order_before_raising():
+    bot, ex = _bot(); t=bot._orders
+    async def lost(**kw): raise ConnectionError("reset")
+    ex.aplace_order=lost; _rest(ex, {})
+    with pytest.raises(ConnectionError):
+        asyncio.run(t.place(instId="X", sz="5", px="100", clOrdId="c1"))
+    assert [c["clOrdId"] for c in ex.cancels] == ["c1"] and t.get("c1").state == "rejected"
+
+def test_lob_polls_rest_on_an_interval_not_per_book_event():
+    bot, ex = _bot(); bot.cfg.use_private=False; bot._orders=OrderTracker(bot, poll_s=0.2)
+    bot._round_px=lambda px: round(px, 1); bot._log_dir="."
+    bot._book=SimpleNamespace(best_bid=100.0, best_ask=100.2, spread=0.2, mid=100.1, top_imbalance=0.0, bid_q=10.0, ask_q=10.0)
+    orders={}; queries=[]; _rest(ex, orders)
+    get=ex.get_order; ex.get_order=lambda inst, clOrdId=None: (queries.append(clOrdId), get(inst, clOrdId))[1]
+    async def place(**kw):
+        ex.placed.append(kw); orders[kw["clOrdId"]]={"clOrdId": kw["clOrdId"], "state": "live", "accFillSz": "0"}
+        return {"ordId": "o1", "clOrdId": kw["clOrdId"], "sCode": "0"}
+    ex.aplace_order=place
+    async def main():
+        async def book():
+            for k in range(100):
+                await asyncio.sleep(0.005); bot._wake.publish("book")
+                if k == 60: orders[ex.placed[0]["clOrdId"]].update(state="filled", accFillSz="3", avgPx="100")
+        asyncio.get_running_loop().create_task(book())
+        return await LOBExecutor(min_dwell_s=5).execute(bot, "buy", "long", 3, 100.0)
+    assert asyncio.run(main()) == ["o1"]
+    assert bot._orders.filled([ex.placed[0]["clOrdId"]]) == 3 and 1 <= len(queries) <= 5
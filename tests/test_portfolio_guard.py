@@ -0,0 +1,58 @@
+import json, sqlite3, datetime
+import pytest
+import multiprocessing as mp
+from quant_intraday.utils.portfolio_guard import PortfolioGuard, PortfolioLimits
+
+def _writer(path, inst, n):
+    g=PortfolioGuard(path=path)
+    for i in range(n):
+        g.consume(inst, 1.0); g.mark_pnl(1000.0 - i)
+
+def test_concurrent_writers_lose_no_updates(tmp_path):
+    path=str(tmp_path/"risk.db")
+    g=PortfolioGuard(PortfolioLimits(daily_loss_limit_pct=0.5, max_concurrent_assets=4), path=path); g.open_day(1000.0)
+    ctx=mp.get_context("spawn")
+    ps=[ctx.Process(target=_writer, args=(path, f"I{k}", 200)) for k in range(4)]
+    for p in ps: p.start()
+    for p in ps: p.join(60)
+    s=g.snapshot()
+    assert s["entries_today"]==800 and all(v["consumed"]==200.0 for v in s["instruments"].values())
+    assert not g.can_enter("I9", 1.0) and g.can_enter("I0", 1.0)
+    g.close_position("I1"); assert g.can_enter("I9", 1.0)
+
+def test_day_and_slots_are_per_account(tmp_path):
+    path=str(tmp_path/"risk.db"); lim=PortfolioLimits(daily_loss_limit_pct=0.05, max_concurrent_assets=1)
+    a=PortfolioGuard(lim, path=path, account="key-a"); b=PortfolioGuard(lim, path=path, account="key-b")
+    a.open_day(10000.0); b.open_day(2000.0)
+    b.mark_pnl(1000.0); b.consume("ETH", 1.0)
+    assert a.can_enter("BTC", 10.0) and not b.can_enter("BTC", 10.0)
+    assert a.snapshot()["equity_now"]==10000.0 and a.snapshot()["instruments"]=={}
+    a.consume("BTC", 10.0); b.close_position("BTC")
+    assert a.snapshot()["instruments"]["BTC"]["active"] and not a.can_enter("SOL", 1.0)
+
+def test_pre_account_database_is_migrated(tmp_path):
+    path=str(tmp_path/"risk.db"); c=sqlite3.connect(path)
+    c.executescript("""
+    CREATE TABLE day (id INTEGER PRIMARY KEY CHECK (id=1), date TEXT NOT NULL, equity_open REAL NOT NULL, equity_now REAL NOT NULL, entries_today INTEGER NOT NULL);
+    CREATE TABLE instruments (inst TEXT PRIMARY KEY, active INTEGER NOT NULL, consumed REAL NOT NULL);
+    """)
+    c.execute("INSERT INTO day VALUES (1, ?, 1000.0, 990.0, 2)", (datetime.date.today().isoformat(),))
+    c.execute("INSERT INTO instruments VALUES ('BTC', 1, 5.0)"); c.commit(); c.close()
+    s=PortfolioGuard(path=path, account="key-a").snapshot()
+    assert (s["equity_now"], s["entries_today"], s["instruments"]["BTC"]["consumed"])==(990.0, 2, 5.0)
+    assert PortfolioGuard(path=path, account="key-b").snapshot()["instruments"]=={}
+
+def test_legacy_json_state_is_imported(tmp_path):
+    path=tmp_path/"risk.json"; today=datetime.date.today().isoformat()
+    path.write_text(json.dumps({"date": today, "equity_open": 1000.0, "equity_now": 980.0, "entries_today": 3,
+                                "instruments": {"BTC": {"active": True, "consumed": 7.0}}}))
+    g=PortfolioGuard(PortfolioLimits(daily_loss_limit_pct=0.03), path=str(path))
+    s=g.snapshot()
+    assert (s["date"], s["equity_now"], s["entries_today"], s["instruments"]["BTC"])==(today, 980.0, 3, {"active": True, "consumed": 7.0})
+    assert not g.can_enter("BTC", 15.0) and (tmp_path/"risk.json.bak").exists()
+
+def test_unknown_state_file_is_refused(tmp_path):
+    path=tmp_path/"risk.db"; path.write_text("not a database")
+    with pytest.raises(RuntimeError, match="QI_RISK_STATE"):
+        PortfolioGuard(path=str(path))
+    assert path.read_text()=="not a database"
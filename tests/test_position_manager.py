@@ -0,0 +1,77 @@
+import asyncio
+from types import SimpleNamespace
+from quant_intraday.engine.live_bot import CandleBuffer, RunConfig
+from quant_intraday.engine.position_manager import PositionManager
+
+class _Client:
+    def __init__(self): self.amends=[]
+    def amend_algo(self, **kw): self.amends.append(kw)
+    async def acall(self, cls, fn, *a, prio="poll", inst="", **kw): return fn(*a, **kw)
+
+class _W:
+    def write(self, line): pass
+
+class _G:
+    def __init__(self): self.closed=[]
+    def close_position(self, inst): self.closed.append(inst)
+
+def test_trails_once_per_bar_and_retires():
+    buf=CandleBuffer(100)
+    bot=SimpleNamespace(buffer=buf, cfg=RunConfig("X", use_private=True, trailing_be_rr=1.0, trailing_atr_mult=1.0), client=_Client(), _trail_w=_W(), _pguard=_G())
+    pm=PositionManager(bot)
+    for i in range(30): assert buf.upsert(i, 100+i, 101+i, 99+i, 100+i, 1)
+    assert not buf.upsert(29, 0, 0, 0, 0, 0)
+    pm.open("long", 100.0, 98.0, "A1")
+    async def main():
+        pm.on_bar(); await pm._task
+    asyncio.run(main())
+    (kw,)=bot.client.amends
+    assert kw["algoId"]=="A1" and float(kw["newSlTriggerPx"])==pm.positions["long"].sl > 98.0
+    pm.on_private("positions", {"instId": "X", "posSide": "long", "pos": "0"})
+    assert not pm.positions and bot._pguard.closed==["X"]
+
+def test_native_trailing_hands_over_once():
+    buf=CandleBuffer(100); client=_Client(); client.algos=[]
+    client.order_algo=lambda **kw: client.algos.append(kw) or {"algoId": "T1"}
+    bot=SimpleNamespace(buffer=buf, cfg=RunConfig("X", use_private=True, native_trailing=True, trailing_atr_mult=2.0), client=client, _trail_w=_W(), _pguard=_G())
+    pm=PositionManager(bot)
+    for i in range(30): buf.upsert(i, 100+i, 101+i, 99+i, 100+i, 1)
+    pm.open("long", 100.0, 98.0, None, sz="3")
+    async def main():
+        for _ in range(2):
+            pm.on_bar(); await pm._task
+    asyncio.run(main())
+    (kw,)=client.algos
+    assert kw["ordType"]=="move_order_stop" and kw["sz"]=="3" and float(kw["callbackSpread"])==2.0*pm.atr
+    assert not client.amends and pm.positions["long"].trail_algo_id=="T1"
+
+def test_same_side_entry_merges_into_position():
+    buf=CandleBuffer(100); client=_Client()
+    bot=SimpleNamespace(buffer=buf, cfg=RunConfig("X", use_private=True), client=client, _trail_w=_W(), _pguard=_G())
+    pm=PositionManager(bot)
+    async def main():
+        pm.open("long", 100.0, 96.0, "A1", ["o1"], sz="2")
+        pm.open("long", 106.0, 103.0, None, ["o2"], sz="1")
+        await asyncio.sleep(0.05)
+    asyncio.run(main())
+    p=pm.positions["long"]
+    assert p.sz=="3" and p.entry==102.0 and p.sl==103.0 and p.algo_id=="A1" and p.ord_ids==["o1", "o2"]
+    (kw,)=client.amends
+    assert kw["algoId"]=="A1" and float(kw["newSlTriggerPx"])==103.0
+
+def test_attached_stops_are_tracked_not_amended():
+    buf=CandleBuffer(100); client=_Client()
+    bot=SimpleNamespace(buffer=buf, cfg=RunConfig("X", use_private=True, attach_algo=True), client=client, _trail_w=_W(), _pguard=_G())
+    pm=PositionManager(bot)
+    for i in range(30): buf.upsert(i, 100+i, 101+i, 99+i, 100+i, 1)
+    pm.open("long", 100.0, 98.0, None, sz="1")
+    async def main():
+        pm.on_bar(); await pm._task
+    asyncio.run(main())
+    assert not client.amends and pm.positions["long"].sl==98.0
+
+def test_attach_algo_trailing_warning_is_logged_once(caplog):
+    with caplog.at_level("WARNING", logger="quant_intraday.engine.live_bot"):
+        for _ in range(3): RunConfig("WARNONCE-X", attach_algo=True)
+    assert [r.getMessage() for r in caplog.records].count(
+        "WARNONCE-X: attach_algo stops cannot be amended; trailing is off unless native_trailing=True") == 1
@@ -1,4 +1,69 @@
+import asyncio, time
+from types import SimpleNamespace
 from quant_intraday.engine.pov_executor import POVExecutor
+from quant_intraday.engine.conflate import ConflatingSlot
+from quant_intraday.engine.live_bot import Bot, RunConfig
+from quant_intraday.engine.order_tracker import OrderTracker
+from quant_intraday.sim.exchange import CL_ORD_ID
+
 def test_pov_conf():
     e=POVExecutor(0.1, min_child=2, adverse_ticks=3, queue_max=1000, cycle_s=2)
     assert e.min_child==2 and e.adverse_ticks==3
+
+
+class _WakeBot(SimpleNamespace):
+    _wait_event = Bot._wait_event
+
+
+def test_pov_pace_wakes_on_adverse_book_move():
+    async def main():
+        bot = _WakeBot(_wake=ConflatingSlot(), _book=SimpleNamespace(mid=100.0), _private_ws=None)
+        e = POVExecutor(0.1, adverse_ticks=2, cycle_s=5)
+        async def move():
+            await asyncio.sleep(0.02)
+            bot._book = SimpleNamespace(mid=100.5); bot._wake.publish("book")   # below threshold
+            await asyncio.sleep(0.02)
+            bot._book = SimpleNamespace(mid=103.0); bot._wake.publish("book")   # 3 ticks adverse for a buy
+        t0 = time.perf_counter(); asyncio.get_running_loop().create_task(move())
+        await e._pace(bot, "buy", 1.0, 100.0)
+        return time.perf_counter() - t0
+    assert asyncio.run(main()) < 1.0
+
+
+def test_wait_event_times_out_without_events():
+    async def main():
+        bot = _WakeBot(_wake=ConflatingSlot())
+        t0 = time.perf_counter(); v = await bot._wait_event(0, 0.05)
+        return v, time.perf_counter() - t0
+    v, dt = asyncio.run(main())
+    assert v == 0 and 0.04 <= dt < 1.0
+
+
+class _W:
+    def write(self, line): pass
+
+
+class _FillingExchange:
+    """Fills every child completely on placement (pushed over the private stream)."""
+    def __init__(self): self.bot = None; self.placed = []
+    def _push(self, d):
+        self.bot._orders.on_order({"instId": "X", **d}); self.bot._wake.publish("order")
+    async def aplace_order(self, **kw):
+        self.placed.append(kw); n = len(self.placed)
+        asyncio.get_running_loop().call_soon(self._push, {"clOrdId": kw["clOrdId"], "ordId": f"o{n}", "state": "filled",
+                                                          "accFillSz": kw["sz"], "avgPx": kw["px"]})
+        return {"ordId": f"o{n}", "clOrdId": kw["clOrdId"], "sCode": "0"}
+
+
+def test_pov_live_crosses_a_deep_queue_and_sizes_from_fills():
+    ex = _FillingExchange()
+    bot = _WakeBot(cfg=RunConfig("X", live=True, use_private=True), client=ex, _private_ws=SimpleNamespace(ready=True),
+                   _wake=ConflatingSlot(), _attach={}, _exec_w=_W(), _costs=SimpleNamespace(tick_size=0.1),
+                   _round_px=lambda px: round(px, 1),
+                   _book=SimpleNamespace(best_bid=100.0, bid_q=10.0, best_ask=100.1, ask_q=1e6, mid=100.05))
+    bot._orders = OrderTracker(bot); ex.bot = bot
+    ids = asyncio.run(POVExecutor(0.5, min_child=1, queue_max=1000, cycle_s=1).execute(bot, "buy", "long", 2, 100.0))
+    # first cycle: child=1, remain=2 <= 2*child behind a deep ask queue -> cross one tick through the ask
+    assert [(p["sz"], p["px"]) for p in ex.placed] == [("1", "100.200000"), ("1", "100.200000")]
+    assert all(CL_ORD_ID.fullmatch(p["clOrdId"]) for p in ex.placed)
+    assert ids == ["o1", "o2"] and bot._orders.filled([p["clOrdId"] for p in ex.placed]) == 2
@@ -0,0 +1,31 @@
+import asyncio, json, websockets
+from quant_intraday.exchange.private_ws import OKXPrivateWS
+from quant_intraday.exchange.trade_api import TradeAPIMixin
+
+class _Rest(TradeAPIMixin):
+    def __init__(self): self.rest_calls=0
+    def place_order(self, **kw):
+        self.rest_calls+=1; return {"ordId": "rest", "sCode": "0"}
+
+def test_ws_order_correlation_and_rest_fallback():
+    async def main():
+        async def handler(ws):
+            async for m in ws:
+                j=json.loads(m)
+                if j["op"]=="login": await ws.send(json.dumps({"event": "login", "code": "0"}))
+                elif j["op"]=="order":
+                    await asyncio.sleep(0.01 if j["args"][0]["clOrdId"]=="a" else 0)  # acks out of order
+                    await ws.send(json.dumps({"id": j["id"], "op": "order", "code": "0",
+                                              "data": [{"clOrdId": j["args"][0]["clOrdId"], "ordId": "W"+j["args"][0]["clOrdId"], "sCode": "0"}]}))
+        async with websockets.serve(handler, "127.0.0.1", 0) as srv:
+            cli=_Rest()
+            assert (await cli.aplace_order(clOrdId="x"))["ordId"]=="rest"  # no socket attached
+            pw=OKXPrivateWS("k", "s", "p", url=f"ws://127.0.0.1:{srv.sockets[0].getsockname()[1]}")
+            cli.ws_trade=pw; t=asyncio.create_task(pw.run())
+            for _ in range(100):
+                if pw.ready: break
+                await asyncio.sleep(0.01)
+            a, b=await asyncio.gather(cli.aplace_order(clOrdId="a"), cli.aplace_order(clOrdId="b"))
+            assert (a["ordId"], b["ordId"])==("Wa", "Wb") and cli.rest_calls==1
+            pw.stop(); t.cancel()
+    asyncio.run(main())
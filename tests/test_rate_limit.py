@@ -2,3 +2,15 @@ from quant_intraday.utils.rate_limit import TokenBucket
 
 def test_tb():
     tb=TokenBucket(1,100); assert tb.take(1); assert not tb.take(1)
+
+def test_scheduler_serves_cancels_before_entries():
+    import asyncio
+    from quant_intraday.exchange.scheduler import RequestScheduler
+    async def main():
+        s=RequestScheduler({"order": (2, 0.2, "inst")}, headroom=1.0); order=[]
+        async def req(tag, prio):
+            await s.acquire("order", "X", prio); order.append(tag)
+        await req("a", "new"); await req("b", "new")  # bucket drained
+        await asyncio.gather(req("poll", "poll"), req("new", "new"), req("cxl", "cancel"))
+        assert order==["a", "b", "cxl", "new", "poll"] and s.waited==3
+    asyncio.run(main())
@@ -0,0 +1,45 @@
+import json, asyncio
+from quant_intraday.engine.shards import load_costs, plan_shards, backoff_s
+from quant_intraday.engine.portfolio import PortfolioOrchestrator
+from quant_intraday.utils.portfolio_guard import PortfolioGuard
+
+def test_plan_shards_lpt():
+    costs = {"A": 10.0, "B": 6.0, "C": 5.0, "D": 4.0, "E": 1.0}
+    shards = plan_shards(costs, 2)
+    loads = sorted(sum(costs[k] for k in s) for s in shards)
+    assert loads == [12.0, 14.0] and sorted(sum(shards, [])) == sorted(costs)
+    assert len(plan_shards(costs, 10)) == 5
+
+def test_load_costs(tmp_path):
+    (tmp_path / "stages_A.json").write_text(json.dumps({"stages": {"total": {"p50_ms": 12.0}, "equity": {"p50_ms": 10.0}}}))
+    (tmp_path / "stages_B.json").write_text(json.dumps({"stages": {"total": {"p50_ms": 4.0}}}))
+    c = load_costs(str(tmp_path), ["A", "B", "C"])
+    assert c["A"] == 2.0 and c["B"] == 4.0 and c["C"] in (2.0, 4.0)
+
+def test_backoff():
+    assert [backoff_s(n) for n in (1, 2, 3)] == [2.0, 4.0, 8.0] and backoff_s(20) == 120.0
+
+def test_shared_equity_and_halt(tmp_path):
+    g = PortfolioGuard(path=str(tmp_path / "risk.db")); h = PortfolioGuard(path=str(tmp_path / "risk.db"))
+    assert g.equity() is None
+    g.mark_pnl(1000.0)
+    assert h.equity(5.0) == 1000.0
+    assert PortfolioGuard(path=str(tmp_path / "risk.db"), account="other-key").equity(5.0) is None
+    assert h.can_enter("X", 1.0)
+    g.halt("dd_limit")
+    assert h.halted() == "dd_limit" and not h.can_enter("X", 1.0)
+    h.resume(); assert g.halted() is None
+
+class _Bot:
+    def __init__(self): self.cancelled = False
+    async def run(self):
+        try: await asyncio.sleep(60)
+        except asyncio.CancelledError: self.cancelled = True; raise
+
+def test_watchdog_stops_bots(tmp_path):
+    o = PortfolioOrchestrator(None, cfg_path="", log_dir=str(tmp_path), watch_s=0.01)
+    o.pguard = PortfolioGuard(path=str(tmp_path / "risk.db"))
+    o.guard.check = lambda: True
+    o.bots = [_Bot(), _Bot()]
+    assert asyncio.run(asyncio.wait_for(o.run(), 5)) == "dd_limit"
+    assert all(b.cancelled for b in o.bots) and o.pguard.halted() == "dd_limit"
@@ -0,0 +1,61 @@
+from quant_intraday.sim.matching import MatchingEngine, SimOrder, OrderError
+from quant_intraday.sim.exchange import SimExchange, SimInstrument, CL_ORD_ID
+
+def _eng():
+    e = MatchingEngine(); e.add_instrument("X", 0.1)
+    return e
+
+def test_price_time_priority():
+    e = _eng()
+    a = e.submit(SimOrder("", "X", "sell", 1, 100.0, cl_ord_id="a"), 1)
+    b = e.submit(SimOrder("", "X", "sell", 1, 100.0, cl_ord_id="b"), 2)
+    c = e.submit(SimOrder("", "X", "sell", 1, 99.9, cl_ord_id="c"), 3)
+    t = e.submit(SimOrder("", "X", "buy", 1.5, 100.0, ord_type="ioc"), 4)
+    assert c.state == "filled" and a.filled == 0.5 and b.filled == 0
+    assert t.state == "filled" and abs(t.avg_px - (99.9 + 50.0) / 1.5) < 1e-9
+    assert e.books["X"].best("sell") == 100.0
+
+def test_post_only_fok_and_duplicate():
+    e = _eng()
+    e.submit(SimOrder("", "X", "sell", 2, 100.0), 1)
+    assert e.submit(SimOrder("", "X", "buy", 1, 100.0, ord_type="post_only"), 2).state == "canceled"
+    assert e.submit(SimOrder("", "X", "buy", 3, 100.0, ord_type="fok"), 3).filled == 0
+    e.submit(SimOrder("", "X", "buy", 1, 99.0, cl_ord_id="d"), 4)
+    try:
+        e.submit(SimOrder("", "X", "buy", 1, 99.0, cl_ord_id="d"), 5); assert False
+    except OrderError as err:
+        assert err.code == "51016"
+
+def test_amend_priority():
+    e = _eng()
+    a = e.submit(SimOrder("", "X", "buy", 2, 99.0, cl_ord_id="a"), 1)
+    e.submit(SimOrder("", "X", "buy", 2, 99.0, cl_ord_id="b"), 2)
+    e.amend("X", cl_ord_id="a", new_sz=1.0)                # size-down keeps the queue spot
+    e.submit(SimOrder("", "X", "sell", 1, 99.0, ord_type="market"), 3)
+    assert a.state == "filled"
+    a2 = e.submit(SimOrder("", "X", "buy", 1, 99.0, cl_ord_id="c"), 4)
+    e.amend("X", cl_ord_id="c", new_sz=3.0)                # size-up goes to the back
+    e.submit(SimOrder("", "X", "sell", 2, 99.0, ord_type="market"), 5)
+    assert a2.filled == 0 and e.get("X", cl_ord_id="b").state == "filled"
+
+def test_exchange_fills_and_pnl():
+    ex = SimExchange([SimInstrument("X", 100.0, 0.1, 1.0)], equity=1000.0, history_bars=10)
+    ex.engine.submit(SimOrder("", "X", "sell", 5, 100.0, owner="flow"), 1)
+    r = ex.place({"instId": "X", "side": "buy", "posSide": "net", "ordType": "market", "sz": "2", "clOrdId": "u1"})
+    assert r["sCode"] == "0"
+    orders, trades, dirty = ex.pop_events()
+    assert dirty and trades["X"][0].sz == 2 and orders[-1]["state"] == "filled"
+    assert ex.positions("X")[0]["pos"] == "2"
+    ex.engine.submit(SimOrder("", "X", "buy", 5, 110.0, owner="flow"), 2)
+    ex.engine.submit(SimOrder("", "X", "sell", 5, 110.2, owner="flow"), 3)
+    assert float(ex.positions("X")[0]["upl"]) > 19.0
+    assert ex.get_order("X", cl_ord_id="u1")["accFillSz"] == "2"
+
+def test_exchange_rejects_non_alphanumeric_cl_ord_id():
+    ex = SimExchange([SimInstrument("X", 100.0, 0.1, 1.0)], equity=1000.0, history_bars=10)
+    for cl in ("bot_opt_1_1", "x" * 33):
+        try:
+            ex.place({"instId": "X", "side": "buy", "ordType": "limit", "px": "99", "sz": "1", "clOrdId": cl}); assert False
+        except OrderError as err:
+            assert err.code == "51000"
+    assert CL_ORD_ID.fullmatch("bot1718000000l2")
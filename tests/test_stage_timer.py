@@ -0,0 +1,32 @@
+import json, time, threading
+from quant_intraday.utils.stage_timer import StageTimer, SamplingProfiler
+
+
+def test_ring_buffer_quantiles_and_export(tmp_path):
+    st = StageTimer("BTC-USDT-SWAP", size=100)
+    for i in range(250):
+        st.record("route", (i % 100 + 1) * 1_000_000)   # 1..100 ms, wraps the ring
+    st.start(); st.lap("equity"); st.stop()
+    s = st.summary()
+    assert s["route"]["n"] == 250
+    assert 49 <= s["route"]["p50_ms"] <= 52 and s["route"]["p99_ms"] >= 99
+    assert set(s) == {"route", "equity", "total"}
+    fp = tmp_path / "stages_BTC.json"
+    assert st.export(str(fp)) is not None and st.export(str(fp)) is None   # rate-limited
+    assert json.loads(fp.read_text())["stages"]["route"]["n"] == 250
+
+
+def _busy_target(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_sampling_profiler_folded_output(tmp_path):
+    stop = threading.Event(); th = threading.Thread(target=_busy_target, args=(stop,)); th.start()
+    prof = SamplingProfiler(thread_id=th.ident, interval_s=0.001).start()
+    time.sleep(0.1); prof.stop(); stop.set(); th.join()
+    assert prof.samples > 0
+    lines = open(prof.dump(str(tmp_path / "p.folded"))).read().splitlines()
+    assert any("_busy_target" in l for l in lines)
+    stack, n = lines[0].rsplit(" ", 1)
+    assert int(n) > 0 and ";" in stack
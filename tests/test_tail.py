@@ -0,0 +1,19 @@
+import os
+from quant_intraday.utils.tail import TailReader
+from quant_intraday.utils.perf_guard import PerformanceGuard
+
+def test_tail_partial_lines_and_truncation(tmp_path):
+    p=tmp_path/"a.log"; t=TailReader(str(p))
+    assert t.poll()==[]
+    p.write_text("1\n2"); assert t.poll()==["1"]
+    with open(p,"a") as f: f.write("2\n3\n")
+    assert t.poll()==["22","3"] and not t.restarted
+    p.write_text("x\n"); assert t.poll()==["x"] and t.restarted
+
+def test_perf_guard_rolling_window(tmp_path):
+    g=PerformanceGuard(str(tmp_path), lookback=4, max_consec_loss=3, min_tp_ratio=0.0)
+    with open(tmp_path/"exits.log","w") as f:
+        for r in ("TP","SL","SL","TP","SL","SL"): f.write(f"1,X,long,{r},1,1\n")
+    assert g.stats()=={"n": 4, "tp_ratio": 0.25, "consec_sl": 2}
+    with open(tmp_path/"exits.log","a") as f: f.write("2,X,long,SL,1,1\n")
+    assert g.should_pause()
@@ -0,0 +1,33 @@
+import asyncio
+from quant_intraday.exchange.trade_api import TradeAPIMixin
+
+class _Cli(TradeAPIMixin):
+    def __init__(self): self.calls=[]
+    def _post(self, path, payload):
+        self.calls.append((path, len(payload)))
+        # exchange answers out of order and rejects clOrdId c3
+        data=[{"clOrdId": o["clOrdId"], "ordId": "O"+o["clOrdId"], "sCode": "1" if o["clOrdId"]=="c3" else "0", "sMsg": ""} for o in reversed(payload)]
+        return {"code": "2", "data": data}
+
+def test_batch_place_chunks_and_maps_results():
+    cli=_Cli()
+    res=cli.batch_place([{"instId": "X", "clOrdId": f"c{i}"} for i in range(45)])
+    assert [n for _, n in cli.calls]==[20, 20, 5] and cli.calls[0][0]=="/api/v5/trade/batch-orders"
+    assert [r["clOrdId"] for r in res]==[f"c{i}" for i in range(45)]
+    assert [r["ok"] for r in res].count(False)==1 and not res[3]["ok"] and res[4]["ordId"]=="Oc4"
+
+class _Flaky(_Cli):
+    """Batch request times out; c0 reached the exchange, c1 did not."""
+    def __init__(self): super().__init__(); self.cancels=[]
+    def _post(self, path, payload):
+        if path.endswith("batch-orders"): raise TimeoutError("read timeout")
+        self.cancels.append(payload["clOrdId"]); return {"code": "0", "data": [{"sCode": "0"}]}
+    def get_order(self, instId, ordId=None, clOrdId=None):
+        return {"ordId": "O0", "state": "live"} if clOrdId=="c0" else {}
+
+def test_transport_failure_is_unknown_then_reconciled():
+    cli=_Flaky()
+    res=cli.batch_place([{"instId": "X", "clOrdId": f"c{i}"} for i in range(2)])
+    assert [r["ok"] for r in res]==[None, None]
+    res=asyncio.run(cli.areconcile(res))
+    assert [r["ok"] for r in res]==[True, False] and res[0]["ordId"]=="O0" and cli.cancels==["c1"]